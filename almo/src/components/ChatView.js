@@ -9,6 +9,9 @@ export default function ChatView({ chat, onSendMessage, isLoading }) {
   const [uploadErrors, setUploadErrors] = useState({});
   const fileInputRef = useRef(null);
   const messagesEndRef = useRef(null);
+  const pendingDocsRef = useRef({});
+  const eventSourceRef = useRef(null);
+  const fallbackTimerRef = useRef(null);
   const { user } = useAuth();
 
   // Auto-scroll to bottom when messages change
@@ -51,62 +54,230 @@ export default function ChatView({ chat, onSendMessage, isLoading }) {
     return null;
   };
 
-  const uploadToServer = async (file) => {
+  // Legacy path: the file is posted through the API server
+  const uploadViaApi = async (file, token) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('title', file.name.split('.')[0]); // Use filename without extension as title
+
+    const response = await fetch('http://localhost:8000/api/documents/', {
+      method: 'POST',
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || errorData.file?.[0] || 'Upload failed');
+    }
+
+    return await response.json();
+  };
+
+  // Direct path: presigned part URLs; parts go straight to storage.
+  // Returns the upload_id and part ETags, or null if the server has no object storage.
+  const uploadParts = async (file, fileId, apiHeaders) => {
+    const startResponse = await fetch('http://localhost:8000/api/documents/uploads/', {
+      method: 'POST',
+      headers: apiHeaders,
+      body: JSON.stringify({
+        filename: file.name,
+        size: file.size,
+        title: file.name.split('.')[0],
+      }),
+    });
+
+    if (startResponse.status === 501) {
+      return null;
+    }
+
+    const upload = await startResponse.json();
+    if (!startResponse.ok) {
+      throw new Error(upload.error || upload.non_field_errors?.[0] || 'Upload failed');
+    }
+
+    const parts = [];
+    try {
+      for (const part of upload.parts) {
+        const start = (part.part_number - 1) * upload.part_size;
+        const partResponse = await fetch(part.url, {
+          method: 'PUT',
+          body: file.slice(start, start + upload.part_size),
+        });
+        if (!partResponse.ok) {
+          throw new Error(`Failed to upload part ${part.part_number}`);
+        }
+        parts.push({ part_number: part.part_number, etag: partResponse.headers.get('ETag') });
+        setUploadProgress(prev => ({
+          ...prev,
+          [fileId]: Math.round((parts.length / upload.parts.length) * 100),
+        }));
+      }
+    } catch (error) {
+      // Free the parts already stored
+      fetch(`http://localhost:8000/api/documents/uploads/${upload.upload_id}/complete/`, {
+        method: 'DELETE',
+        headers: apiHeaders,
+      });
+      throw error;
+    }
+
+    return { upload_id: upload.upload_id, parts };
+  };
+
+  const getApiHeaders = () => {
     const token = localStorage.getItem('access_token');
     if (!token) {
       throw new Error('Authentication required');
     }
+    return {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': 'application/json',
+    };
+  };
 
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('title', file.name.split('.')[0]); // Use filename without extension as title
+  const uploadToServer = async (file, fileId) => {
+    const apiHeaders = getApiHeaders();
 
     try {
-      const response = await fetch('http://localhost:8000/api/documents/', {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-        },
-        body: formData,
-      });
+      const upload = await uploadParts(file, fileId, apiHeaders);
+      if (upload === null) {
+        return await uploadViaApi(file, localStorage.getItem('access_token'));
+      }
 
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || errorData.file?.[0] || 'Upload failed');
+      const completeResponse = await fetch(
+        `http://localhost:8000/api/documents/uploads/${upload.upload_id}/complete/`,
+        {
+          method: 'POST',
+          headers: apiHeaders,
+          body: JSON.stringify({ parts: upload.parts }),
+        }
+      );
+      const document = await completeResponse.json();
+      if (!completeResponse.ok) {
+        throw new Error(document.error || 'Upload failed');
       }
+      return document;
+    } catch (error) {
+      throw new Error(error.message || 'Network error occurred');
+    }
+  };
 
-      return await response.json();
+  // Many files: upload them, then register all of them with one batch request
+  const uploadBatchToServer = async (entries) => {
+    const apiHeaders = getApiHeaders();
+
+    try {
+      const uploads = [];
+      for (const { file, fileId } of entries) {
+        const upload = await uploadParts(file, fileId, apiHeaders);
+        if (upload === null) break;
+        uploads.push(upload);
+      }
+
+      let response;
+      if (uploads.length === entries.length) {
+        response = await fetch('http://localhost:8000/api/documents/batch/', {
+          method: 'POST',
+          headers: apiHeaders,
+          body: JSON.stringify({ uploads }),
+        });
+      } else {
+        // No object storage: post the files themselves in one multipart request
+        const formData = new FormData();
+        entries.forEach(({ file }) => formData.append('files', file));
+        response = await fetch('http://localhost:8000/api/documents/batch/', {
+          method: 'POST',
+          headers: { 'Authorization': apiHeaders['Authorization'] },
+          body: formData,
+        });
+      }
+
+      const batch = await response.json();
+      if (!response.ok) {
+        const fileErrors = batch.files && !Array.isArray(batch.files)
+          ? Object.entries(batch.files).map(([name, errors]) => `${name}: ${[].concat(errors).join(' ')}`).join('; ')
+          : null;
+        throw new Error(batch.error || fileErrors || batch.non_field_errors?.[0] || 'Batch upload failed');
+      }
+      return batch;
     } catch (error) {
       throw new Error(error.message || 'Network error occurred');
     }
   };
 
+  const clearProgress = (fileIds) => {
+    setUploadProgress(prev => {
+      const rest = { ...prev };
+      fileIds.forEach(fileId => delete rest[fileId]);
+      return rest;
+    });
+  };
+
+  const handleBatchUpload = async (entries) => {
+    entries.forEach(({ fileId }) => setUploadProgress(prev => ({ ...prev, [fileId]: 0 })));
+    onSendMessage(`📤 Uploading ${entries.length} files...`);
+
+    try {
+      const batch = await uploadBatchToServer(entries);
+
+      // The batch returns documents in the order the files were sent
+      batch.documents.forEach((document, index) => {
+        const { file } = entries[index];
+        setUploadedFiles(prev => [...prev, {
+          id: document.id,
+          name: file.name,
+          size: file.size,
+          type: file.type,
+          status: document.status,
+          uploadedAt: new Date()
+        }]);
+        watchDocumentStatus(document.id, file.name);
+      });
+
+      onSendMessage(`✅ Uploaded ${entries.length} files (Processing...)`);
+    } catch (error) {
+      entries.forEach(({ fileId }) => setUploadErrors(prev => ({ ...prev, [fileId]: error.message })));
+      onSendMessage(`❌ Upload failed: ${entries.length} files - ${error.message}`);
+    }
+
+    clearProgress(entries.map(({ fileId }) => fileId));
+  };
+
   const handleFileUpload = async (e) => {
     const files = Array.from(e.target.files);
     if (files.length === 0) return;
 
     setIsUploading(true);
     setUploadErrors({});
-    
-    // Process files one by one
+
+    // Validate up front; invalid files are reported and left out
+    const entries = [];
     for (const file of files) {
       const fileId = `${file.name}_${Date.now()}`;
-      
-      try {
-        // Validate file
-        const validationError = validateFile(file);
-        if (validationError) {
-          setUploadErrors(prev => ({ ...prev, [fileId]: validationError }));
-          onSendMessage(`❌ Upload failed: ${file.name} - ${validationError}`);
-          continue;
-        }
+      const validationError = validateFile(file);
+      if (validationError) {
+        setUploadErrors(prev => ({ ...prev, [fileId]: validationError }));
+        onSendMessage(`❌ Upload failed: ${file.name} - ${validationError}`);
+        continue;
+      }
+      entries.push({ file, fileId });
+    }
 
+    if (entries.length > 1) {
+      await handleBatchUpload(entries);
+    } else if (entries.length === 1) {
+      const { file, fileId } = entries[0];
+
+      try {
         // Set uploading progress
         setUploadProgress(prev => ({ ...prev, [fileId]: 0 }));
         onSendMessage(`📤 Uploading: ${file.name}...`);
 
         // Upload to server
-        const document = await uploadToServer(file);
+        const document = await uploadToServer(file, fileId);
         
         // Update local state
         setUploadedFiles(prev => [...prev, {
@@ -118,26 +289,16 @@ export default function ChatView({ chat, onSendMessage, isLoading }) {
           uploadedAt: new Date()
         }]);
 
-        // Clear progress
-        setUploadProgress(prev => {
-          const { [fileId]: _, ...rest } = prev;
-          return rest;
-        });
-
-        // Notify success and start polling for status
+        // Notify success and start watching for status updates
         onSendMessage(`✅ Uploaded: ${file.name} (Processing...)`);
-        startPollingDocumentStatus(document.id, file.name);
+        watchDocumentStatus(document.id, file.name);
 
       } catch (error) {
         setUploadErrors(prev => ({ ...prev, [fileId]: error.message }));
         onSendMessage(`❌ Upload failed: ${file.name} - ${error.message}`);
-        
-        // Clear progress on error
-        setUploadProgress(prev => {
-          const { [fileId]: _, ...rest } = prev;
-          return rest;
-        });
       }
+
+      clearProgress([fileId]);
     }
     
     setIsUploading(false);
@@ -145,48 +306,105 @@ export default function ChatView({ chat, onSendMessage, isLoading }) {
     e.target.value = '';
   };
 
-  const startPollingDocumentStatus = async (documentId, fileName) => {
+  const stopStatusUpdates = () => {
+    eventSourceRef.current?.close();
+    eventSourceRef.current = null;
+    clearTimeout(fallbackTimerRef.current);
+    fallbackTimerRef.current = null;
+  };
+
+  const handleStatusUpdate = (document) => {
+    const fileName = pendingDocsRef.current[document.id];
+    if (!fileName) return;
+
+    // Update local state
+    setUploadedFiles(prev => 
+      prev.map(file => 
+        file.id === document.id 
+          ? { ...file, status: document.status, error_message: document.error_message }
+          : file
+      )
+    );
+
+    if (document.status === 'completed') {
+      onSendMessage(`🎉 Document processed successfully: ${fileName}`);
+    } else if (document.status === 'failed') {
+      onSendMessage(`❌ Processing failed: ${fileName} - ${document.error_message}`);
+    } else {
+      // Still pending, processing or embedding
+      return;
+    }
+
+    delete pendingDocsRef.current[document.id];
+    if (Object.keys(pendingDocsRef.current).length === 0) {
+      stopStatusUpdates();
+    }
+  };
+
+  // Fallback: one batched request for all documents still processing
+  const pollBatchStatus = async (reschedule = true) => {
+    const token = localStorage.getItem('access_token');
+    const ids = Object.keys(pendingDocsRef.current);
+    if (!token || ids.length === 0) return;
+
+    try {
+      const response = await fetch(`http://localhost:8000/api/documents/status/?ids=${ids.join(',')}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        data.documents.forEach(handleStatusUpdate);
+      }
+    } catch (error) {
+      console.error('Status polling error:', error);
+    }
+
+    if (reschedule && Object.keys(pendingDocsRef.current).length > 0) {
+      fallbackTimerRef.current = setTimeout(pollBatchStatus, 5000);
+    }
+  };
+
+  // Prefer pushed updates over Server-Sent Events; fall back to batched polling
+  const startStatusUpdates = () => {
+    if (eventSourceRef.current || fallbackTimerRef.current) return;
+
     const token = localStorage.getItem('access_token');
     if (!token) return;
 
-    const pollStatus = async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/api/documents/${documentId}/`, {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-          },
-        });
+    if (typeof EventSource === 'undefined') {
+      pollBatchStatus();
+      return;
+    }
 
-        if (response.ok) {
-          const document = await response.json();
-          
-          // Update local state
-          setUploadedFiles(prev => 
-            prev.map(file => 
-              file.id === documentId 
-                ? { ...file, status: document.status, error_message: document.error_message }
-                : file
-            )
-          );
-
-          if (document.status === 'completed') {
-            onSendMessage(`🎉 Document processed successfully: ${fileName}`);
-          } else if (document.status === 'failed') {
-            onSendMessage(`❌ Processing failed: ${fileName} - ${document.error_message}`);
-          } else if (document.status === 'processing' || document.status === 'embedding') {
-            // Continue polling
-            setTimeout(pollStatus, 3000);
-          }
-        }
-      } catch (error) {
-        console.error('Status polling error:', error);
+    const source = new EventSource(
+      `http://localhost:8000/api/documents/events/?token=${encodeURIComponent(token)}`
+    );
+    source.addEventListener('status', (event) => {
+      handleStatusUpdate(JSON.parse(event.data));
+    });
+    // Catch anything that finished before the stream was connected
+    source.onopen = () => pollBatchStatus(false);
+    source.onerror = () => {
+      source.close();
+      eventSourceRef.current = null;
+      if (!fallbackTimerRef.current) {
+        fallbackTimerRef.current = setTimeout(pollBatchStatus, 2000);
       }
     };
+    eventSourceRef.current = source;
+  };
 
-    // Start polling after a short delay
-    setTimeout(pollStatus, 2000);
+  const watchDocumentStatus = (documentId, fileName) => {
+    pendingDocsRef.current[documentId] = fileName;
+    startStatusUpdates();
   };
 
+  // Close the stream when the view unmounts
+  React.useEffect(() => stopStatusUpdates, []);
+
   const handleFileButtonClick = () => {
     fileInputRef.current?.click();
   };
@@ -22,8 +22,8 @@ export default function Sidebar({ chats, selectedChatId, onSelectChat, onNewChat
       });
 
       if (response.ok) {
-        const docs = await response.json();
-        setDocuments(docs);
+        const data = await response.json();
+        setDocuments(data.results);
       }
     } catch (error) {
       console.error('Error fetching documents:', error);
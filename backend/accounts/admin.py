@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Workspace
+from .models import User, Workspace, UsageRollup
 
 
 @admin.register(Workspace)
@@ -25,3 +25,12 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Custom Fields', {'fields': ('role', 'workspace')}),
     )
+
+
+@admin.register(UsageRollup)
+class UsageRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'user', 'workspace', 'user_messages', 'assistant_messages',
+                    'user_created_tasks', 'ai_created_tasks')
+    list_filter = ('date', 'workspace')
+    search_fields = ('user__email',)
+    readonly_fields = ('id',)
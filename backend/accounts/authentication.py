@@ -0,0 +1,148 @@
+"""
+JWT authentication with a cached user lookup.
+The fields needed for authentication and permission checks are cached in a
+short-lived process-local map backed by the shared Redis cache, so most API
+requests authenticate without querying the user table. Entries are dropped
+whenever the user is saved or deleted (see signals.py).
+"""
+import time
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from config.db_router import note_authenticated_user
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+USER_CACHE_KEY = 'auth_user:{user_id}'
+
+# Everything else on the user is deferred and loaded on first access
+CACHED_USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name',
+    'role', 'workspace_id', 'is_active', 'is_staff', 'is_superuser',
+)
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+
+def _get_local(user_id):
+    with _local_lock:
+        entry = _local_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, values = entry
+    if expires_at < time.monotonic():
+        return None
+    return values
+
+
+def _set_local(user_id, values):
+    ttl = getattr(settings, 'AUTH_USER_CACHE_LOCAL_TTL', 2)
+    if ttl <= 0:
+        return
+    with _local_lock:
+        _local_cache[user_id] = (time.monotonic() + ttl, values)
+
+
+def get_cached_user_values(user_id):
+    """
+    Get the cached authentication fields for a user, loading them if needed.
+
+    Args:
+        user_id: Primary key from the token
+
+    Returns:
+        Dict of CACHED_USER_FIELDS, or None if the user does not exist
+    """
+    user_id = str(user_id)
+    values = _get_local(user_id)
+    if values is not None:
+        return values
+
+    key = USER_CACHE_KEY.format(user_id=user_id)
+    try:
+        values = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Could not read cached user {user_id}: {str(e)}")
+        values = None
+
+    if values is None:
+        # Always the primary: a lagging replica could re-cache a just-blocked user
+        values = User.objects.using(DEFAULT_DB_ALIAS).filter(id=user_id).values(*CACHED_USER_FIELDS).first()
+        if values is None:
+            return None
+        try:
+            cache.set(key, values, timeout=getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+        except Exception as e:
+            logger.warning(f"Could not cache user {user_id}: {str(e)}")
+
+    _set_local(user_id, values)
+    return values
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop a user's cached authentication fields so the next request reloads them.
+    """
+    user_id = str(user_id)
+    with _local_lock:
+        _local_cache.pop(user_id, None)
+    try:
+        cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached user {user_id}: {str(e)}")
+
+
+def build_user(values):
+    """
+    Build a User from cached fields. Other fields are deferred, so reading
+    them loads from the database and save() only writes the loaded fields.
+    """
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(
+        DEFAULT_DB_ALIAS,
+        field_names,
+        [values[name] for name in field_names]
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the user cache.
+    """
+
+    def get_user(self, validated_token):
+        user = self._get_user(validated_token)
+        # Lets the database router apply read-your-writes stickiness
+        note_authenticated_user(user.id)
+        return user
+
+    def _get_user(self, validated_token):
+        # Revocation checks compare the password hash, which is not cached
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False) or api_settings.USER_ID_FIELD != 'id':
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        values = get_cached_user_values(user_id)
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if getattr(api_settings, 'CHECK_USER_IS_ACTIVE', True) and not values['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return build_user(values)
@@ -0,0 +1,79 @@
+from collections import defaultdict
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.contrib.auth import get_user_model
+
+from accounts.models import UsageRollup
+from chat.models import ChatMessage
+from tasks.models import Task
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily AI usage rollups from chat messages and tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild days on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"Invalid --since date: {options['since']}")
+
+        messages = ChatMessage.objects.all()
+        tasks = Task.objects.all()
+        rollups = UsageRollup.objects.all()
+        if since:
+            messages = messages.filter(timestamp__date__gte=since)
+            tasks = tasks.filter(created_at__date__gte=since)
+            rollups = rollups.filter(date__gte=since)
+
+        counts = defaultdict(lambda: defaultdict(int))
+
+        # One grouped query per source table
+        message_rows = (
+            messages.annotate(day=TruncDate('timestamp'))
+            .order_by()
+            .values('day', 'user_id', 'role')
+            .annotate(n=Count('id'))
+        )
+        for row in message_rows:
+            counter = 'assistant_messages' if row['role'] == 'assistant' else 'user_messages'
+            counts[(row['day'], row['user_id'])][counter] += row['n']
+
+        task_rows = (
+            tasks.annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values('day', 'created_by_id', 'created_by_ai')
+            .annotate(n=Count('id'))
+        )
+        for row in task_rows:
+            counter = 'ai_created_tasks' if row['created_by_ai'] else 'user_created_tasks'
+            counts[(row['day'], row['created_by_id'])][counter] += row['n']
+
+        user_ids = {user_id for _, user_id in counts}
+        workspaces = dict(User.objects.filter(id__in=user_ids).values_list('id', 'workspace_id'))
+
+        new_rollups = [
+            UsageRollup(date=day, user_id=user_id, workspace_id=workspaces.get(user_id), **counters)
+            for (day, user_id), counters in counts.items()
+        ]
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            UsageRollup.objects.bulk_create(new_rollups, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt {len(new_rollups)} usage rollup rows (replaced {deleted})'
+            )
+        )
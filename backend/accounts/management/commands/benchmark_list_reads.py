@@ -0,0 +1,105 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+
+from accounts.serializers import AdminUserSerializer, admin_user_rows
+from chat.models import ChatMessage
+from chat.serializers import ChatMessageSerializer, chat_message_rows
+from config.renderers import FastJSONRenderer, orjson
+from documents.models import Document
+from documents.serializers import DocumentListSerializer, document_list_rows
+from tasks.models import Task
+from tasks.serializers import TaskListSerializer, task_list_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare list endpoint serializers with the values() + fast JSON read path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Rows per page to render')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed runs per path')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        iterations = options['iterations']
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast path uses the stock encoder'))
+
+        # Sample data is created inside a transaction that is rolled back
+        with transaction.atomic():
+            user = self._create_sample_data(rows)
+            endpoints = [
+                ('tasks', Task.objects.filter(created_by=user).order_by('-created_at', '-id'),
+                 TaskListSerializer, task_list_rows),
+                ('documents', Document.objects.filter(user=user).order_by('-created_at', '-id'),
+                 DocumentListSerializer, document_list_rows),
+                ('chat history', ChatMessage.objects.filter(user=user).order_by('-timestamp', '-id'),
+                 ChatMessageSerializer, chat_message_rows),
+                ('admin users', User.objects.select_related('workspace').order_by('-date_joined', '-id'),
+                 AdminUserSerializer, admin_user_rows),
+            ]
+            for name, queryset, serializer_class, mapper in endpoints:
+                self._compare(name, queryset[:rows], serializer_class, mapper, iterations)
+            transaction.set_rollback(True)
+
+    def _create_sample_data(self, rows):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f'benchmark-{suffix}@example.com',
+            username=f'benchmark-{suffix}',
+            password=uuid.uuid4().hex
+        )
+        User.objects.bulk_create([
+            User(email=f'benchmark-{suffix}-{i}@example.com', username=f'benchmark-{suffix}-{i}')
+            for i in range(rows)
+        ])
+        Task.objects.bulk_create([
+            Task(created_by=user, title=f'Task {i}', description='Benchmark task', priority='medium')
+            for i in range(rows)
+        ])
+        Document.objects.bulk_create([
+            Document(user=user, file=f'docs/benchmark{i}.txt', title=f'Document {i}', status='completed')
+            for i in range(rows)
+        ])
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user=user, role='user' if i % 2 == 0 else 'assistant', content=f'Message {i} ' * 20)
+            for i in range(rows)
+        ])
+        return user
+
+    @staticmethod
+    def _time(func, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def _compare(self, name, queryset, serializer_class, mapper, iterations):
+        def serializer_path():
+            return JSONRenderer().render(serializer_class(list(queryset), many=True).data)
+
+        def values_path():
+            return FastJSONRenderer().render(mapper.to_representation(list(mapper.values(queryset))))
+
+        serializer_ms, expected = self._time(serializer_path, iterations)
+        values_ms, actual = self._time(values_path, iterations)
+
+        if json.loads(expected) != json.loads(actual):
+            self.stdout.write(self.style.ERROR(f'{name}: values() output differs from the serializer'))
+            return
+
+        self.stdout.write(
+            f'{name:<14} serializer {serializer_ms:8.2f} ms   values {values_ms:8.2f} ms   '
+            f'speedup {serializer_ms / values_ms if values_ms else 0:5.1f}x'
+        )
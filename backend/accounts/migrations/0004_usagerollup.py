@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-19 13:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('user_messages', models.PositiveIntegerField(default=0)),
+                ('assistant_messages', models.PositiveIntegerField(default=0)),
+                ('user_created_tasks', models.PositiveIntegerField(default=0)),
+                ('ai_created_tasks', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_rollups', to=settings.AUTH_USER_MODEL)),
+                ('workspace', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='usage_rollups', to='accounts.workspace')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='usage_rollup_date_user_uniq')],
+                'indexes': [models.Index(fields=['workspace', 'date'], name='usage_rollup_ws_date_idx')],
+            },
+        ),
+    ]
@@ -41,5 +41,49 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin user list, most recently joined first
+            models.Index(fields=['-date_joined', '-id'], name='user_date_joined_idx'),
+        ]
+
     def __str__(self):
         return self.email
+
+
+class UsageRollup(models.Model):
+    """
+    Daily AI usage counters per user (and their workspace).
+    Updated incrementally as chat messages and tasks are created, so usage
+    statistics read a few pre-aggregated rows instead of scanning history.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='usage_rollups'
+    )
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.SET_NULL,
+        related_name='usage_rollups',
+        null=True,
+        blank=True
+    )
+    user_messages = models.PositiveIntegerField(default=0)
+    assistant_messages = models.PositiveIntegerField(default=0)
+    user_created_tasks = models.PositiveIntegerField(default=0)
+    ai_created_tasks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='usage_rollup_date_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['workspace', 'date'], name='usage_rollup_ws_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} usage on {self.date}"
@@ -0,0 +1,13 @@
+"""
+Pagination classes for accounts API.
+"""
+from config.pagination import KeysetPagination
+
+
+class UserKeysetPagination(KeysetPagination):
+    """
+    Most-recently-joined-first keyset pagination for the admin user list.
+    """
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-date_joined', '-id')
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+
+from config.fastread import ValuesRowMapper
 from .models import Workspace
 
 User = get_user_model()
@@ -63,4 +65,18 @@ class AdminUserSerializer(serializers.ModelSerializer):
             'role', 'is_active', 'is_staff', 'is_superuser',
             'date_joined', 'last_login', 'workspace_name'
         )
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+
+# values() read path producing AdminUserSerializer output
+admin_user_rows = ValuesRowMapper(AdminUserSerializer)
+
+
+class AIUsageQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the admin AI usage endpoint.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    workspace = serializers.UUIDField(required=False)
+    daily = serializers.BooleanField(required=False, default=False)
@@ -0,0 +1,57 @@
+"""
+Signal handlers that keep AI usage rollups and the authentication user
+cache up to date.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from chat.models import ChatMessage
+from tasks.models import Task
+from .authentication import invalidate_cached_user
+from .usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=ChatMessage)
+def rollup_chat_message(sender, instance, created, **kwargs):
+    """Count a new chat message in its author's daily rollup."""
+    if not created:
+        return
+    counter = 'assistant_messages' if instance.role == 'assistant' else 'user_messages'
+    try:
+        record_usage(
+            instance.user_id,
+            instance.user.workspace_id,
+            instance.timestamp.date(),
+            **{counter: 1}
+        )
+    except Exception as e:
+        logger.error(f"Error updating usage rollup for message {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=Task)
+def rollup_task(sender, instance, created, **kwargs):
+    """Count a new task in its owner's daily rollup."""
+    if not created:
+        return
+    counter = 'ai_created_tasks' if instance.created_by_ai else 'user_created_tasks'
+    try:
+        record_usage(
+            instance.created_by_id,
+            instance.created_by.workspace_id,
+            instance.created_at.date(),
+            **{counter: 1}
+        )
+    except Exception as e:
+        logger.error(f"Error updating usage rollup for task {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop the cached authentication fields so blocks and role changes apply at once."""
+    invalidate_cached_user(instance.id)
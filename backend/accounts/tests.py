@@ -1,3 +1,148 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from chat.models import ChatMessage
+from tasks.models import Task
+from .authentication import invalidate_cached_user
+from .models import UsageRollup, Workspace
+from .usage import get_usage_statistics
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    Authenticated requests resolve the user from cache, and blocking applies at once.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='cached@example.com', username='cached', password='testpass123')
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='testpass123', is_staff=True
+        )
+        invalidate_cached_user(self.user.id)
+        self.url = reverse('task-list')
+
+    def _auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_user_table_not_queried_when_cached(self):
+        self.assertEqual(self.client.get(self.url, **self._auth(self.user)).status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, **self._auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        user_table = User._meta.db_table
+        self.assertFalse([q for q in ctx.captured_queries if f'FROM "{user_table}"' in q['sql']])
+
+    def test_blocked_user_rejected_immediately(self):
+        self.assertEqual(self.client.get(self.url, **self._auth(self.user)).status_code, 200)
+
+        block_url = reverse('admin_block_user', args=[self.user.id])
+        response = self.client.patch(block_url, {'block': True}, format='json', **self._auth(self.admin))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get(self.url, **self._auth(self.user)).status_code, 401)
+
+
+@mock.patch('chat.answer_cache.get_answer_cache_stats', return_value={})
+@mock.patch('chat.router.get_router_stats', return_value={})
+class AIUsageRollupTests(APITestCase):
+    """
+    Usage rollups count new messages and tasks, and the backfill rebuilds the same totals.
+    """
+
+    def setUp(self):
+        self.workspace = Workspace.objects.create(name='Rollups')
+        self.user = User.objects.create_user(
+            email='usage@example.com', username='usage', password='testpass123', workspace=self.workspace
+        )
+        self.admin = User.objects.create_user(
+            email='usage-admin@example.com', username='usage-admin', password='testpass123', is_staff=True
+        )
+        self.url = reverse('admin_ai_usage')
+
+    def _create_usage(self):
+        ChatMessage.objects.create(user=self.user, role='user', content='Hi')
+        ChatMessage.objects.create(user=self.user, role='assistant', content='Hello')
+        ChatMessage.objects.create(user=self.user, role='user', content='Make a task')
+        Task.objects.create(title='By hand', created_by=self.user)
+        Task.objects.create(title='By the agent', created_by=self.user, created_by_ai=True)
+
+    def test_creating_rows_increments_rollup(self, *mocks):
+        self._create_usage()
+        # Edits are not new usage
+        ChatMessage.objects.filter(user=self.user).first().save()
+
+        rollup = UsageRollup.objects.get(user=self.user, date=timezone.localdate())
+        self.assertEqual(rollup.workspace_id, self.workspace.id)
+        self.assertEqual(
+            (rollup.user_messages, rollup.assistant_messages, rollup.user_created_tasks, rollup.ai_created_tasks),
+            (2, 1, 1, 1)
+        )
+
+    def test_backfill_rebuilds_same_totals(self, *mocks):
+        self._create_usage()
+        incremental = get_usage_statistics()
+
+        UsageRollup.objects.all().delete()
+        call_command('backfill_usage_rollups', stdout=mock.Mock())
+
+        self.assertEqual(get_usage_statistics(), incremental)
+        self.assertEqual(incremental['totals']['user_messages'], 2)
+        self.assertEqual(incremental['unique_users'], 1)
+
+    def test_filters_by_workspace_and_range(self, *mocks):
+        self._create_usage()
+        self.client.force_authenticate(user=self.admin)
+        today = timezone.localdate()
+
+        response = self.client.get(self.url, {'workspace': str(self.workspace.id), 'daily': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['chat_statistics']['total_messages'], 3)
+        self.assertEqual(response.data['daily'][0]['date'], today.isoformat())
+
+        response = self.client.get(self.url, {'start': (today + timedelta(days=1)).isoformat()})
+        self.assertEqual(response.data['task_statistics']['total_tasks'], 0)
+
+    def test_invalid_query_params_rejected(self, *mocks):
+        self.client.force_authenticate(user=self.admin)
+        for params in ({'workspace': 'not-a-uuid'}, {'start': '2026-13-01'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(next(iter(params)), response.data)
+
+
+class AdminUserListTests(APITestCase):
+    """
+    The admin user list is keyset paginated as {next, results}, newest first.
+    """
+
+    def test_pages_cover_all_users(self):
+        admin = User.objects.create_user(
+            email='list-admin@example.com', username='list-admin', password='testpass123', is_staff=True
+        )
+        for i in range(4):
+            User.objects.create_user(email=f'member{i}@example.com', username=f'member{i}', password='testpass123')
+        self.client.force_authenticate(user=admin)
+
+        emails, url, params = [], reverse('admin_user_list'), {'page_size': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data), {'next', 'results'})
+            emails.extend(row['email'] for row in response.data['results'])
+            url, params = response.data['next'], None
+
+        expected = list(User.objects.order_by('-date_joined', '-id').values_list('email', flat=True))
+        self.assertEqual(emails, expected)
+        self.assertEqual(len(emails), 5)
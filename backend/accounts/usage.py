@@ -0,0 +1,92 @@
+"""
+AI usage rollups: incremental daily counters and range queries over them.
+"""
+import logging
+from datetime import date
+from typing import Optional, Dict, Any
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import UsageRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COUNTERS = ['user_messages', 'assistant_messages', 'user_created_tasks', 'ai_created_tasks']
+
+
+def record_usage(user_id, workspace_id, day: date = None, **increments):
+    """
+    Add to a user's usage counters for a day, creating the row if needed.
+
+    Args:
+        user_id: User the usage belongs to
+        workspace_id: The user's workspace (may be None)
+        day: Day bucket, defaults to today
+        increments: Counter name -> amount, e.g. user_messages=1
+    """
+    day = day or timezone.localdate()
+    updates = {name: F(name) + amount for name, amount in increments.items()}
+
+    if UsageRollup.objects.filter(date=day, user_id=user_id).update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            UsageRollup.objects.create(
+                date=day,
+                user_id=user_id,
+                workspace_id=workspace_id,
+                **increments
+            )
+    except IntegrityError:
+        # Another request created the row first
+        UsageRollup.objects.filter(date=day, user_id=user_id).update(**updates)
+
+
+def get_usage_statistics(start: Optional[date] = None, end: Optional[date] = None,
+                         workspace_id=None, daily: bool = False) -> Dict[str, Any]:
+    """
+    Aggregate usage rollups over an inclusive date range.
+
+    Args:
+        start: First day to include (None for no lower bound)
+        end: Last day to include (None for no upper bound)
+        workspace_id: Optional workspace to restrict to
+        daily: Also return a per-day breakdown
+
+    Returns:
+        Dict with totals, unique_users and optionally a daily series
+    """
+    rollups = UsageRollup.objects.all()
+    if start:
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        rollups = rollups.filter(date__lte=end)
+    if workspace_id:
+        rollups = rollups.filter(workspace_id=workspace_id)
+
+    # Annotation names must not clash with the model's field names
+    sums = {f'total_{name}': Sum(name) for name in ROLLUP_COUNTERS}
+
+    aggregated = rollups.aggregate(**sums)
+    totals = {name: aggregated[f'total_{name}'] or 0 for name in ROLLUP_COUNTERS}
+
+    unique_users = (
+        rollups.filter(Q(user_messages__gt=0) | Q(assistant_messages__gt=0))
+        .order_by()
+        .values('user_id')
+        .distinct()
+        .count()
+    )
+
+    result = {'totals': totals, 'unique_users': unique_users}
+
+    if daily:
+        result['daily'] = [
+            {'date': row['date'].isoformat(), **{name: row[f'total_{name}'] for name in ROLLUP_COUNTERS}}
+            for row in rollups.order_by('date').values('date').annotate(**sums)
+        ]
+
+    return result
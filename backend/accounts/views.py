@@ -7,7 +7,12 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from .serializers import UserRegistrationSerializer, UserSerializer, AdminUserSerializer
+from config.fastread import paginate_values
+from .serializers import (
+    UserRegistrationSerializer, UserSerializer, AdminUserSerializer, AIUsageQuerySerializer, admin_user_rows
+)
+from .pagination import UserKeysetPagination
+from .usage import get_usage_statistics
 
 User = get_user_model()
 
@@ -51,16 +56,15 @@ def user_profile(request):
 class AdminUserListView(APIView):
     """
     GET /api/admin/users - List all users (Admin only)
+    Keyset paginated, most recently joined first; follow `next` for more.
+    The response is {next, results}; it used to be {count, users} with
+    every user in one page.
     """
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        users = User.objects.all().order_by('-date_joined')
-        serializer = AdminUserSerializer(users, many=True)
-        return Response({
-            'count': users.count(),
-            'users': serializer.data
-        })
+        # workspace_name is read with a join, no select_related needed
+        return paginate_values(UserKeysetPagination(), admin_user_rows, User.objects.all(), request, view=self)
 
 
 class AdminBlockUserView(APIView):
@@ -101,43 +105,58 @@ class AdminBlockUserView(APIView):
 class AdminAIUsageView(APIView):
     """
     GET /api/admin/ai-usage - Get AI usage statistics (Admin only)
-    Returns count of ChatMessages and Tasks created by AI
+    Returns counts of ChatMessages and Tasks created by AI, read from daily
+    usage rollups, plus local intent router and answer cache hit-rate metrics.
+    
+    Optional query params:
+    - start, end: inclusive date range (YYYY-MM-DD)
+    - workspace: restrict to one workspace id
+    - daily: 'true' to include a per-day breakdown
     """
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        from chat.models import ChatMessage
-        from tasks.models import Task
-        
-        # Count total chat messages
-        total_messages = ChatMessage.objects.count()
-        
-        # Count messages by role
-        user_messages = ChatMessage.objects.filter(role='user').count()
-        assistant_messages = ChatMessage.objects.filter(role='assistant').count()
+        from chat.router import get_router_stats
+        from chat.answer_cache import get_answer_cache_stats
         
-        # Count tasks created by AI
-        total_tasks = Task.objects.count()
-        ai_created_tasks = Task.objects.filter(created_by_ai=True).count()
-        user_created_tasks = Task.objects.filter(created_by_ai=False).count()
+        query = AIUsageQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        start = query.validated_data.get('start')
+        end = query.validated_data.get('end')
         
-        # Get unique users who have used the AI
-        unique_chat_users = ChatMessage.objects.values('user').distinct().count()
+        usage = get_usage_statistics(
+            start=start,
+            end=end,
+            workspace_id=query.validated_data.get('workspace'),
+            daily=query.validated_data['daily']
+        )
+        totals = usage['totals']
         
-        return Response({
+        response = {
+            'range': {
+                'start': start.isoformat() if start else None,
+                'end': end.isoformat() if end else None,
+            },
             'chat_statistics': {
-                'total_messages': total_messages,
-                'user_messages': user_messages,
-                'assistant_messages': assistant_messages,
-                'unique_users': unique_chat_users,
+                'total_messages': totals['user_messages'] + totals['assistant_messages'],
+                'user_messages': totals['user_messages'],
+                'assistant_messages': totals['assistant_messages'],
+                'unique_users': usage['unique_users'],
             },
             'task_statistics': {
-                'total_tasks': total_tasks,
-                'ai_created_tasks': ai_created_tasks,
-                'user_created_tasks': user_created_tasks,
+                'total_tasks': totals['ai_created_tasks'] + totals['user_created_tasks'],
+                'ai_created_tasks': totals['ai_created_tasks'],
+                'user_created_tasks': totals['user_created_tasks'],
             },
+            'router_statistics': get_router_stats(),
+            'answer_cache_statistics': get_answer_cache_stats(),
             'summary': {
-                'total_ai_interactions': assistant_messages,
-                'total_ai_created_items': ai_created_tasks,
+                'total_ai_interactions': totals['assistant_messages'],
+                'total_ai_created_items': totals['ai_created_tasks'],
             }
-        })
+        }
+        if 'daily' in usage:
+            response['daily'] = usage['daily']
+        
+        return Response(response)
@@ -7,16 +7,22 @@ import os
 import logging
 from typing import List, Dict, Any
 
+from django.conf import settings
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from documents.embedding_models import embed_query
+
 from .tools import (
     get_document_search_tool,
     get_create_task_tool,
     get_list_tasks_tool,
     get_list_documents_tool
 )
+from .router import IntentRouter, record_route
+from .prefetch import start_prefetch, looks_like_question
+from .answer_cache import AnswerCache, is_answer_cache_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -58,10 +64,13 @@ class AIAgent:
             user: Django User object
         """
         self.user = user
+        self._prefetch = None
+        self._cited_chunk_ids = []
         self.llm = self._initialize_llm()
         self.tools = self._get_tools()
         self.tools_dict = {tool.name: tool for tool in self.tools}
         self.agent = self._create_agent()
+        self.router = IntentRouter()
     
     def _initialize_llm(self) -> ChatGroq:
         """
@@ -84,7 +93,11 @@ class AIAgent:
         Get the tools available to the agent, bound to the current user.
         """
         return [
-            get_document_search_tool(str(self.user.id)),
+            get_document_search_tool(
+                str(self.user.id),
+                prefetch_lookup=self._lookup_prefetch,
+                on_results=self._record_search_results
+            ),
             get_create_task_tool(self.user),
             get_list_tasks_tool(self.user),
             get_list_documents_tool(self.user),
@@ -98,19 +111,31 @@ class AIAgent:
         llm_with_tools = self.llm.bind_tools(self.tools)
         return llm_with_tools
     
+    def _lookup_prefetch(self, query: str):
+        """
+        Return speculatively prefetched search results for the current message
+        if they match the query the model asked for.
+        """
+        if self._prefetch is None:
+            return None
+        return self._prefetch.results_for(query)
+    
     def _format_chat_history(self, chat_history: List[Dict]) -> List:
         """
         Convert chat history from database format to LangChain messages.
         
         Args:
-            chat_history: List of dicts with 'role' and 'content' keys
+            chat_history: List of dicts with 'role' and 'content' keys.
+                A 'summary' role carries the rolling summary of older turns.
             
         Returns:
             List of LangChain message objects
         """
         messages = []
         for msg in chat_history:
-            if msg['role'] == 'user':
+            if msg['role'] == 'summary':
+                messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{msg['content']}"))
+            elif msg['role'] == 'user':
                 messages.append(HumanMessage(content=msg['content']))
             elif msg['role'] == 'assistant':
                 messages.append(AIMessage(content=msg['content']))
@@ -151,13 +176,70 @@ class AIAgent:
         
         return tool_messages
     
-    def chat_sync(self, user_message: str, chat_history: List[Dict] = None) -> str:
+    def _route_locally(self, user_message: str):
+        """
+        Try to answer a plain tool request without calling the LLM.
+        
+        Returns:
+            The tool output if the router dispatched the message, otherwise None
+        """
+        if not getattr(settings, 'CHAT_INTENT_ROUTER_ENABLED', True):
+            return None
+        
+        intent = self.router.route(user_message)
+        if intent is None or intent.tool_name not in self.tools_dict:
+            record_route(None)
+            return None
+        
+        logger.info(f"Routed locally to tool: {intent.tool_name} with args: {intent.args}")
+        try:
+            result = self.tools_dict[intent.tool_name].invoke(intent.args)
+        except Exception as e:
+            # Let the LLM path handle it, as it would have without the router
+            logger.error(f"Error executing routed tool {intent.tool_name}: {str(e)}")
+            record_route(None)
+            return None
+        
+        record_route(intent)
+        return str(result)
+    
+    def _record_search_results(self, results: Dict[str, Any]):
+        """
+        Remember which chunks were retrieved for the current message.
+        """
+        ids = results.get('ids') if results else None
+        self._cited_chunk_ids.extend(ids[0] if ids else [])
+    
+    def _lookup_cached_answer(self, user_message: str, chat_history: List[Dict], bypass_cache: bool):
+        """
+        Check the semantic answer cache for a document question.
+        Follow-up questions ("what about the second one?") depend on the
+        conversation, so only a conversation's first question is cached.
+        
+        Returns:
+            Tuple of (AnswerCache or None, query embedding or None, cached answer or None)
+        """
+        if not is_answer_cache_enabled() or chat_history or not looks_like_question(user_message):
+            return None, None, None
+        
+        try:
+            answer_cache = AnswerCache(self.user)
+            query_embedding = embed_query(str(self.user.id), user_message)
+            cached = None if bypass_cache else answer_cache.lookup(query_embedding)
+            return answer_cache, query_embedding, cached['answer'] if cached else None
+        except Exception as e:
+            logger.warning(f"Answer cache unavailable: {str(e)}")
+            return None, None, None
+    
+    def chat_sync(self, user_message: str, chat_history: List[Dict] = None,
+                  bypass_cache: bool = False) -> str:
         """
         Synchronous version of chat for non-async contexts.
         
         Args:
             user_message: The user's input message
             chat_history: Previous messages in the conversation
+            bypass_cache: Skip answer cache lookup (a fresh answer is still cached)
             
         Returns:
             The AI assistant's response
@@ -166,11 +248,29 @@ class AIAgent:
             chat_history = []
         
         try:
+            # Answer plain tool requests directly, skipping the tool-selection call
+            routed_response = self._route_locally(user_message)
+            if routed_response is not None:
+                return routed_response
+            
+            # Serve repeated document questions from the answer cache
+            answer_cache, query_embedding, cached_answer = self._lookup_cached_answer(
+                user_message, chat_history, bypass_cache
+            )
+            if cached_answer is not None:
+                return cached_answer
+            
             # Build messages list
             messages = [SystemMessage(content=SYSTEM_PROMPT)]
             messages.extend(self._format_chat_history(chat_history))
             messages.append(HumanMessage(content=user_message))
             
+            # Start document retrieval speculatively while the first LLM call runs
+            self._prefetch = start_prefetch(
+                str(self.user.id), user_message, query_embedding=query_embedding
+            )
+            self._cited_chunk_ids = []
+            
             # Get initial response from LLM
             response = self.agent.invoke(messages)
             
@@ -185,6 +285,14 @@ class AIAgent:
                 
                 # Get final response (without tools to avoid loops)
                 final_response = self.llm.invoke(messages)
+                
+                # Only pure document-search answers are cacheable
+                search_only = all(call['name'] == 'search_documents' for call in response.tool_calls)
+                if answer_cache is not None and search_only and self._cited_chunk_ids:
+                    answer_cache.store(
+                        user_message, query_embedding, final_response.content, self._cited_chunk_ids
+                    )
+                
                 return final_response.content
             
             return response.content
@@ -192,6 +300,12 @@ class AIAgent:
         except Exception as e:
             logger.error(f"Error in AI chat: {str(e)}")
             raise
+        
+        finally:
+            # Unused prefetched results are discarded
+            if self._prefetch is not None:
+                self._prefetch.discard()
+                self._prefetch = None
     
     async def chat(self, user_message: str, chat_history: List[Dict] = None) -> str:
         """
@@ -0,0 +1,181 @@
+"""
+Semantic answer cache for document questions.
+Stores (query embedding, answer, cited chunk ids) per knowledge-base scope and
+serves a cached answer when a new question is within a cosine-similarity
+threshold of a cached one and the scope's index version is unchanged.
+
+Entries live in a Redis hash per scope and index version, with a sorted set
+of last-use times for LRU eviction, so concurrent chats add and evict entries
+without overwriting each other's writes.
+"""
+import json
+import time
+import uuid
+import logging
+from typing import Optional, List, Dict, Any
+
+import redis
+from django.conf import settings
+
+from .metrics import increment_counter, read_counters, hit_rate
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_KEY = 'answer_cache:{scope}:v{version}'
+ANSWER_CACHE_LRU_KEY = 'answer_cache:{scope}:v{version}:lru'
+ANSWER_CACHE_HITS_KEY = 'answer_cache:hits'
+ANSWER_CACHE_MISSES_KEY = 'answer_cache:misses'
+ANSWER_CACHE_STORES_KEY = 'answer_cache:stores'
+
+_redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a process-wide Redis client for the answer cache.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.CHAT_ANSWER_CACHE_REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+def is_answer_cache_enabled() -> bool:
+    return getattr(settings, 'CHAT_ANSWER_CACHE_ENABLED', False)
+
+
+def get_cache_scope(user) -> str:
+    """
+    Scope cached answers to what the user can search.
+    Vector search is filtered by user, so the scope is the user within
+    their workspace.
+    """
+    return f"{user.workspace_id or 'none'}:{user.id}"
+
+
+class AnswerCache:
+    """
+    Similarity-matched answer cache with TTL and LRU eviction.
+    """
+
+    def __init__(self, user):
+        """
+        Initialize the cache for a user's knowledge-base scope.
+
+        Args:
+            user: Django User object
+        """
+        from documents.index_version import get_index_version
+
+        self.scope = get_cache_scope(user)
+        self.version = get_index_version(str(user.id))
+        self.key = ANSWER_CACHE_KEY.format(scope=self.scope, version=self.version)
+        self.lru_key = ANSWER_CACHE_LRU_KEY.format(scope=self.scope, version=self.version)
+        self.threshold = getattr(settings, 'CHAT_ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.92)
+        self.ttl = getattr(settings, 'CHAT_ANSWER_CACHE_TTL', 24 * 60 * 60)
+        self.max_entries = getattr(settings, 'CHAT_ANSWER_CACHE_MAX_ENTRIES', 200)
+        self.client = get_redis_client()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            raw = self.client.hgetall(self.key)
+        except Exception as e:
+            logger.warning(f"Could not read answer cache: {str(e)}")
+            return {}
+        cutoff = time.time() - self.ttl
+        entries, expired = {}, []
+        for entry_id, value in raw.items():
+            entry = json.loads(value)
+            if entry['created_at'] >= cutoff:
+                entries[entry_id] = entry
+            else:
+                expired.append(entry_id)
+        if expired:
+            self._delete(expired)
+        return entries
+
+    def _delete(self, entry_ids: List[str]):
+        try:
+            pipe = self.client.pipeline()
+            pipe.hdel(self.key, *entry_ids)
+            pipe.zrem(self.lru_key, *entry_ids)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not evict answer cache entries: {str(e)}")
+
+    def lookup(self, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar cached answer above the threshold.
+
+        Args:
+            query_embedding: Normalized embedding of the new question
+
+        Returns:
+            The cached entry, or None on a miss
+        """
+        best_id, best, best_score = None, None, self.threshold
+        for entry_id, entry in self._load().items():
+            # Embeddings are normalized, so the dot product is the cosine
+            score = sum(a * b for a, b in zip(query_embedding, entry['embedding']))
+            if score >= best_score:
+                best_id, best, best_score = entry_id, entry, score
+
+        if best is None:
+            increment_counter(ANSWER_CACHE_MISSES_KEY)
+            return None
+
+        increment_counter(ANSWER_CACHE_HITS_KEY)
+        try:
+            # Only refresh entries that were not evicted meanwhile
+            self.client.zadd(self.lru_key, {best_id: time.time()}, xx=True)
+        except Exception as e:
+            logger.warning(f"Could not update answer cache: {str(e)}")
+        logger.info(f"Answer cache hit for scope {self.scope} (similarity {best_score:.3f})")
+        return best
+
+    def store(self, query: str, query_embedding: List[float], answer: str, chunk_ids: List[str]):
+        """
+        Cache an answer, evicting the least recently used entries when full.
+        """
+        entry_id = uuid.uuid4().hex
+        now = time.time()
+        entry = {
+            'query': query,
+            'embedding': list(query_embedding),
+            'answer': answer,
+            'chunk_ids': list(chunk_ids),
+            'created_at': now,
+        }
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(self.key, entry_id, json.dumps(entry))
+            pipe.zadd(self.lru_key, {entry_id: now})
+            pipe.expire(self.key, self.ttl)
+            pipe.expire(self.lru_key, self.ttl)
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                # ZPOPMIN is atomic, so concurrent stores never evict the same entry twice
+                evicted = [member for member, _ in self.client.zpopmin(self.lru_key, size - self.max_entries)]
+                if evicted:
+                    self.client.hdel(self.key, *evicted)
+        except Exception as e:
+            logger.warning(f"Could not write answer cache: {str(e)}")
+            return
+        increment_counter(ANSWER_CACHE_STORES_KEY)
+
+
+def get_answer_cache_stats() -> Dict[str, Any]:
+    """
+    Get answer cache hit-rate statistics.
+    """
+    values = read_counters([ANSWER_CACHE_HITS_KEY, ANSWER_CACHE_MISSES_KEY, ANSWER_CACHE_STORES_KEY])
+    hits = values[ANSWER_CACHE_HITS_KEY]
+    misses = values[ANSWER_CACHE_MISSES_KEY]
+    return {
+        'enabled': is_answer_cache_enabled(),
+        'hits': hits,
+        'misses': misses,
+        'stores': values[ANSWER_CACHE_STORES_KEY],
+        'hit_rate': hit_rate(hits, misses),
+    }
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        from config.versioning import track_resource_version
+        from .models import ChatMessage, Conversation
+
+        # Conversation responses include message counts and previews,
+        # so new messages invalidate them too
+        track_resource_version(Conversation, 'conversations', 'user_id')
+        track_resource_version(ChatMessage, 'conversations', 'user_id')
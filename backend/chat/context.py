@@ -0,0 +1,213 @@
+"""
+Token-budgeted conversation context assembly.
+Recent turns are included newest-first until the token budget is spent;
+older turns are represented by the conversation's rolling summary, which is
+updated incrementally in the background after each reply.
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import List, Dict
+
+from django.conf import settings
+
+from .models import ChatMessage, Conversation
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI workspace assistant.
+Update the existing summary with the new turns below. Keep facts, decisions, names, task details and open questions.
+Drop small talk. Write at most {max_words} words in plain prose.
+
+Existing summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:"""
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    import tiktoken
+    return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in a piece of text.
+    Falls back to a ~4 characters per token estimate if tiktoken is unavailable.
+    """
+    try:
+        return len(_get_encoding().encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token count: {str(e)}")
+        return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to at most max_tokens tokens.
+    """
+    try:
+        encoding = _get_encoding()
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]) + " [...]"
+    except Exception:
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars] + " [...]"
+
+
+def get_conversation_messages(conversation: Conversation):
+    """
+    Queryset of the messages that make up a conversation's history.
+    """
+    return ChatMessage.objects.filter(conversation=conversation)
+
+
+def _recent_window(messages, budget: int, max_message_tokens: int) -> List[Dict]:
+    """
+    Walk messages newest-first and keep as many as fit in the budget.
+
+    Args:
+        messages: Iterable of message dicts, newest first
+        budget: Token budget for the window
+        max_message_tokens: Per-message cap; longer messages are truncated
+
+    Returns:
+        Message dicts in chronological order, each with a 'tokens' count
+    """
+    window = []
+    used = 0
+    for msg in messages:
+        content = msg['content']
+        tokens = count_tokens(content)
+        if tokens > max_message_tokens:
+            content = truncate_to_tokens(content, max_message_tokens)
+            tokens = max_message_tokens
+        if used + tokens > budget:
+            break
+        window.append({**msg, 'content': content, 'tokens': tokens})
+        used += tokens
+    window.reverse()
+    return window
+
+
+def build_chat_context(conversation: Conversation, exclude_message_id=None) -> List[Dict]:
+    """
+    Assemble prompt history for a conversation within the token budget.
+
+    Args:
+        conversation: Conversation being continued
+        exclude_message_id: Message to leave out (the current user message)
+
+    Returns:
+        List of dicts with 'role' and 'content' keys in chronological order.
+        The rolling summary, if any, comes first with role 'summary'.
+    """
+    budget = getattr(settings, 'CHAT_CONTEXT_TOKEN_BUDGET', 3000)
+    max_message_tokens = getattr(settings, 'CHAT_CONTEXT_MAX_MESSAGE_TOKENS', 1000)
+    max_messages = getattr(settings, 'CHAT_CONTEXT_MAX_MESSAGES', 50)
+
+    context = []
+    if conversation.summary:
+        context.append({'role': 'summary', 'content': conversation.summary})
+        budget -= count_tokens(conversation.summary)
+
+    queryset = get_conversation_messages(conversation)
+    if conversation.summarized_until:
+        queryset = queryset.filter(timestamp__gt=conversation.summarized_until)
+    if exclude_message_id:
+        queryset = queryset.exclude(id=exclude_message_id)
+
+    recent = queryset.order_by('-timestamp').values('role', 'content')[:max_messages]
+    window = _recent_window(recent, max(budget, 0), max_message_tokens)
+    context.extend({'role': msg['role'], 'content': msg['content']} for msg in window)
+    return context
+
+
+def update_summary(conversation: Conversation, llm) -> bool:
+    """
+    Fold turns that no longer fit in the recent window into the rolling summary.
+
+    Args:
+        conversation: Conversation to summarize
+        llm: LangChain chat model used to write the summary
+
+    Returns:
+        True if the summary was updated
+    """
+    recent_budget = getattr(settings, 'CHAT_CONTEXT_RECENT_TOKENS', 2000)
+    max_message_tokens = getattr(settings, 'CHAT_CONTEXT_MAX_MESSAGE_TOKENS', 1000)
+    min_fold_tokens = getattr(settings, 'CHAT_SUMMARY_MIN_TOKENS', 500)
+    max_words = getattr(settings, 'CHAT_SUMMARY_MAX_WORDS', 250)
+    max_messages = getattr(settings, 'CHAT_CONTEXT_MAX_MESSAGES', 50)
+    max_pending = getattr(settings, 'CHAT_SUMMARY_MAX_PENDING', 200)
+
+    queryset = get_conversation_messages(conversation)
+    if conversation.summarized_until:
+        queryset = queryset.filter(timestamp__gt=conversation.summarized_until)
+
+    recent = queryset.order_by('-timestamp').values('role', 'content', 'timestamp')[:max_messages]
+    window = _recent_window(recent, recent_budget, max_message_tokens)
+    if window:
+        queryset = queryset.filter(timestamp__lt=window[0]['timestamp'])
+
+    # Oldest first, so a long backlog is folded over several calls in order
+    to_fold = list(queryset.order_by('timestamp').values('role', 'content', 'timestamp')[:max_pending])
+
+    if not to_fold:
+        return False
+
+    fold_tokens = sum(min(count_tokens(msg['content']), max_message_tokens) for msg in to_fold)
+    if fold_tokens < min_fold_tokens:
+        return False
+
+    turns = "\n".join(
+        f"{msg['role'].capitalize()}: {truncate_to_tokens(msg['content'], max_message_tokens)}"
+        for msg in to_fold
+    )
+    prompt = SUMMARY_PROMPT.format(
+        max_words=max_words,
+        summary=conversation.summary or "(none yet)",
+        turns=turns
+    )
+    response = llm.invoke(prompt)
+
+    summary = response.content.strip()
+    summarized_until = to_fold[-1]['timestamp']
+    # Only write if no other task folded messages meanwhile, or the same
+    # turns would be folded into the summary twice
+    updated = Conversation.objects.filter(
+        id=conversation.id,
+        summarized_until=conversation.summarized_until
+    ).update(summary=summary, summarized_until=summarized_until)
+    if not updated:
+        logger.info(f"Summary of conversation {conversation.id} was updated concurrently, discarding")
+        return False
+
+    conversation.summary = summary
+    conversation.summarized_until = summarized_until
+    logger.info(f"Folded {len(to_fold)} messages into summary for conversation {conversation.id}")
+    return True
+
+
+def get_summary_llm():
+    """
+    LLM used for background summarization.
+    """
+    from langchain_groq import ChatGroq
+
+    groq_api_key = os.environ.get('GROQ_API_KEY')
+    if not groq_api_key:
+        raise ValueError("GROQ_API_KEY environment variable is not set")
+
+    return ChatGroq(
+        model="llama-3.1-8b-instant",
+        api_key=groq_api_key,
+        temperature=0.0,
+        max_tokens=512,
+    )
@@ -0,0 +1,37 @@
+"""
+Lightweight counters for chat metrics, kept in the shared Django cache.
+"""
+import logging
+from typing import Dict, List
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def increment_counter(key: str):
+    """
+    Increment a counter, creating it if needed. Failures are logged, not raised.
+    """
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Could not increment metric '{key}': {str(e)}")
+
+
+def read_counters(keys: List[str]) -> Dict[str, int]:
+    """
+    Read several counters at once; missing counters read as 0.
+    """
+    try:
+        values = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Could not read metrics: {str(e)}")
+        values = {}
+    return {key: values.get(key, 0) for key in keys}
+
+
+def hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
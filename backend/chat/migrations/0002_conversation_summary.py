@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summarized_until',
+            field=models.DateTimeField(blank=True, help_text='Timestamp of the last message folded into the summary', null=True),
+        ),
+    ]
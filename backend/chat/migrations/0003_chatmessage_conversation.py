@@ -0,0 +1,58 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_messages_to_conversations(apps, schema_editor):
+    """
+    Attach existing messages to the conversation that was current when they
+    were sent: the user's latest conversation created at or before the message.
+    Messages older than a user's first conversation go to that conversation;
+    users with messages but no conversations get one created for them.
+    """
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    user_ids = (
+        ChatMessage.objects.filter(conversation__isnull=True)
+        .order_by()
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+
+    for user_id in list(user_ids):
+        conversations = list(
+            Conversation.objects.filter(user_id=user_id)
+            .order_by('created_at')
+            .values_list('id', 'created_at')
+        )
+        if not conversations:
+            conversation = Conversation.objects.create(user_id=user_id, title='Earlier messages')
+            conversations = [(conversation.id, conversation.created_at)]
+
+        for i, (conversation_id, _) in enumerate(conversations):
+            messages = ChatMessage.objects.filter(user_id=user_id, conversation__isnull=True)
+            if i + 1 < len(conversations):
+                messages = messages.filter(timestamp__lt=conversations[i + 1][1])
+            messages.update(conversation_id=conversation_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='chat.conversation'),
+        ),
+        migrations.RunPython(assign_messages_to_conversations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_msg_conv_ts_idx'),
+        ),
+    ]
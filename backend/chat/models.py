@@ -3,6 +3,8 @@ Chat models for storing conversation history.
 """
 import uuid
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce, Substr
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -24,6 +26,12 @@ class ChatMessage(models.Model):
         on_delete=models.CASCADE, 
         related_name='chat_messages'
     )
+    conversation = models.ForeignKey(
+        'Conversation',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -46,6 +54,12 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Conversation history and keyset pagination on (timestamp, id)
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_msg_conv_ts_idx'),
+            # Per-user chat history, newest first
+            models.Index(fields=['user', '-timestamp', '-id'], name='chat_msg_user_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
@@ -65,8 +79,50 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Rolling summary of turns that no longer fit in the prompt's token budget
+    summary = models.TextField(blank=True, default='')
+    summarized_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp of the last message folded into the summary"
+    )
+    
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Conversation list: filter by user, most recently updated first
+            models.Index(fields=['user', '-updated_at', '-id'], name='conv_user_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.user.email})"
+
+
+# Length of the last-message preview in conversation lists
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+
+def annotate_conversation_list(queryset):
+    """
+    Annotate conversations with message_count, last_message_role and
+    last_message_preview using correlated subqueries, so a page of
+    conversations is fetched in a single query.
+    """
+    messages = ChatMessage.objects.filter(conversation=OuterRef('pk'))
+    message_count = (
+        messages.order_by()
+        .values('conversation')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    last_message = messages.order_by('-timestamp', '-id')
+    return queryset.annotate(
+        message_count=Coalesce(Subquery(message_count, output_field=IntegerField()), 0),
+        last_message_role=Subquery(last_message.values('role')[:1]),
+        # One extra character tells the serializer whether to add an ellipsis
+        last_message_preview=Subquery(
+            last_message.annotate(
+                preview=Substr('content', 1, LAST_MESSAGE_PREVIEW_LENGTH + 1)
+            ).values('preview')[:1]
+        ),
+    )
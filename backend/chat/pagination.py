@@ -0,0 +1,33 @@
+"""
+Pagination classes for chat API.
+"""
+from config.pagination import KeysetPagination
+
+
+class MessageKeysetPagination(KeysetPagination):
+    """
+    Newest-first keyset pagination for chat messages.
+    """
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-timestamp', '-id')
+
+
+class ChatHistoryPagination(KeysetPagination):
+    """
+    Newest-first keyset pagination for a user's chat history.
+    Keeps the endpoint's existing `limit` parameter as the page size.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'limit'
+    ordering = ('-timestamp', '-id')
+
+
+class ConversationKeysetPagination(KeysetPagination):
+    """
+    Most-recently-updated-first keyset pagination for conversations.
+    """
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-updated_at', '-id')
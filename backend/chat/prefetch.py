@@ -0,0 +1,147 @@
+"""
+Speculative retrieval prefetch for the AI Agent.
+For messages that look like questions, query embedding and vector search are
+started in the background while the first LLM call is in flight. If the model
+then calls search_documents with a similar query the prefetched results are
+reused, otherwise they are discarded.
+"""
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, List
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .tools import search_user_documents
+
+logger = logging.getLogger(__name__)
+
+QUESTION_WORDS = {
+    'what', 'who', 'whom', 'whose', 'when', 'where', 'why', 'how', 'which',
+    'is', 'are', 'was', 'were', 'do', 'does', 'did', 'can', 'could', 'should',
+    'explain', 'summarize', 'summarise', 'describe', 'tell', 'find', 'according',
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'CHAT_PREFETCH_MAX_WORKERS', 4),
+    thread_name_prefix='retrieval-prefetch'
+)
+
+
+def looks_like_question(message: str) -> bool:
+    """
+    Cheap check for whether a message is likely a question about documents.
+    """
+    message = message.strip()
+    if not message:
+        return False
+    if message.endswith('?'):
+        return True
+    words = _WORD_RE.findall(message.lower())
+    return bool(words) and words[0] in QUESTION_WORDS
+
+
+def _normalize(query: str) -> str:
+    return ' '.join(_WORD_RE.findall(query.lower()))
+
+
+class RetrievalPrefetch:
+    """
+    A speculative document search started before the LLM asks for it.
+    """
+
+    def __init__(self, user_id: str, query: str, query_embedding: List[float] = None):
+        """
+        Start embedding and searching for a query in the background.
+
+        Args:
+            user_id: User ID the search is scoped to
+            query: The user's message, used as the speculative search query
+            query_embedding: Optional precomputed embedding for the query
+        """
+        self.user_id = user_id
+        self.query = query
+        self.query_embedding = query_embedding
+        self.similarity_threshold = getattr(settings, 'CHAT_PREFETCH_SIMILARITY_THRESHOLD', 0.8)
+        self.wait_timeout = getattr(settings, 'CHAT_PREFETCH_WAIT_TIMEOUT', 5.0)
+        self.future = _executor.submit(self._run)
+
+    def _run(self):
+        from documents.embedding_models import embed_query
+
+        # Pool threads outlive requests, so Django's request signals never
+        # clean up their connections; do it around each prefetch instead
+        close_old_connections()
+        try:
+            query_embedding = self.query_embedding
+            if query_embedding is None:
+                query_embedding = embed_query(self.user_id, self.query)
+            results = search_user_documents(self.user_id, self.query, query_embedding=query_embedding)
+            return query_embedding, results
+        finally:
+            connection.close()
+
+    def _similarity(self, query: str, prefetched_embedding: List[float]) -> float:
+        """
+        Cosine similarity between the model's query and the prefetched one.
+        Embeddings are normalized, so the dot product is the cosine.
+        """
+        if _normalize(query) == _normalize(self.query):
+            return 1.0
+
+        from documents.embedding_models import embed_query
+
+        query_embedding = embed_query(self.user_id, query)
+        return sum(a * b for a, b in zip(query_embedding, prefetched_embedding))
+
+    def results_for(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the prefetched results if they answer the given query.
+
+        Args:
+            query: The query the model passed to search_documents
+
+        Returns:
+            Prefetched search results, or None if they should not be used
+        """
+        try:
+            prefetched_embedding, results = self.future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            logger.info("Retrieval prefetch not ready in time, searching directly")
+            return None
+        except Exception as e:
+            logger.warning(f"Retrieval prefetch failed: {str(e)}")
+            return None
+
+        similarity = self._similarity(query, prefetched_embedding)
+        if similarity < self.similarity_threshold:
+            logger.info(f"Discarding prefetched results (similarity {similarity:.2f})")
+            return None
+        return results
+
+    def discard(self):
+        """
+        Drop the prefetch; cancels it if it has not started yet.
+        """
+        self.future.cancel()
+
+
+def start_prefetch(user_id: str, user_message: str,
+                   query_embedding: List[float] = None) -> Optional[RetrievalPrefetch]:
+    """
+    Start a speculative document search if prefetching is enabled and the
+    message looks like a question.
+    """
+    if not getattr(settings, 'CHAT_PREFETCH_ENABLED', True):
+        return None
+    if not looks_like_question(user_message):
+        return None
+
+    try:
+        return RetrievalPrefetch(user_id, user_message, query_embedding=query_embedding)
+    except Exception as e:
+        logger.warning(f"Could not start retrieval prefetch: {str(e)}")
+        return None
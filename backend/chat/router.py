@@ -0,0 +1,254 @@
+"""
+Local intent router for the AI Agent.
+Recognises plain tool requests ("show my tasks", "what files have I uploaded",
+"add a task to ...") and dispatches them straight to the matching tool,
+skipping the LLM call that would otherwise only be used to pick the tool.
+"""
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+
+from django.conf import settings
+
+from .metrics import increment_counter, read_counters, hit_rate
+
+logger = logging.getLogger(__name__)
+
+# Cache keys for router hit-rate metrics
+ROUTER_HITS_KEY = 'chat_router:hits'
+ROUTER_MISSES_KEY = 'chat_router:misses'
+ROUTER_TOOL_HITS_KEY = 'chat_router:hits:{tool_name}'
+
+# Politeness/lead-in phrases stripped before matching
+_LEAD_IN = r"(?:(?:hey|hi|ok|okay)[,!]?\s+)?(?:(?:can|could|would|will)\s+you\s+)?(?:please\s+)?"
+_TRAILER = r"(?:\s+please)?[\s.!?]*"
+
+# Confidence for a message that is nothing but the command itself
+FULL_MATCH_CONFIDENCE = 0.95
+# Confidence for a command embedded in a longer message
+PARTIAL_MATCH_CONFIDENCE = 0.6
+
+
+@dataclass
+class RoutedIntent:
+    """
+    Result of routing a message to a tool.
+    """
+    tool_name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    confidence: float = 0.0
+
+
+@dataclass
+class IntentPattern:
+    """
+    A labelled intent with the regex that recognises it.
+    """
+    tool_name: str
+    pattern: re.Pattern
+
+    def match(self, message: str) -> Optional[RoutedIntent]:
+        """
+        Match the pattern against a message.
+
+        A match covering the whole message is high confidence; a match found
+        inside a longer message is low confidence since the user may want more.
+        """
+        full = re.fullmatch(_LEAD_IN + self.pattern.pattern + _TRAILER, message, re.IGNORECASE)
+        if full:
+            return RoutedIntent(
+                tool_name=self.tool_name,
+                args=self.build_args(full),
+                confidence=FULL_MATCH_CONFIDENCE
+            )
+
+        partial = self.pattern.search(message)
+        if partial:
+            return RoutedIntent(
+                tool_name=self.tool_name,
+                args=self.build_args(partial),
+                confidence=PARTIAL_MATCH_CONFIDENCE
+            )
+        return None
+
+    def build_args(self, match: re.Match) -> Dict[str, Any]:
+        return {}
+
+
+class ListTasksPattern(IntentPattern):
+    """
+    "show my tasks", "list my done tasks", "what are my to-dos?"
+    """
+
+    STATUS_WORDS = {
+        'active': None,
+        'open': None,
+        'pending': 'todo',
+        'todo': 'todo',
+        'to do': 'todo',
+        'in progress': 'in_progress',
+        'done': 'done',
+        'completed': 'done',
+        'finished': 'done',
+        'all': 'all',
+    }
+
+    def __init__(self):
+        super().__init__(
+            tool_name='list_tasks',
+            pattern=re.compile(
+                r"(?:show|list|display|view|see|get|what\s+are|what's\s+on)\s+(?:me\s+)?(?:all\s+of\s+)?"
+                r"(?:my\s+)?(?P<status>active|open|pending|todo|to-do|in[\s-]progress|done|completed|finished|all)?\s*"
+                r"(?:tasks|to-?dos|task\s+list|to-?do\s+list)",
+                re.IGNORECASE
+            )
+        )
+
+    def build_args(self, match: re.Match) -> Dict[str, Any]:
+        status = (match.group('status') or '').lower().replace('-', ' ')
+        status_filter = self.STATUS_WORDS.get(status)
+        return {'status_filter': status_filter} if status_filter else {}
+
+
+class ListDocumentsPattern(IntentPattern):
+    """
+    "what files have I uploaded", "list my documents", "show my docs"
+    """
+
+    def __init__(self):
+        super().__init__(
+            tool_name='list_documents',
+            pattern=re.compile(
+                r"(?:(?:show|list|display|view|see|get)\s+(?:me\s+)?(?:all\s+)?(?:of\s+)?(?:my\s+)?"
+                r"(?:uploaded\s+)?(?:files|documents|docs|uploads)"
+                r"|what\s+(?:files|documents|docs)\s+(?:have\s+i|did\s+i|i\s+have|i've)\s*(?:uploaded)?"
+                r"|which\s+(?:files|documents|docs)\s+(?:have\s+i|did\s+i)\s+upload(?:ed)?)",
+                re.IGNORECASE
+            )
+        )
+
+
+class CreateTaskPattern(IntentPattern):
+    """
+    "add a task to call Bob", "create a high priority task: ship release",
+    "remind me to renew the domain"
+    """
+
+    # Titles that hold a second request or a question, e.g. "call Bob and list my tasks"
+    COMPOUND_TITLE = re.compile(
+        r"\b(?:and|then|also|but|or)\b|^(?:what|how|why|when|where|which|who|should|can|could)\b",
+        re.IGNORECASE
+    )
+
+    def __init__(self):
+        super().__init__(
+            tool_name='create_task',
+            pattern=re.compile(
+                r"(?:(?:add|create|make|new)\s+(?:a\s+|an\s+)?(?:(?P<priority>low|medium|high)[\s-]priority\s+)?"
+                r"(?:task|to-?do|reminder)(?:\s+to|\s+for|\s*:|\s*-)?"
+                r"|remind\s+me\s+to)\s+(?P<title>.+?)",
+                re.IGNORECASE
+            )
+        )
+
+    def match(self, message: str) -> Optional[RoutedIntent]:
+        # Only ever route task creation on a full-message match; a partial match
+        # could pick the wrong title out of a longer sentence. Questions and
+        # compound requests go to the LLM too.
+        if message.rstrip().endswith('?'):
+            return None
+        intent = super().match(message)
+        if intent and intent.confidence < FULL_MATCH_CONFIDENCE:
+            return None
+        if intent and self.COMPOUND_TITLE.search(intent.args['title']):
+            return None
+        return intent
+
+    def build_args(self, match: re.Match) -> Dict[str, Any]:
+        title = match.group('title').strip().rstrip('.!?')
+        priority = (match.group('priority') or 'medium').lower()
+        return {'title': title[:255], 'priority': priority}
+
+
+DEFAULT_PATTERNS: List[IntentPattern] = [
+    CreateTaskPattern(),
+    ListTasksPattern(),
+    ListDocumentsPattern(),
+]
+
+
+class IntentRouter:
+    """
+    Pattern-based router placed in front of the LLM tool-selection call.
+    """
+
+    def __init__(self, patterns: List[IntentPattern] = None, min_confidence: float = None):
+        """
+        Initialize the router.
+
+        Args:
+            patterns: Intent patterns to try, in priority order
+            min_confidence: Minimum confidence required to bypass the LLM
+        """
+        self.patterns = patterns if patterns is not None else DEFAULT_PATTERNS
+        if min_confidence is None:
+            min_confidence = getattr(settings, 'CHAT_INTENT_ROUTER_MIN_CONFIDENCE', 0.9)
+        self.min_confidence = min_confidence
+
+    def route(self, user_message: str) -> Optional[RoutedIntent]:
+        """
+        Find the best matching intent for a message.
+
+        Args:
+            user_message: The user's input message
+
+        Returns:
+            RoutedIntent when confidence is above the threshold, otherwise None
+        """
+        message = user_message.strip()
+        if not message or '\n' in message:
+            return None
+
+        best = None
+        for intent_pattern in self.patterns:
+            intent = intent_pattern.match(message)
+            if intent and (best is None or intent.confidence > best.confidence):
+                best = intent
+
+        if best and best.confidence >= self.min_confidence:
+            logger.info(f"Router matched '{best.tool_name}' with confidence {best.confidence}")
+            return best
+        return None
+
+
+def record_route(intent: Optional[RoutedIntent]):
+    """
+    Record a router hit (intent dispatched locally) or miss (fell back to the LLM).
+    """
+    if intent:
+        increment_counter(ROUTER_HITS_KEY)
+        increment_counter(ROUTER_TOOL_HITS_KEY.format(tool_name=intent.tool_name))
+    else:
+        increment_counter(ROUTER_MISSES_KEY)
+
+
+def get_router_stats() -> Dict[str, Any]:
+    """
+    Get router hit-rate statistics.
+
+    Returns:
+        Dict with hits, misses, hit_rate and per-tool hit counts
+    """
+    tool_names = [p.tool_name for p in DEFAULT_PATTERNS]
+    tool_keys = {name: ROUTER_TOOL_HITS_KEY.format(tool_name=name) for name in tool_names}
+    values = read_counters([ROUTER_HITS_KEY, ROUTER_MISSES_KEY] + list(tool_keys.values()))
+
+    hits = values[ROUTER_HITS_KEY]
+    misses = values[ROUTER_MISSES_KEY]
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hit_rate(hits, misses),
+        'hits_by_tool': {name: values[key] for name, key in tool_keys.items()},
+    }
@@ -2,7 +2,9 @@
 Serializers for chat API.
 """
 from rest_framework import serializers
-from .models import ChatMessage, Conversation
+
+from config.fastread import ValuesRowMapper
+from .models import ChatMessage, Conversation, LAST_MESSAGE_PREVIEW_LENGTH
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -15,12 +17,17 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'timestamp']
 
 
+# values() read path producing ChatMessageSerializer output
+chat_message_rows = ValuesRowMapper(ChatMessageSerializer)
+
+
 class ChatInputSerializer(serializers.Serializer):
     """
     Serializer for chat input.
     """
     message = serializers.CharField(max_length=10000)
     conversation_id = serializers.UUIDField(required=False, allow_null=True)
+    bypass_cache = serializers.BooleanField(required=False, default=False)
 
 
 class ChatResponseSerializer(serializers.Serializer):
@@ -36,13 +43,14 @@ class ChatResponseSerializer(serializers.Serializer):
 class ConversationSerializer(serializers.ModelSerializer):
     """
     Serializer for conversations.
+    Messages are not embedded; clients page through them with the
+    conversation's keyset-paginated messages endpoint.
     """
-    messages = ChatMessageSerializer(many=True, read_only=True, source='chatmessage_set')
     message_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Conversation
-        fields = ['id', 'title', 'created_at', 'updated_at', 'message_count', 'messages']
+        fields = ['id', 'title', 'created_at', 'updated_at', 'message_count']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_message_count(self, obj):
@@ -52,22 +60,22 @@ class ConversationSerializer(serializers.ModelSerializer):
 class ConversationListSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for conversation list.
+    Expects a queryset prepared with annotate_conversation_list().
     """
-    message_count = serializers.SerializerMethodField()
+    message_count = serializers.IntegerField(read_only=True)
     last_message = serializers.SerializerMethodField()
     
     class Meta:
         model = Conversation
         fields = ['id', 'title', 'created_at', 'updated_at', 'message_count', 'last_message']
     
-    def get_message_count(self, obj):
-        return obj.chatmessage_set.count() if hasattr(obj, 'chatmessage_set') else 0
-    
     def get_last_message(self, obj):
-        last_msg = obj.chatmessage_set.last() if hasattr(obj, 'chatmessage_set') else None
-        if last_msg:
-            return {
-                'role': last_msg.role,
-                'content': last_msg.content[:100] + '...' if len(last_msg.content) > 100 else last_msg.content
-            }
-        return None
+        if obj.last_message_role is None:
+            return None
+        preview = obj.last_message_preview or ''
+        if len(preview) > LAST_MESSAGE_PREVIEW_LENGTH:
+            preview = preview[:LAST_MESSAGE_PREVIEW_LENGTH] + '...'
+        return {
+            'role': obj.last_message_role,
+            'content': preview
+        }
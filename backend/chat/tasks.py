@@ -0,0 +1,34 @@
+"""
+Celery tasks for background conversation maintenance.
+"""
+import logging
+
+from celery import shared_task
+
+from .models import Conversation
+from .context import update_summary, get_summary_llm
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def update_conversation_summary(conversation_id: str):
+    """
+    Fold older turns of a conversation into its rolling summary.
+    
+    Args:
+        conversation_id: UUID string of the conversation
+    """
+    try:
+        conversation = Conversation.objects.get(id=conversation_id)
+    except Conversation.DoesNotExist:
+        logger.warning(f"Conversation {conversation_id} not found for summary update")
+        return "Conversation not found"
+    
+    try:
+        updated = update_summary(conversation, get_summary_llm())
+    except Exception as e:
+        logger.error(f"Error updating summary for conversation {conversation_id}: {str(e)}")
+        raise
+    
+    return "Summary updated" if updated else "Summary up to date"
@@ -1,3 +1,545 @@
-from django.test import TestCase
+import base64
+import importlib
+import json
+import os
+import threading
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from config.pagination import KeysetPagination
+from config.testing import QueryPlanTestMixin
+from documents.index_version import bump_index_version
+from . import answer_cache, prefetch
+from .context import build_chat_context, update_summary
+from .agent import AIAgent
+from .models import ChatMessage, Conversation
+from .router import FULL_MATCH_CONFIDENCE, PARTIAL_MATCH_CONFIDENCE, IntentRouter
+
+User = get_user_model()
+
+
+class ConversationListQueryCountTests(APITestCase):
+    """
+    The conversation list must not issue per-row queries for counts or previews.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='chat@example.com',
+            username='chat',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('conversation-list')
+
+    def _create_conversations(self, count, messages_per_conversation=3):
+        for i in range(count):
+            conversation = Conversation.objects.create(user=self.user, title=f'Conversation {i}')
+            for j in range(messages_per_conversation):
+                ChatMessage.objects.create(
+                    user=self.user,
+                    conversation=conversation,
+                    role='user' if j % 2 == 0 else 'assistant',
+                    content=f'Message {j} in conversation {i}'
+                )
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_does_not_grow_with_conversations(self):
+        self._create_conversations(2)
+        small_count, _ = self._count_list_queries()
+
+        self._create_conversations(30)
+        large_count, response = self._count_list_queries()
+
+        self.assertEqual(small_count, large_count)
+        self.assertLessEqual(large_count, 2)
+        self.assertEqual(len(response.data['results']), 32)
+
+    def test_counts_and_last_message_preview(self):
+        conversation = Conversation.objects.create(user=self.user, title='Preview')
+        ChatMessage.objects.create(user=self.user, conversation=conversation, role='user', content='hi')
+        ChatMessage.objects.create(
+            user=self.user, conversation=conversation, role='assistant', content='x' * 150
+        )
+        Conversation.objects.create(user=self.user, title='Empty')
+
+        response = self.client.get(self.url)
+        rows = {row['title']: row for row in response.data['results']}
+
+        self.assertEqual(rows['Preview']['message_count'], 2)
+        self.assertEqual(rows['Preview']['last_message']['role'], 'assistant')
+        self.assertEqual(rows['Preview']['last_message']['content'], 'x' * 100 + '...')
+        self.assertEqual(rows['Empty']['message_count'], 0)
+        self.assertIsNone(rows['Empty']['last_message'])
+
+
+class ChatQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """
+    Hot chat queries must be served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'plan{i}@example.com', username=f'plan{i}', password='testpass123')
+            for i in range(5)
+        ]
+        cls.conversations = Conversation.objects.bulk_create([
+            Conversation(user=cls.users[i % 5], title=f'Conversation {i}')
+            for i in range(50)
+        ])
+        ChatMessage.objects.bulk_create([
+            ChatMessage(
+                user=cls.conversations[i % 50].user,
+                conversation=cls.conversations[i % 50],
+                role='user' if i % 2 == 0 else 'assistant',
+                content=f'Message {i}'
+            )
+            for i in range(1000)
+        ])
+
+    def test_user_chat_history(self):
+        self.assertUsesIndex(
+            ChatMessage.objects.filter(user=self.users[0]).order_by('-timestamp', '-id')[:50],
+            'chat_msg_user_ts_idx'
+        )
+
+    def test_conversation_messages(self):
+        self.assertUsesIndex(
+            ChatMessage.objects.filter(conversation=self.conversations[0]).order_by('-timestamp', '-id')[:50],
+            'chat_msg_conv_ts_idx'
+        )
+
+    def test_user_conversations(self):
+        self.assertUsesIndex(
+            Conversation.objects.filter(user=self.users[0]).order_by('-updated_at', '-id')[:50],
+            'conv_user_updated_idx'
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Keyset cursors page through rows in order without gaps or repeats.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='keyset@example.com', username='keyset', password='testpass123')
+        self.conversation = Conversation.objects.create(user=self.user)
+        self.factory = APIRequestFactory()
+
+    def _create_messages(self, count):
+        return [
+            ChatMessage.objects.create(user=self.user, conversation=self.conversation, role='user', content=f'm{i}')
+            for i in range(count)
+        ]
+
+    def _page(self, params):
+        paginator = KeysetPagination()
+        request = Request(self.factory.get('/messages/', params))
+        page = paginator.paginate_queryset(ChatMessage.objects.filter(user=self.user), request)
+        return page, paginator.next_cursor
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        now = timezone.now()
+        cursor = paginator.encode_cursor(now, 'abc')
+        request = Request(self.factory.get('/messages/', {'cursor': cursor}))
+        self.assertEqual(paginator.decode_cursor(request), (now.isoformat(), 'abc'))
+
+    def test_pages_cover_rows_with_equal_timestamps(self):
+        self._create_messages(5)
+        # Equal ordering values are told apart by the primary key tiebreaker
+        ChatMessage.objects.filter(user=self.user).update(timestamp=timezone.now())
+
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            page, cursor = self._page(params)
+            seen.extend(message.id for message in page)
+            if cursor is None:
+                break
+            params = {'page_size': 2, 'cursor': cursor}
+
+        expected = list(
+            ChatMessage.objects.filter(user=self.user).order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_newest_first_and_last_page_has_no_cursor(self):
+        messages = self._create_messages(3)
+        for offset, message in enumerate(messages):
+            ChatMessage.objects.filter(id=message.id).update(timestamp=timezone.now() + timedelta(seconds=offset))
+
+        page, cursor = self._page({'page_size': 3})
+        self.assertEqual([message.content for message in page], ['m2', 'm1', 'm0'])
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self._page({'cursor': 'not-a-cursor'})
+
+    def test_cursor_with_bad_values(self):
+        paginator = KeysetPagination()
+        message = self._create_messages(1)[0]
+        for raw in (
+            ['x', 'abc'],
+            [message.timestamp.isoformat(), 'abc'],
+            {'value': 'x'},
+            [message.timestamp.isoformat()],
+            [message.timestamp.isoformat(), str(message.id), 'extra'],
+            [None, str(message.id)],
+        ):
+            cursor = base64.urlsafe_b64encode(json.dumps(raw).encode('utf-8')).decode('ascii')
+            with self.assertRaises(NotFound, msg=raw):
+                self._page({'cursor': cursor})
+
+        page, _ = self._page({'cursor': paginator.encode_cursor(message.timestamp, message.id)})
+        self.assertEqual(page, [])
+
+
+class ConversationDetailTests(APITestCase):
+    """
+    The conversation detail is O(1) in the number of messages.
+    """
+
+    def test_detail_does_not_embed_messages(self):
+        user = User.objects.create_user(email='detail@example.com', username='detail', password='testpass123')
+        self.client.force_authenticate(user=user)
+        conversation = Conversation.objects.create(user=user)
+        for i in range(3):
+            ChatMessage.objects.create(user=user, conversation=conversation, role='user', content=f'm{i}')
+
+        response = self.client.get(reverse('conversation-detail', kwargs={'pk': conversation.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['message_count'], 3)
+        self.assertNotIn('messages', response.data)
+
+
+class ConversationMigrationTests(TestCase):
+    """
+    Existing messages are attached to the conversation current when they were sent.
+    """
+
+    def setUp(self):
+        self.migration = importlib.import_module('chat.migrations.0003_chatmessage_conversation')
+        self.user = User.objects.create_user(email='legacy@example.com', username='legacy', password='testpass123')
+
+    def _message(self, when, user=None):
+        message = ChatMessage.objects.create(user=user or self.user, role='user', content='legacy')
+        ChatMessage.objects.filter(id=message.id).update(timestamp=when)
+        return message
+
+    def test_messages_go_to_latest_earlier_conversation(self):
+        now = timezone.now()
+        first = Conversation.objects.create(user=self.user, title='First')
+        second = Conversation.objects.create(user=self.user, title='Second')
+        Conversation.objects.filter(id=first.id).update(created_at=now - timedelta(hours=2))
+        Conversation.objects.filter(id=second.id).update(created_at=now - timedelta(hours=1))
+        before_first = self._message(now - timedelta(hours=3))
+        in_first = self._message(now - timedelta(minutes=90))
+        in_second = self._message(now - timedelta(minutes=30))
+
+        self.migration.assign_messages_to_conversations(apps, None)
+
+        assigned = dict(ChatMessage.objects.values_list('id', 'conversation_id'))
+        self.assertEqual(assigned[before_first.id], first.id)
+        self.assertEqual(assigned[in_first.id], first.id)
+        self.assertEqual(assigned[in_second.id], second.id)
+
+    def test_user_without_conversations_gets_one(self):
+        message = self._message(timezone.now())
+
+        self.migration.assign_messages_to_conversations(apps, None)
+
+        conversation = Conversation.objects.get(user=self.user)
+        self.assertEqual(conversation.title, 'Earlier messages')
+        message.refresh_from_db()
+        self.assertEqual(message.conversation_id, conversation.id)
+
+
+class IntentRouterTests(TestCase):
+    """
+    Plain tool requests are routed locally; anything less certain goes to the LLM.
+    """
+
+    def setUp(self):
+        self.router = IntentRouter(min_confidence=0.9)
+
+    def test_full_matches(self):
+        cases = {
+            'show my tasks': ('list_tasks', {}),
+            'Can you list my done tasks please?': ('list_tasks', {'status_filter': 'done'}),
+            'what files have I uploaded?': ('list_documents', {}),
+            'add a high priority task to ship the release': (
+                'create_task', {'title': 'ship the release', 'priority': 'high'}
+            ),
+            'remind me to renew the domain.': ('create_task', {'title': 'renew the domain', 'priority': 'medium'}),
+        }
+        for message, (tool_name, args) in cases.items():
+            intent = self.router.route(message)
+            self.assertEqual((intent.tool_name, intent.args), (tool_name, args), message)
+            self.assertEqual(intent.confidence, FULL_MATCH_CONFIDENCE)
+
+    def test_partial_match_falls_back_below_threshold(self):
+        message = 'I was wondering whether you could show my tasks and summarize the report'
+        self.assertIsNone(self.router.route(message))
+
+        intent = IntentRouter(min_confidence=0.5).route(message)
+        self.assertEqual(intent.tool_name, 'list_tasks')
+        self.assertEqual(intent.confidence, PARTIAL_MATCH_CONFIDENCE)
+
+    def test_task_creation_needs_a_plain_title(self):
+        for message in (
+            'add a task to call Bob and show my tasks',
+            'can you add a task to call Bob?',
+            'add a task: what is due this week',
+            'tell me about the report, then add a task to review it',
+        ):
+            self.assertIsNone(IntentRouter(min_confidence=0.5).route(message), message)
+
+
+@mock.patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+@mock.patch('chat.agent.record_route')
+@mock.patch('chat.agent.ChatGroq')
+class LocalRoutingTests(TestCase):
+    """
+    A routed tool that fails hands the message to the LLM path.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='router@example.com', username='router', password='testpass123')
+
+    def test_tool_result_returned(self, chat_groq, record_route):
+        agent = AIAgent(self.user)
+        agent.tools_dict['list_tasks'] = mock.Mock(**{'invoke.return_value': 'No tasks found.'})
+
+        self.assertEqual(agent._route_locally('show my tasks'), 'No tasks found.')
+        self.assertEqual(record_route.call_args.args[0].tool_name, 'list_tasks')
+
+    def test_tool_error_falls_back_to_llm(self, chat_groq, record_route):
+        agent = AIAgent(self.user)
+        agent.tools_dict['list_tasks'] = mock.Mock(**{'invoke.side_effect': RuntimeError('database is down')})
+
+        self.assertIsNone(agent._route_locally('show my tasks'))
+        record_route.assert_called_once_with(None)
+
+
+def _redis_available():
+    try:
+        return answer_cache.get_redis_client().ping()
+    except Exception:
+        return False
+
+
+@skipUnless(_redis_available(), 'Answer cache tests need Redis')
+@override_settings(CHAT_ANSWER_CACHE_SIMILARITY_THRESHOLD=0.9, CHAT_ANSWER_CACHE_TTL=60,
+                   CHAT_ANSWER_CACHE_MAX_ENTRIES=2)
+class AnswerCacheTests(TestCase):
+    """
+    Similar questions are served from the cache until the entry expires or the index changes.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='cache@example.com', username='cache', password='testpass123')
+        client = answer_cache.get_redis_client()
+        keys = list(client.scan_iter(f'answer_cache:*{self.user.id}*'))
+        if keys:
+            client.delete(*keys)
+
+    def test_similar_question_hits(self):
+        cache = answer_cache.AnswerCache(self.user)
+        cache.store('What is the refund policy?', [1.0, 0.0], 'Thirty days.', ['doc_g1_0'])
+
+        self.assertEqual(answer_cache.AnswerCache(self.user).lookup([0.99, 0.14])['answer'], 'Thirty days.')
+        self.assertIsNone(answer_cache.AnswerCache(self.user).lookup([0.0, 1.0]))
+
+    def test_expired_entry_misses(self):
+        answer_cache.AnswerCache(self.user).store('q', [1.0, 0.0], 'a', ['doc_g1_0'])
+
+        with mock.patch('chat.answer_cache.time.time', return_value=timezone.now().timestamp() + 61):
+            self.assertIsNone(answer_cache.AnswerCache(self.user).lookup([1.0, 0.0]))
+
+    def test_index_change_invalidates(self):
+        answer_cache.AnswerCache(self.user).store('q', [1.0, 0.0], 'a', ['doc_g1_0'])
+        bump_index_version(str(self.user.id))
+
+        self.assertIsNone(answer_cache.AnswerCache(self.user).lookup([1.0, 0.0]))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = answer_cache.AnswerCache(self.user)
+        cache.store('first', [1.0, 0.0], 'first', ['doc_g1_0'])
+        cache.store('second', [0.0, 1.0], 'second', ['doc_g1_1'])
+        self.assertIsNotNone(cache.lookup([1.0, 0.0]))
+        cache.store('third', [0.6, 0.8], 'third', ['doc_g1_2'])
+
+        self.assertIsNotNone(cache.lookup([1.0, 0.0]))
+        self.assertIsNone(cache.lookup([0.0, 1.0]))
+
+
+@mock.patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+@mock.patch('chat.agent.AnswerCache')
+@mock.patch('chat.agent.is_answer_cache_enabled', return_value=True)
+@mock.patch('chat.agent.ChatGroq')
+class AnswerCacheLookupTests(TestCase):
+    """
+    Follow-up questions depend on the conversation and skip the cache.
+    """
+
+    def test_follow_up_skips_cache(self, chat_groq, enabled, cache_class):
+        user = User.objects.create_user(email='followup@example.com', username='followup', password='testpass123')
+        agent = AIAgent(user)
+        history = [{'role': 'user', 'content': 'What does the contract say about renewals?'}]
+
+        self.assertEqual(agent._lookup_cached_answer('What about the second one?', history, False), (None, None, None))
+        cache_class.assert_not_called()
+
+
+@override_settings(CHAT_PREFETCH_SIMILARITY_THRESHOLD=0.8, CHAT_PREFETCH_WAIT_TIMEOUT=5.0)
+class RetrievalPrefetchTests(TestCase):
+    """
+    Prefetched results are reused only for a similar query, and only if ready in time.
+    """
+
+    RESULTS = {'ids': [['doc_g1_0']], 'documents': [['Renewals are annual.']]}
+
+    @mock.patch('chat.prefetch.search_user_documents', return_value=RESULTS)
+    def _prefetch(self, search):
+        fetch = prefetch.RetrievalPrefetch('user-1', 'What about renewals?', query_embedding=[1.0, 0.0])
+        fetch.future.result()
+        return fetch
+
+    def test_same_query_reuses_results(self):
+        self.assertEqual(self._prefetch().results_for('what about renewals'), self.RESULTS)
+
+    @mock.patch('documents.embedding_models.embed_query')
+    def test_similarity_threshold(self, embed_query):
+        fetch = self._prefetch()
+
+        embed_query.return_value = [0.9, 0.436]
+        self.assertEqual(fetch.results_for('contract renewal terms'), self.RESULTS)
+        embed_query.return_value = [0.6, 0.8]
+        self.assertIsNone(fetch.results_for('who signed the contract'))
+
+    @override_settings(CHAT_PREFETCH_WAIT_TIMEOUT=0.01)
+    def test_slow_prefetch_is_not_awaited(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with mock.patch.object(prefetch.RetrievalPrefetch, '_run', lambda fetch: release.wait(5)):
+            fetch = prefetch.RetrievalPrefetch('user-1', 'What about renewals?', query_embedding=[1.0, 0.0])
+            self.assertIsNone(fetch.results_for('What about renewals?'))
+
+    @mock.patch('chat.prefetch.connection')
+    @mock.patch('chat.prefetch.close_old_connections')
+    @mock.patch('chat.prefetch.search_user_documents', side_effect=ConnectionError('ChromaDB unavailable'))
+    def test_worker_releases_connection(self, search, close_old_connections, connection):
+        fetch = prefetch.RetrievalPrefetch.__new__(prefetch.RetrievalPrefetch)
+        fetch.user_id, fetch.query, fetch.query_embedding = 'user-1', 'What about renewals?', [1.0, 0.0]
+
+        with self.assertRaises(ConnectionError):
+            fetch._run()
+        close_old_connections.assert_called_once()
+        connection.close.assert_called_once()
+
+
+def _word_count(text):
+    return len(text.split())
+
+
+@mock.patch('chat.context.count_tokens', side_effect=_word_count)
+class ConversationContextTests(TestCase):
+    """
+    Prompt history fits the token budget, and older turns are folded into the summary once.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='context@example.com', username='context', password='testpass123')
+        self.conversation = Conversation.objects.create(user=self.user)
+        start = timezone.now() - timedelta(hours=1)
+        self.messages = []
+        for i in range(5):
+            message = ChatMessage.objects.create(
+                user=self.user, conversation=self.conversation,
+                role='user' if i % 2 == 0 else 'assistant', content=f'turn {i} four words'
+            )
+            ChatMessage.objects.filter(id=message.id).update(timestamp=start + timedelta(minutes=i))
+            message.refresh_from_db()
+            self.messages.append(message)
+
+    def _llm(self, summary):
+        return mock.Mock(**{'invoke.return_value.content': summary})
+
+    @override_settings(CHAT_CONTEXT_TOKEN_BUDGET=10)
+    def test_newest_turns_fill_budget(self, count_tokens):
+        context = build_chat_context(self.conversation)
+        self.assertEqual([msg['content'] for msg in context], ['turn 3 four words', 'turn 4 four words'])
+
+        self.conversation.summary = 'Earlier: greetings exchanged'
+        context = build_chat_context(self.conversation, exclude_message_id=self.messages[4].id)
+        self.assertEqual(context, [
+            {'role': 'summary', 'content': 'Earlier: greetings exchanged'},
+            {'role': 'assistant', 'content': 'turn 3 four words'},
+        ])
+
+    @override_settings(CHAT_CONTEXT_RECENT_TOKENS=8, CHAT_SUMMARY_MIN_TOKENS=1)
+    def test_turns_outside_recent_window_are_folded(self, count_tokens):
+        llm = self._llm('Three turns happened.')
+
+        self.assertTrue(update_summary(self.conversation, llm))
+
+        prompt = llm.invoke.call_args.args[0]
+        self.assertIn('turn 2 four words', prompt)
+        self.assertNotIn('turn 3 four words', prompt)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summary, 'Three turns happened.')
+        self.assertEqual(self.conversation.summarized_until, self.messages[2].timestamp)
+        # Nothing new to fold
+        self.assertFalse(update_summary(self.conversation, llm))
+
+    @override_settings(CHAT_CONTEXT_RECENT_TOKENS=8, CHAT_SUMMARY_MIN_TOKENS=1, CHAT_SUMMARY_MAX_PENDING=2)
+    def test_long_backlog_is_folded_oldest_first(self, count_tokens):
+        llm = self._llm('Two turns happened.')
+
+        self.assertTrue(update_summary(self.conversation, llm))
+
+        prompt = llm.invoke.call_args.args[0]
+        self.assertIn('turn 0 four words', prompt)
+        self.assertIn('turn 1 four words', prompt)
+        self.assertNotIn('turn 2 four words', prompt)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summarized_until, self.messages[1].timestamp)
+
+        # The next call continues with the rest of the backlog
+        self.assertTrue(update_summary(self.conversation, self._llm('Three turns happened.')))
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summarized_until, self.messages[2].timestamp)
+
+    @override_settings(CHAT_CONTEXT_RECENT_TOKENS=8, CHAT_SUMMARY_MIN_TOKENS=100)
+    def test_small_backlog_is_not_folded(self, count_tokens):
+        llm = self._llm('unused')
+        self.assertFalse(update_summary(self.conversation, llm))
+        llm.invoke.assert_not_called()
+
+    @override_settings(CHAT_CONTEXT_RECENT_TOKENS=8, CHAT_SUMMARY_MIN_TOKENS=1)
+    def test_concurrent_update_is_discarded(self, count_tokens):
+        stale = Conversation.objects.get(id=self.conversation.id)
+        self.assertTrue(update_summary(self.conversation, self._llm('First fold.')))
+
+        self.assertFalse(update_summary(stale, self._llm('Second fold of the same turns.')))
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summary, 'First fold.')
@@ -3,18 +3,72 @@ LangChain tools for the AI Agent.
 These tools allow the AI to search documents, create tasks, and list tasks.
 """
 import logging
-from typing import Optional
+from typing import Optional, List, Dict, Any, Callable
 from langchain_core.tools import tool
 
 logger = logging.getLogger(__name__)
 
 
-def get_document_search_tool(user_id: str):
+def search_user_documents(user_id: str, query: str, query_embedding: List[float] = None,
+                          n_results: int = 5) -> Dict[str, Any]:
     """
-    Factory function to create a document search tool bound to a specific user.
+    Embed a query (unless an embedding is given) and search the user's chunks in
+    ChromaDB, in the collection of the embedding model their workspace currently uses.
+    
+    Args:
+        user_id: User ID for filtering results
+        query: The search query
+        query_embedding: Optional precomputed embedding for the query, from embed_query
+        n_results: Number of results to return
+        
+    Returns:
+        ChromaDB search results dictionary
     """
     from documents.chroma_handler import ChromaHandler
-    from documents.utils import EmbeddingGenerator
+    from documents.embedding_models import embed_query, get_collection_name, get_search_model
+    
+    model_name = get_search_model(user_id)
+    if query_embedding is None:
+        query_embedding = embed_query(user_id, query, model_name=model_name)
+    
+    chroma_handler = ChromaHandler()
+    return chroma_handler.search_documents(
+        collection_name=get_collection_name(model_name),
+        query_embedding=query_embedding,
+        user_id=user_id,
+        n_results=n_results
+    )
+
+
+def format_search_results(results: Dict[str, Any]) -> str:
+    """
+    Format ChromaDB search results as context for the LLM.
+    """
+    if not results or not results.get('documents') or not results['documents'][0]:
+        return "No relevant information found in your uploaded documents."
+    
+    documents = results['documents'][0]
+    metadatas = results.get('metadatas', [[]])[0]
+    
+    formatted_results = []
+    for i, (doc, meta) in enumerate(zip(documents, metadatas), 1):
+        doc_title = meta.get('document_title', 'Unknown Document')
+        formatted_results.append(f"[Source: {doc_title}]\n{doc}")
+    
+    return "\n\n---\n\n".join(formatted_results)
+
+
+def get_document_search_tool(user_id: str, prefetch_lookup: Callable = None,
+                             on_results: Callable = None):
+    """
+    Factory function to create a document search tool bound to a specific user.
+    
+    Args:
+        user_id: User ID the search is scoped to
+        prefetch_lookup: Optional callable(query) returning speculatively prefetched
+            results for a similar query, or None if there are none to reuse
+        on_results: Optional callable(results) notified with the raw search results
+    """
     
     @tool
     def search_documents(query: str) -> str:
@@ -29,34 +83,17 @@ def get_document_search_tool(user_id: str):
             Relevant text chunks from the user's documents.
         """
         try:
-            logger.info(f"Searching documents for user {user_id} with query: {query}")
-            
-            # Generate embedding for the query
-            embedding_generator = EmbeddingGenerator()
-            query_embedding = embedding_generator.generate_embeddings([query])[0]
-            
-            # Search ChromaDB
-            chroma_handler = ChromaHandler()
-            results = chroma_handler.search_documents(
-                collection_name="documents",
-                query_embedding=query_embedding,
-                user_id=user_id,
-                n_results=5
-            )
-            
-            if not results or not results.get('documents') or not results['documents'][0]:
-                return "No relevant information found in your uploaded documents."
-            
-            # Format results
-            documents = results['documents'][0]
-            metadatas = results.get('metadatas', [[]])[0]
+            results = prefetch_lookup(query) if prefetch_lookup else None
+            if results is not None:
+                logger.info(f"Using prefetched search results for user {user_id} with query: {query}")
+            else:
+                logger.info(f"Searching documents for user {user_id} with query: {query}")
+                results = search_user_documents(user_id, query)
             
-            formatted_results = []
-            for i, (doc, meta) in enumerate(zip(documents, metadatas), 1):
-                doc_title = meta.get('document_title', 'Unknown Document')
-                formatted_results.append(f"[Source: {doc_title}]\n{doc}")
+            if on_results:
+                on_results(results)
             
-            return "\n\n---\n\n".join(formatted_results)
+            return format_search_results(results)
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
@@ -7,15 +7,25 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import ChatMessage, Conversation
+from config.fastread import paginate_values
+from config.versioning import ConditionalResponseMixin
+from .models import ChatMessage, Conversation, annotate_conversation_list
 from .serializers import (
     ChatInputSerializer,
     ChatResponseSerializer,
     ChatMessageSerializer,
     ConversationSerializer,
-    ConversationListSerializer
+    ConversationListSerializer,
+    chat_message_rows
 )
 from .agent import AIAgent
+from .pagination import (
+    MessageKeysetPagination,
+    ConversationKeysetPagination,
+    ChatHistoryPagination
+)
+from .context import build_chat_context
+from .tasks import update_conversation_summary
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +41,8 @@ def chat_with_agent(request):
     Request body:
     {
         "message": "Your message here",
-        "conversation_id": "optional-uuid"  // To continue an existing conversation
+        "conversation_id": "optional-uuid",  // To continue an existing conversation
+        "bypass_cache": false                // Optional: skip the answer cache lookup
     }
     
     Response:
@@ -49,6 +60,7 @@ def chat_with_agent(request):
     
     user_message = serializer.validated_data['message']
     conversation_id = serializer.validated_data.get('conversation_id')
+    bypass_cache = serializer.validated_data.get('bypass_cache', False)
     
     try:
         # Get or create conversation
@@ -74,31 +86,35 @@ def chat_with_agent(request):
         # Save user message
         user_msg = ChatMessage.objects.create(
             user=request.user,
+            conversation=conversation,
             role='user',
             content=user_message
         )
         
-        # Get chat history (last 10 messages for context)
-        chat_history = list(
-            ChatMessage.objects.filter(user=request.user)
-            .order_by('-timestamp')[:10]
-            .values('role', 'content')
-        )
-        chat_history.reverse()  # Put in chronological order
+        # Get chat history within the token budget (rolling summary + recent turns)
+        chat_history = build_chat_context(conversation, exclude_message_id=user_msg.id)
         
         # Initialize AI agent and get response
         agent = AIAgent(request.user)
-        ai_response = agent.chat_sync(user_message, chat_history[:-1])  # Exclude current message
+        ai_response = agent.chat_sync(user_message, chat_history, bypass_cache=bypass_cache)
         
         # Save AI response
         assistant_msg = ChatMessage.objects.create(
             user=request.user,
+            conversation=conversation,
             role='assistant',
             content=ai_response
         )
         
-        # Update conversation timestamp
-        conversation.save()  # This updates updated_at
+        # Update conversation timestamp (only updated_at, so a concurrent
+        # background summary update is not overwritten)
+        conversation.save(update_fields=['updated_at'])
+        
+        # Fold older turns into the rolling summary in the background
+        try:
+            update_conversation_summary.delay(str(conversation.id))
+        except Exception as e:
+            logger.error(f"Error starting summary task for conversation {conversation.id}: {str(e)}")
         
         logger.info(f"Chat completed for user {request.user.id}")
         
@@ -117,15 +133,21 @@ def chat_with_agent(request):
         )
 
 
-class ConversationViewSet(viewsets.ModelViewSet):
+class ConversationViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing conversations.
+    List, detail and messages responses carry ETags and honour If-None-Match.
     """
     permission_classes = [IsAuthenticated]
+    etag_resource = 'conversations'
+    pagination_class = ConversationKeysetPagination
     
     def get_queryset(self):
         """Return only conversations belonging to the current user."""
-        return Conversation.objects.filter(user=self.request.user)
+        queryset = Conversation.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = annotate_conversation_list(queryset)
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -138,15 +160,18 @@ class ConversationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
         """
-        Get all messages in a conversation.
+        Get messages in a conversation, newest first.
+        
+        Keyset paginated: follow `next` (or pass `cursor`) for older messages;
+        `page_size` is capped at MessageKeysetPagination.max_page_size.
         """
+        return self._conditional(self._messages, request, pk=pk)
+    
+    def _messages(self, request, pk=None):
         conversation = self.get_object()
-        messages = ChatMessage.objects.filter(
-            user=request.user
-        ).order_by('timestamp')
+        messages = ChatMessage.objects.filter(conversation=conversation)
         
-        serializer = ChatMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        return paginate_values(MessageKeysetPagination(), chat_message_rows, messages, request, view=self)
     
     @action(detail=False, methods=['delete'])
     def clear_history(self, request):
@@ -164,17 +189,9 @@ def chat_history(request):
     """
     GET /api/chat/history/
     
-    Get the user's recent chat messages.
+    Get the user's recent chat messages, newest first.
+    Keyset paginated: `limit` sets the page size (capped), follow `next` for older messages.
     """
-    limit = request.query_params.get('limit', 50)
-    try:
-        limit = int(limit)
-    except ValueError:
-        limit = 50
-    
-    messages = ChatMessage.objects.filter(
-        user=request.user
-    ).order_by('-timestamp')[:limit]
+    messages = ChatMessage.objects.filter(user=request.user)
     
-    serializer = ChatMessageSerializer(messages, many=True)
-    return Response(serializer.data)
+    return paginate_values(ChatHistoryPagination(), chat_message_rows, messages, request)
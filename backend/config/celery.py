@@ -3,6 +3,7 @@ Celery configuration for Django project.
 """
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 # Set default Django settings module for celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -15,4 +16,20 @@ app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def configure_worker_process(**kwargs):
+    """
+    Embedding workers pin torch to TORCH_NUM_THREADS threads per process and,
+    with DOCUMENT_EMBEDDING_PRELOAD set, load the model before the first task.
+    """
+    num_threads = os.environ.get('TORCH_NUM_THREADS')
+    if num_threads:
+        import torch
+        torch.set_num_threads(int(num_threads))
+    
+    if os.environ.get('DOCUMENT_EMBEDDING_PRELOAD'):
+        from documents.utils import get_embedding_generator
+        get_embedding_generator()
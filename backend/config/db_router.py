@@ -0,0 +1,124 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+Reads made while handling a safe (GET/HEAD/OPTIONS) API request go to the
+replica alias. Everything else stays on the primary: writes, reads during
+unsafe requests, Celery tasks and management commands. A user whose
+request wrote something is pinned to the primary for a few seconds, so
+their next reads do not hit replication lag.
+"""
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_PIN_KEY = 'db_primary_pin:{user_id}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@dataclass
+class RoutingState:
+    """Per-request routing state."""
+    reads_on_replica: bool
+    user_id: Optional[str] = None
+    pinned: Optional[bool] = None
+
+
+_routing_state: ContextVar[Optional[RoutingState]] = ContextVar('db_routing_state', default=None)
+
+
+def get_replica_alias() -> Optional[str]:
+    """
+    The configured replica alias, or None if no replica is set up.
+    """
+    alias = getattr(settings, 'DB_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def note_authenticated_user(user_id):
+    """
+    Record the current request's user so stickiness can be applied.
+    """
+    state = _routing_state.get()
+    if state is not None:
+        state.user_id = str(user_id)
+
+
+def pin_to_primary(user_id):
+    """
+    Send a user's reads to the primary for DB_REPLICA_STICKY_SECONDS.
+    """
+    try:
+        cache.set(
+            PRIMARY_PIN_KEY.format(user_id=user_id),
+            True,
+            timeout=getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 5)
+        )
+    except Exception as e:
+        logger.warning(f"Could not pin user {user_id} to the primary database: {str(e)}")
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    try:
+        return bool(cache.get(PRIMARY_PIN_KEY.format(user_id=user_id)))
+    except Exception as e:
+        # Without the pin we cannot promise read-your-writes; stay safe
+        logger.warning(f"Could not read primary pin for user {user_id}: {str(e)}")
+        return True
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending safe request reads to the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.reads_on_replica:
+            return None
+
+        replica = get_replica_alias()
+        if replica is None:
+            return None
+
+        if state.user_id is not None:
+            if state.pinned is None:
+                state.pinned = is_pinned_to_primary(state.user_id)
+            if state.pinned:
+                return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scopes replica reads to safe requests and pins users after they write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(reads_on_replica=request.method in SAFE_METHODS)
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+
+        if not state.reads_on_replica and state.user_id and response.status_code < 400:
+            pin_to_primary(state.user_id)
+        return response
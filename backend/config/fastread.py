@@ -0,0 +1,108 @@
+"""
+Serializer-free read path for hot list endpoints.
+Rows are fetched with values() and mapped to dicts through converters
+compiled once from the endpoint's existing ModelSerializer, so the output is
+identical but no serializer or model instance is built per row.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import RelatedField, ManyRelatedField
+
+# Fields whose database value is already the JSON representation
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+    serializers.IntegerField,
+    serializers.FloatField,
+)
+
+
+class ValuesRowMapper:
+    """
+    Maps values() rows to the representation of a flat ModelSerializer.
+    """
+
+    def __init__(self, serializer_class):
+        """
+        Args:
+            serializer_class: ModelSerializer whose output to reproduce; it may
+                only use plain model fields and dotted `source` lookups
+        """
+        self.serializer_class = serializer_class
+        self._spec = None
+
+    @property
+    def spec(self):
+        """
+        Tuples of (output name, values() lookup, converter or None), built on first use.
+        """
+        if self._spec is None:
+            spec = []
+            for name, field in self.serializer_class().fields.items():
+                if isinstance(field, (RelatedField, ManyRelatedField)) or field.source == '*':
+                    raise ImproperlyConfigured(
+                        f"{self.serializer_class.__name__}.{name} cannot be read with values()"
+                    )
+                convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                spec.append((name, field.source.replace('.', '__'), convert))
+            self._spec = tuple(spec)
+        return self._spec
+
+    def values(self, queryset, *extra_fields):
+        """
+        Restrict a queryset to the lookups the serializer needs.
+
+        Args:
+            queryset: Queryset to read from
+            extra_fields: Additional lookups to fetch, e.g. pagination ordering fields
+        """
+        lookups = [lookup for _, lookup, _ in self.spec]
+        return queryset.values(*dict.fromkeys([*lookups, *extra_fields]))
+
+    def to_representation(self, rows):
+        """
+        Convert values() rows to serializer-shaped dicts.
+        """
+        spec = self.spec
+        return [
+            {
+                name: row[lookup] if convert is None or row[lookup] is None else convert(row[lookup])
+                for name, lookup, convert in spec
+            }
+            for row in rows
+        ]
+
+
+def paginate_values(paginator, mapper, queryset, request, view=None):
+    """
+    Keyset-paginate a queryset through the values() read path.
+
+    Args:
+        paginator: KeysetPagination instance
+        mapper: ValuesRowMapper for the endpoint
+        queryset: Queryset to paginate
+        request: Current request
+
+    Returns:
+        Paginated Response
+    """
+    ordering = [name.lstrip('-') for name in paginator.ordering]
+    page = paginator.paginate_queryset(mapper.values(queryset, *ordering), request, view=view)
+    return paginator.get_paginated_response(mapper.to_representation(page))
+
+
+class ValuesListMixin:
+    """
+    ViewSet mixin serving the list action from values() rows.
+
+    Set list_row_mapper to a ValuesRowMapper built from the list serializer.
+    """
+    list_row_mapper = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.values_list_response(queryset)
+
+    def values_list_response(self, queryset, mapper=None):
+        return paginate_values(self.paginator, mapper or self.list_row_mapper, queryset, self.request, view=self)
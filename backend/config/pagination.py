@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination shared by the API apps.
+Pages are selected with a WHERE clause on an indexed (ordering field, id)
+pair instead of OFFSET, so fetching any page costs O(page size).
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over (ordering field, tiebreaker) pairs.
+
+    The cursor is an opaque token holding the last row's ordering value and
+    primary key; the next page is everything strictly after that pair.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Ordering field and unique tiebreaker; both must share a direction
+    ordering = ('-timestamp', '-id')
+
+    def get_page_size(self, request):
+        page_size = self.page_size
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (TypeError, ValueError):
+                page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, value, pk) -> str:
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value, str(pk)])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, model=None):
+        """
+        Decode the request's cursor into (ordering value, pk).
+
+        Args:
+            request: Request carrying the cursor query parameter
+            model: Model being paged; when given, both values are parsed with
+                their fields' to_python so a bad cursor never reaches the query
+
+        Returns:
+            The decoded pair, or None if the request has no cursor
+
+        Raises:
+            NotFound: If the cursor is malformed
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(cursor, list) or len(cursor) != 2:
+                raise ValueError('cursor must hold two values')
+            value, pk = cursor
+            if model is not None:
+                field, tiebreaker = (name.lstrip('-') for name in self.ordering)
+                value = model._meta.get_field(field).to_python(value)
+                pk = model._meta.get_field(tiebreaker).to_python(pk)
+                if value is None or pk is None:
+                    raise ValueError('cursor values must not be null')
+        except (TypeError, ValueError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    @staticmethod
+    def _get_value(obj, field):
+        return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+    def get_page_queryset(self, queryset, cursor=None):
+        """
+        Ordered queryset of the rows after a decoded cursor, unsliced.
+
+        Args:
+            queryset: Rows to page through
+            cursor: (ordering value, pk) of the previous page's last row, or None
+
+        Returns:
+            The queryset the page is read from
+        """
+        field, tiebreaker = (name.lstrip('-') for name in self.ordering)
+        descending = self.ordering[0].startswith('-')
+        op = 'lt' if descending else 'gt'
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            value, pk = cursor
+            # (field, tiebreaker) < (value, pk), written so the leading
+            # condition is a plain range on the indexed ordering field
+            queryset = queryset.filter(
+                Q(**{f'{field}__{op}e': value}),
+                Q(**{f'{field}__{op}': value}) | Q(**{f'{tiebreaker}__{op}': pk})
+            )
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        field, tiebreaker = (name.lstrip('-') for name in self.ordering)
+        queryset = self.get_page_queryset(queryset, self.decode_cursor(request, queryset.model))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        self.next_cursor = None
+        if self.has_next and self.page:
+            last = self.page[-1]
+            self.next_cursor = self.encode_cursor(
+                self._get_value(last, field),
+                self._get_value(last, tiebreaker)
+            )
+        return self.page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
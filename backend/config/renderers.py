@@ -0,0 +1,29 @@
+"""
+Fast JSON rendering for API responses.
+Uses orjson when it is installed and falls back to DRF's JSONRenderer otherwise.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson.
+
+    Types orjson cannot handle natively (lazy translation strings, Decimal,
+    querysets, ...) go through DRF's JSONEncoder.default, so output matches
+    the stock renderer. Indented output (the browsable API) uses the stock path.
+    """
+    _fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self._fallback_encoder.default)
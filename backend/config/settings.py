@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,6 +97,19 @@ DATABASES = {
     }
 }
 
+# Optional read replica: safe API reads go there unless the user wrote recently
+DB_REPLICA_ALIAS = 'replica'
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5'))
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES[DB_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('DB_REPLICA_HOST'),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,7 +158,11 @@ AUTH_USER_MODEL = 'accounts.User'
 # Django Rest Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -159,6 +177,10 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Authenticated user cache: shared (Redis) and per-process TTLs in seconds
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
+AUTH_USER_CACHE_LOCAL_TTL = float(os.environ.get('AUTH_USER_CACHE_LOCAL_TTL', '2'))
+
 # CORS Settings (for React frontend)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -180,6 +202,21 @@ AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = None
 AWS_QUERYSTRING_AUTH = False  # Make files publicly accessible
+# S3-compatible endpoint (e.g. MinIO); the public one is used in presigned URLs given to clients
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL') or None
+AWS_S3_PUBLIC_ENDPOINT_URL = os.environ.get('AWS_S3_PUBLIC_ENDPOINT_URL') or AWS_S3_ENDPOINT_URL
+
+# Direct-to-storage multipart uploads
+DOCUMENT_UPLOAD_PART_SIZE = int(os.environ.get('DOCUMENT_UPLOAD_PART_SIZE', str(8 * 1024 * 1024)))
+DOCUMENT_UPLOAD_URL_EXPIRY = int(os.environ.get('DOCUMENT_UPLOAD_URL_EXPIRY', '3600'))
+
+# Resumable uploads: chunks are assembled here (must be shared by all web workers)
+DOCUMENT_UPLOAD_TMP_DIR = os.environ.get('DOCUMENT_UPLOAD_TMP_DIR', str(MEDIA_ROOT / 'upload_sessions'))
+DOCUMENT_UPLOAD_SESSION_TTL = int(os.environ.get('DOCUMENT_UPLOAD_SESSION_TTL', str(24 * 60 * 60)))
+
+# Batch imports: files per request (multipart batches also count against Django's file limit)
+DOCUMENT_BATCH_MAX_FILES = int(os.environ.get('DOCUMENT_BATCH_MAX_FILES', '100'))
+DATA_UPLOAD_MAX_NUMBER_FILES = DOCUMENT_BATCH_MAX_FILES
 
 # Always use S3 storage when credentials are available
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
@@ -191,10 +228,113 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Ingestion stages run on separate queues so each worker pool scales on its own
+CELERY_TASK_ROUTES = {
+    'documents.tasks.process_uploaded_document': {'queue': 'ingest_io'},
+    'documents.tasks.download_document': {'queue': 'ingest_io'},
+    'documents.tasks.extract_document_text': {'queue': 'ingest_extract'},
+    'documents.tasks.embed_document_chunks': {'queue': 'ingest_embed'},
+    'documents.tasks.store_document_embeddings': {'queue': 'ingest_io'},
+    'documents.tasks.collect_stale_generations': {'queue': 'ingest_io'},
+    'documents.tasks.migrate_tenant_embeddings': {'queue': 'ingest_embed'},
+    'documents.tasks.drop_tenant_embeddings': {'queue': 'ingest_io'},
+}
+
+# Periodic tasks, run by `celery -A config beat`; they land on the default queue
+DOCUMENT_DISPATCH_INTERVAL = int(os.environ.get('DOCUMENT_DISPATCH_INTERVAL', '60'))
+DOCUMENT_UPLOAD_CLEANUP_INTERVAL = int(os.environ.get('DOCUMENT_UPLOAD_CLEANUP_INTERVAL', str(60 * 60)))
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-pending-documents': {
+        'task': 'documents.tasks.dispatch_pending_documents',
+        'schedule': DOCUMENT_DISPATCH_INTERVAL,
+    },
+    'cleanup-stale-upload-sessions': {
+        'task': 'documents.tasks.cleanup_stale_upload_sessions',
+        'schedule': DOCUMENT_UPLOAD_CLEANUP_INTERVAL,
+    },
+}
+
+# Cache: Redis when CACHE_REDIS_URL is set, so it is shared across web and worker
+# processes; otherwise per-process memory (tests and single-process local runs)
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Document status events (Redis pub/sub, streamed to clients as Server-Sent Events)
+DOCUMENT_EVENTS_REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+DOCUMENT_EVENTS_HEARTBEAT_SECONDS = 15
+# Ingestion progress: minimum seconds between counter writes, and chunks per embed/store batch
+DOCUMENT_PROGRESS_WRITE_INTERVAL = float(os.environ.get('DOCUMENT_PROGRESS_WRITE_INTERVAL', '2.0'))
+DOCUMENT_EMBEDDING_BATCH_SIZE = int(os.environ.get('DOCUMENT_EMBEDDING_BATCH_SIZE', '64'))
+# Seconds before chunks of a replaced index generation are deleted
+DOCUMENT_INDEX_GC_DELAY = int(os.environ.get('DOCUMENT_INDEX_GC_DELAY', '60'))
+# Chunks embedded or stored between checkpoints, so a retry does not redo them
+DOCUMENT_EMBEDDING_CHECKPOINT_CHUNKS = int(os.environ.get('DOCUMENT_EMBEDDING_CHECKPOINT_CHUNKS', '512'))
+# Cross-document embedding batcher (manage.py run_embedding_batcher) fed through a Redis stream
+DOCUMENT_EMBEDDING_BATCHER = os.environ.get('DOCUMENT_EMBEDDING_BATCHER', 'False') == 'True'
+DOCUMENT_EMBEDDING_REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+DOCUMENT_EMBEDDING_BATCHER_BATCH_SIZE = int(os.environ.get('DOCUMENT_EMBEDDING_BATCHER_BATCH_SIZE', '256'))
+DOCUMENT_EMBEDDING_BATCHER_MAX_WAIT_MS = int(os.environ.get('DOCUMENT_EMBEDDING_BATCHER_MAX_WAIT_MS', '50'))
+DOCUMENT_EMBEDDING_WAIT_TIMEOUT = int(os.environ.get('DOCUMENT_EMBEDDING_WAIT_TIMEOUT', '600'))
+DOCUMENT_EMBEDDING_RESULT_TTL = 3600
+# Embedding model for new indexes; existing workspaces move to it with manage.py migrate_embeddings,
+# which re-embeds about MIGRATION_BATCH_CHUNKS chunks per task, MIGRATION_INTERVAL seconds apart
+DOCUMENT_EMBEDDING_MODEL = os.environ.get('DOCUMENT_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+DOCUMENT_EMBEDDING_MIGRATION_BATCH_CHUNKS = int(os.environ.get('DOCUMENT_EMBEDDING_MIGRATION_BATCH_CHUNKS', '512'))
+DOCUMENT_EMBEDDING_MIGRATION_INTERVAL = int(os.environ.get('DOCUMENT_EMBEDDING_MIGRATION_INTERVAL', '5'))
+# Ingestion scheduling: small documents take the fast lane (whole chain on ingest_fast);
+# each lane starts documents round-robin across workspaces, capped per workspace and per lane
+DOCUMENT_SCHEDULER_REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+DOCUMENT_FAST_LANE_MAX_BYTES = int(os.environ.get('DOCUMENT_FAST_LANE_MAX_BYTES', str(1024 * 1024)))
+DOCUMENT_FAST_LANE_TENANT_CONCURRENCY = int(os.environ.get('DOCUMENT_FAST_LANE_TENANT_CONCURRENCY', '4'))
+DOCUMENT_FAST_LANE_MAX_IN_FLIGHT = int(os.environ.get('DOCUMENT_FAST_LANE_MAX_IN_FLIGHT', '16'))
+DOCUMENT_BULK_TENANT_CONCURRENCY = int(os.environ.get('DOCUMENT_BULK_TENANT_CONCURRENCY', '4'))
+DOCUMENT_BULK_MAX_IN_FLIGHT = int(os.environ.get('DOCUMENT_BULK_MAX_IN_FLIGHT', '32'))
+DOCUMENT_INGEST_IN_FLIGHT_TTL = 60 * 60
+# Chunks and vectors handed between ingestion stages; a shared local volume, or the file storage if unset
+DOCUMENT_ARTIFACT_DIR = os.environ.get('DOCUMENT_ARTIFACT_DIR', '')
+
 # ChromaDB Configuration
 CHROMADB_HOST = os.environ.get('CHROMADB_HOST', 'chroma')
 CHROMADB_PORT = os.environ.get('CHROMADB_PORT', '8000')
 
+# AI Agent Settings
+# Local intent router answers plain tool requests without the tool-selection LLM call
+CHAT_INTENT_ROUTER_ENABLED = os.environ.get('CHAT_INTENT_ROUTER_ENABLED', 'True') == 'True'
+CHAT_INTENT_ROUTER_MIN_CONFIDENCE = float(os.environ.get('CHAT_INTENT_ROUTER_MIN_CONFIDENCE', '0.9'))
+# Speculative document retrieval, run in parallel with the first LLM call
+CHAT_PREFETCH_ENABLED = os.environ.get('CHAT_PREFETCH_ENABLED', 'True') == 'True'
+CHAT_PREFETCH_MAX_WORKERS = int(os.environ.get('CHAT_PREFETCH_MAX_WORKERS', '4'))
+CHAT_PREFETCH_SIMILARITY_THRESHOLD = float(os.environ.get('CHAT_PREFETCH_SIMILARITY_THRESHOLD', '0.8'))
+CHAT_PREFETCH_WAIT_TIMEOUT = float(os.environ.get('CHAT_PREFETCH_WAIT_TIMEOUT', '5.0'))
+
+# Semantic answer cache for document questions (opt-in)
+CHAT_ANSWER_CACHE_ENABLED = os.environ.get('CHAT_ANSWER_CACHE_ENABLED', 'False') == 'True'
+CHAT_ANSWER_CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://redis:6379/1')
+CHAT_ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get('CHAT_ANSWER_CACHE_SIMILARITY_THRESHOLD', '0.92'))
+CHAT_ANSWER_CACHE_TTL = int(os.environ.get('CHAT_ANSWER_CACHE_TTL', str(24 * 60 * 60)))
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('CHAT_ANSWER_CACHE_MAX_ENTRIES', '200'))
+
+# Conversation context assembly (token counts via tiktoken)
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CHAT_CONTEXT_TOKEN_BUDGET', '3000'))
+CHAT_CONTEXT_RECENT_TOKENS = int(os.environ.get('CHAT_CONTEXT_RECENT_TOKENS', '2000'))
+CHAT_CONTEXT_MAX_MESSAGE_TOKENS = int(os.environ.get('CHAT_CONTEXT_MAX_MESSAGE_TOKENS', '1000'))
+CHAT_CONTEXT_MAX_MESSAGES = 50
+CHAT_SUMMARY_MIN_TOKENS = int(os.environ.get('CHAT_SUMMARY_MIN_TOKENS', '500'))
+CHAT_SUMMARY_MAX_WORDS = 250
+CHAT_SUMMARY_MAX_PENDING = 200
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
@@ -0,0 +1,44 @@
+"""
+Test helpers shared by the app test suites.
+"""
+import re
+import unittest
+
+from django.db import connection
+
+# A Sort (or Incremental Sort) node, as opposed to its "Sort Key" detail line
+SORT_NODE = re.compile(r'^\s*(?:->\s*)?(?:Incremental )?Sort\s+\(', re.MULTILINE)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plan checks require PostgreSQL')
+class QueryPlanTestMixin:
+    """
+    Run EXPLAIN on hot queries and fail unless each is served by the index
+    meant for it. Sequential scans are disabled for the test so that a seq
+    scan in the plan means no usable index exists, not that the seeded
+    table is small enough for the planner to prefer one.
+    """
+
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+        super().tearDown()
+
+    def assertUsesIndex(self, queryset, index_name: str):
+        """
+        Assert the query plan for a queryset scans the named index and, for
+        an ordered queryset, reads rows in index order without a Sort node.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Query does not use {index_name}:\n{plan}")
+        self.assertNotIn('Seq Scan', plan, f"Query degraded to a sequential scan:\n{plan}")
+        if queryset.ordered:
+            self.assertIsNone(SORT_NODE.search(plan), f"Query sorts instead of reading {index_name} in order:\n{plan}")
+        return plan
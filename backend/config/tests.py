@@ -0,0 +1,64 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from .db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, note_authenticated_user
+
+User = get_user_model()
+
+
+# Point the replica alias at 'default' so routing decisions are observable
+# without a second server: 'default' means replica, None means primary.
+@override_settings(DB_REPLICA_ALIAS='default')
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """
+    Safe request reads go to the replica; writes, background work and a
+    user's reads right after they wrote stay on the primary.
+    """
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _route_read_during(self, method, user_id=None, status=200):
+        routed = {}
+
+        def view(request):
+            if user_id:
+                note_authenticated_user(user_id)
+            routed['db'] = self.router.db_for_read(User)
+            return HttpResponse(status=status)
+
+        ReplicaRoutingMiddleware(view)(self.factory.generic(method, '/api/tasks/'))
+        return routed['db']
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_safe_request_reads_use_replica(self):
+        self.assertEqual(self._route_read_during('GET'), 'default')
+
+    def test_unsafe_request_reads_use_primary(self):
+        self.assertIsNone(self._route_read_during('POST'))
+
+    def test_writes_use_primary(self):
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_user_reads_own_writes(self):
+        writer, other = str(uuid.uuid4()), str(uuid.uuid4())
+        self._route_read_during('POST', writer)
+
+        self.assertIsNone(self._route_read_during('GET', writer))
+        self.assertEqual(self._route_read_during('GET', other), 'default')
+
+    def test_failed_write_does_not_pin(self):
+        user_id = str(uuid.uuid4())
+        self._route_read_during('POST', user_id, status=400)
+
+        self.assertEqual(self._route_read_during('GET', user_id), 'default')
+
+    @override_settings(DB_REPLICA_ALIAS='replica')
+    def test_no_replica_configured(self):
+        self.assertIsNone(self._route_read_during('GET'))
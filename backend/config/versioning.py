@@ -0,0 +1,153 @@
+"""
+Per-user resource versions and ETag/304 conditional responses.
+Each (resource, user) pair has a version counter in the shared cache that is
+bumped by model signals once each write commits. List and detail responses carry a
+strong ETag derived from that version, so a matching If-None-Match can be
+answered with 304 Not Modified without querying the database.
+
+QuerySet.update(), bulk_create() and bulk_update() send no signals, so writes
+through them must bump the version themselves: use update_tracked, or call
+bump_resource_version after bulk writes.
+"""
+import time
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_VERSION_KEY = 'resource_version:{resource}:{user_id}'
+
+
+def _initial_version() -> int:
+    # Start from the clock so a cache flush never revives an old version
+    return int(time.time() * 1000)
+
+
+def get_resource_version(resource: str, user_id) -> int:
+    """
+    Get the current version of a user's resource, initializing it if missing.
+    """
+    key = RESOURCE_VERSION_KEY.format(resource=resource, user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_resource_version(resource: str, user_id):
+    """
+    Invalidate ETags for a user's resource.
+    """
+    key = RESOURCE_VERSION_KEY.format(resource=resource, user_id=user_id)
+    try:
+        if not cache.add(key, _initial_version(), timeout=None):
+            cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Could not bump {resource} version for user {user_id}: {str(e)}")
+
+
+def update_tracked(queryset, resource: str, owner_field: str, **values) -> int:
+    """
+    QuerySet.update() that also bumps the resource version of every owner of
+    the updated rows, since update() skips the post_save signal.
+
+    Args:
+        queryset: Rows to update
+        resource: Resource name the version belongs to
+        owner_field: Field holding the owning user's id, e.g. 'user_id'
+        values: Field values passed to update()
+
+    Returns:
+        Number of rows updated
+    """
+    owner_ids = set(queryset.order_by().values_list(owner_field, flat=True).distinct())
+    updated = queryset.update(**values)
+    def bump_owners():
+        for owner_id in owner_ids:
+            bump_resource_version(resource, owner_id)
+
+    if updated:
+        # After commit, so a response built from the old rows never gets the new ETag
+        transaction.on_commit(bump_owners)
+    return updated
+
+
+def track_resource_version(model, resource: str, owner_field: str):
+    """
+    Bump a resource's version whenever an instance of model is saved or deleted.
+
+    Args:
+        model: Model class to watch
+        resource: Resource name the version belongs to
+        owner_field: Attribute holding the owning user's id, e.g. 'user_id'
+    """
+    def handler(sender, instance, **kwargs):
+        owner_id = getattr(instance, owner_field)
+        # After commit, like update_tracked, so a read racing the write cannot
+        # cache the old rows under the new version
+        transaction.on_commit(lambda: bump_resource_version(resource, owner_id))
+
+    dispatch_uid = f'resource_version:{resource}:{model._meta.label}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=dispatch_uid + ':save')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=dispatch_uid + ':delete')
+
+
+class ConditionalResponseMixin:
+    """
+    ViewSet mixin adding strong ETags and If-None-Match handling to read actions.
+
+    Set etag_resource to the resource name whose version covers the view's data.
+    """
+    etag_resource = None
+
+    def get_etag(self, request):
+        """
+        Strong ETag for the current request, or None if it is not cacheable.
+        """
+        if self.etag_resource is None or request.method not in ('GET', 'HEAD'):
+            return None
+        try:
+            version = get_resource_version(self.etag_resource, request.user.id)
+        except Exception as e:
+            logger.warning(f"Could not read {self.etag_resource} version: {str(e)}")
+            return None
+        # Path and query string cover the object id, cursor and page size
+        raw = f"{self.etag_resource}:{request.user.id}:{version}:{self.action}:{request.get_full_path()}"
+        return '"' + hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32] + '"'
+
+    @staticmethod
+    def _etag_matches(etag, request) -> bool:
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+        return etag in (tag.strip() for tag in header.split(','))
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        if self._etag_matches(etag, request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Document
+from .models import Document, DocumentBatch, EmbeddingIndex, UploadSession
 
 
 @admin.register(Document)
@@ -9,3 +9,25 @@ class DocumentAdmin(admin.ModelAdmin):
     search_fields = ('title', 'user__email')
     readonly_fields = ('id', 'created_at', 'error_message')
     list_editable = ('status',)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'user', 'received', 'size', 'document', 'updated_at')
+    search_fields = ('filename', 'user__email')
+    readonly_fields = ('id', 'created_at', 'updated_at')
+
+
+@admin.register(DocumentBatch)
+class DocumentBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'total', 'created_at')
+    search_fields = ('user__email',)
+    readonly_fields = ('id', 'created_at')
+
+
+@admin.register(EmbeddingIndex)
+class EmbeddingIndexAdmin(admin.ModelAdmin):
+    list_display = ('tenant', 'model_name', 'target_model_name', 'status', 'chunks_migrated', 'updated_at')
+    list_filter = ('status', 'model_name')
+    search_fields = ('tenant',)
+    readonly_fields = ('migration_started_at', 'migrated_at', 'updated_at')
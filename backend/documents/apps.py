@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documents'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from config.versioning import track_resource_version
+        from .artifacts import delete_document_artifacts
+        from .models import Document
+
+        # Invalidate document list/detail ETags on every write
+        track_resource_version(Document, 'documents', 'user_id')
+        # Ingestion checkpoints outlive failed runs; remove them with the document
+        post_delete.connect(delete_document_artifacts, sender=Document, dispatch_uid='documents:artifacts')
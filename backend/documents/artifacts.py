@@ -0,0 +1,147 @@
+"""
+Intermediate ingestion artifacts.
+Ingestion stages run on separate worker pools, possibly on different hosts,
+so each stage writes its output to storage and records only the key as a
+checkpoint on the Document; retries resume from these. DOCUMENT_ARTIFACT_DIR
+selects a shared local volume; otherwise the default (object) storage is used.
+"""
+import io
+import os
+import gzip
+import json
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import List, Union
+
+import numpy as np
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = 'ingest'
+
+
+def get_artifact_storage():
+    artifact_dir = getattr(settings, 'DOCUMENT_ARTIFACT_DIR', '')
+    if artifact_dir:
+        return FileSystemStorage(location=artifact_dir)
+    return default_storage
+
+
+def artifacts_are_local() -> bool:
+    """
+    Whether artifacts live on a local volume rather than in the file storage.
+    """
+    return bool(getattr(settings, 'DOCUMENT_ARTIFACT_DIR', ''))
+
+
+def get_artifact_name(doc_id: str, name: str) -> str:
+    return f'{ARTIFACT_PREFIX}/{doc_id}/{name}'
+
+
+def save_artifact(doc_id: str, name: str, content: Union[bytes, File]) -> str:
+    """
+    Store a stage's output, replacing the output of an earlier attempt.
+
+    Args:
+        doc_id: Document the artifact belongs to
+        name: Artifact file name, e.g. chunks.json.gz
+        content: Bytes, or a File that is streamed into storage
+
+    Returns:
+        Storage key of the artifact
+    """
+    storage = get_artifact_storage()
+    path = get_artifact_name(doc_id, name)
+    if storage.exists(path):
+        storage.delete(path)
+    if isinstance(content, bytes):
+        content = ContentFile(content)
+    return storage.save(path, content)
+
+
+def read_artifact(key: str) -> bytes:
+    with get_artifact_storage().open(key, 'rb') as artifact:
+        return artifact.read()
+
+
+def save_text(doc_id: str, text: str) -> str:
+    return save_artifact(doc_id, 'text.txt.gz', gzip.compress(text.encode('utf-8')))
+
+
+def load_text(key: str) -> str:
+    return gzip.decompress(read_artifact(key)).decode('utf-8')
+
+
+def save_chunks(doc_id: str, chunks: List[str]) -> str:
+    return save_artifact(doc_id, 'chunks.json.gz', gzip.compress(json.dumps(chunks).encode('utf-8')))
+
+
+def load_chunks(key: str) -> List[str]:
+    return json.loads(gzip.decompress(read_artifact(key)))
+
+
+def save_embeddings(doc_id: str, embeddings: List[List[float]], name: str = 'embeddings.npy') -> str:
+    # float32 is what the vector store keeps, at half the size of float64
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(embeddings, dtype=np.float32))
+    return save_artifact(doc_id, name, buffer.getvalue())
+
+
+def load_embeddings(key: str) -> List[List[float]]:
+    return np.load(io.BytesIO(read_artifact(key))).tolist()
+
+
+@contextmanager
+def local_path(storage, name: str):
+    """
+    Path to a stored file on this host: the file itself for local storage,
+    otherwise a temp copy that is removed afterwards.
+    """
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+
+    _, file_ext = os.path.splitext(os.path.basename(name))
+    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
+        with storage.open(name, 'rb') as source:
+            for data in source.chunks():
+                temp_file.write(data)
+        temp_path = temp_file.name
+    try:
+        yield temp_path
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def delete_artifacts(doc_id: str):
+    """
+    Remove every artifact of a document's ingestion run.
+    """
+    storage = get_artifact_storage()
+    prefix = f'{ARTIFACT_PREFIX}/{doc_id}'
+    try:
+        _, files = storage.listdir(prefix)
+        for name in files:
+            storage.delete(f'{prefix}/{name}')
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not remove ingestion artifacts for document {doc_id}: {str(e)}")
+
+
+def delete_document_artifacts(sender, instance, **kwargs):
+    """
+    post_delete handler: drop the checkpoints of a deleted document.
+    """
+    if instance.checkpoints:
+        delete_artifacts(str(instance.id))
@@ -0,0 +1,149 @@
+"""
+Bulk document imports.
+A batch registers many uploads at once: the Document rows are written with a
+single bulk_create and queued with the scheduler in one Redis round trip, so
+large imports are limited by worker throughput rather than per-file request
+overhead, while still taking their fair share of workers.
+"""
+import os
+import logging
+from typing import Dict, Any, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from config.versioning import bump_resource_version
+from . import direct_upload, resumable
+from .models import Document, DocumentBatch, UploadSession
+from .serializers import validate_upload
+from .scheduling import schedule_documents
+
+logger = logging.getLogger(__name__)
+
+
+class BatchUploadError(Exception):
+    """
+    A batch could not be assembled; nothing from it is kept.
+    """
+
+
+def build_batch_documents(user, files=(), uploads=(), sessions=()) -> Tuple[List[Document], List[UploadSession]]:
+    """
+    Store every upload in a batch and build (unsaved) Documents for them.
+
+    Args:
+        user: Uploading user
+        files: Uploaded files from a multipart request (already validated)
+        uploads: Direct uploads as dicts with upload_id and parts
+        sessions: IDs of fully received resumable upload sessions
+
+    Returns:
+        (unsaved Documents with their files already in storage,
+         resumable sessions linked to their new Document)
+    """
+    documents = []
+    finished_sessions = []
+    try:
+        for uploaded_file in files:
+            document = Document(user=user, title=os.path.splitext(uploaded_file.name)[0])
+            document.file.save(uploaded_file.name, uploaded_file, save=False)
+            documents.append(document)
+
+        for upload in uploads:
+            session = direct_upload.get_upload_session(upload['upload_id'], user)
+            if session is None:
+                raise BatchUploadError(f"Upload {upload['upload_id']} not found or expired")
+            direct_upload.assemble_upload(upload['upload_id'], session, upload['parts'])
+            documents.append(direct_upload.build_document(session))
+
+        upload_sessions = {
+            str(session.id): session
+            for session in UploadSession.objects.filter(id__in=sessions, user=user, document__isnull=True)
+        }
+        for session_id in sessions:
+            session = upload_sessions.get(str(session_id))
+            if session is None:
+                raise BatchUploadError(f"Upload session {session_id} not found")
+            resumable.verify_upload(session)
+            validate_upload(session.filename, session.size)
+            document = Document(user=user, title=session.title or os.path.splitext(session.filename)[0])
+            with resumable.open_upload(session) as upload_file:
+                document.file.save(session.filename, upload_file, save=False)
+            documents.append(document)
+            session.document = document
+            finished_sessions.append(session)
+    except Exception as e:
+        # Do not leave stored files behind for a batch that is not created
+        for document in documents:
+            if document.file:
+                document.file.delete(save=False)
+        if isinstance(e, BatchUploadError):
+            raise
+        raise BatchUploadError(str(e)) from e
+
+    return documents, finished_sessions
+
+
+def create_batch(user, documents: List[Document], finished_sessions=()) -> DocumentBatch:
+    """
+    Save a batch's Documents in one bulk insert and queue their processing.
+
+    Args:
+        user: Owner of the batch
+        documents: Unsaved Documents from build_batch_documents
+        finished_sessions: Resumable sessions those Documents came from
+
+    Returns:
+        The new DocumentBatch
+    """
+    with transaction.atomic():
+        batch = DocumentBatch.objects.create(user=user, total=len(documents))
+        for document in documents:
+            document.batch = batch
+        Document.objects.bulk_create(documents)
+        UploadSession.objects.bulk_update(finished_sessions, ['document'])
+
+    for session in finished_sessions:
+        resumable.discard_upload(session)
+
+    # bulk_create does not send post_save, so list ETags are bumped here
+    bump_resource_version('documents', user.id)
+
+    try:
+        queued = schedule_documents(documents)
+        logger.info(
+            f"Queued batch {batch.id}: {len(queued['fast'])} fast lane, {len(queued['bulk'])} bulk documents"
+        )
+    except Exception as e:
+        logger.error(f"Error queueing batch {batch.id}: {str(e)}")
+        batch.documents.update(status='failed', error_message=f"Failed to start processing: {str(e)}")
+        bump_resource_version('documents', user.id)
+
+    return batch
+
+
+def get_batch_progress(batch: DocumentBatch) -> Dict[str, Any]:
+    """
+    Aggregate progress over a batch's documents in one query.
+    """
+    statuses = [value for value, _ in Document.STATUS_CHOICES]
+    aggregated = batch.documents.aggregate(
+        **{status: Count('id', filter=Q(status=status)) for status in statuses},
+        total_chunks_created=Sum('chunks_created'),
+        total_chunks_embedded=Sum('chunks_embedded'),
+        total_chunks_stored=Sum('chunks_stored'),
+    )
+    counts = {status: aggregated[status] for status in statuses}
+    finished = counts['completed'] + counts['failed']
+    return {
+        'id': str(batch.id),
+        'total': batch.total,
+        'counts': counts,
+        'finished': finished,
+        'done': finished >= batch.total,
+        'percent': round(100 * finished / batch.total) if batch.total else 100,
+        'chunks_created': aggregated['total_chunks_created'] or 0,
+        'chunks_embedded': aggregated['total_chunks_embedded'] or 0,
+        'chunks_stored': aggregated['total_chunks_stored'] or 0,
+        'created_at': batch.created_at.isoformat(),
+    }
@@ -0,0 +1,410 @@
+"""
+Bulk ingestion of local directories and archives (manage.py bulk_ingest).
+Files are extracted, chunked and embedded on a process pool sized to the
+machine, outside the Celery pipeline, while the main process stores the
+uploads and writes vectors to ChromaDB in large batches. A journal file
+records each file's document and state, so an interrupted run resumes with
+the files it had not finished; their chunk IDs are reused, so writes that
+were already made are overwritten rather than duplicated.
+"""
+import os
+import json
+import time
+import signal
+import shutil
+import logging
+import tarfile
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import connections
+from django.utils import timezone
+
+from config.versioning import bump_resource_version
+from .models import Document
+from .serializers import ALLOWED_EXTENSIONS
+from .utils import TextExtractor, TextChunker, get_embedding_generator
+from .errors import PermanentIngestionError, is_retryable
+from .generations import get_chunk_id
+from .chroma_handler import ChromaHandler
+from .embedding_models import get_collection_name, get_tenant_index, activate_generation
+from .scheduling import get_tenant, schedule_document
+from .index_version import bump_index_version
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Files whose document is stored and searchable, or that cannot be ingested; skipped on resume
+FINISHED_STATES = ('done', 'failed')
+
+
+class BulkIngestError(Exception):
+    """
+    The source or target of a bulk ingest is not usable.
+    """
+
+
+def get_target_user(email: Optional[str] = None, workspace_id: Optional[str] = None):
+    """
+    User who will own the ingested documents: the given user, or the
+    workspace's earliest admin (its earliest member if it has no admin).
+    """
+    if email:
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            raise BulkIngestError(f"No user with email {email}")
+        return user
+
+    members = User.objects.filter(workspace_id=workspace_id).order_by('date_joined')
+    user = members.filter(role='admin').first() or members.first()
+    if user is None:
+        raise BulkIngestError(f"Workspace {workspace_id} has no users")
+    return user
+
+
+def unpack_source(source: str, work_dir: str) -> str:
+    """
+    Directory holding the files to ingest: the source itself, or the
+    supported files of a zip or tar archive extracted into work_dir.
+    """
+    if os.path.isdir(source):
+        return source
+    if not os.path.isfile(source):
+        raise BulkIngestError(f"{source} does not exist")
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                if not member.is_dir() and _is_supported(member.filename):
+                    with archive.open(member) as data:
+                        _extract_member(work_dir, member.filename, data)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            for member in archive:
+                if member.isfile() and _is_supported(member.name):
+                    with archive.extractfile(member) as data:
+                        _extract_member(work_dir, member.name, data)
+    else:
+        raise BulkIngestError(f"{source} is not a directory, zip or tar archive")
+    return work_dir
+
+
+def _is_supported(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def _extract_member(work_dir: str, name: str, data):
+    # Archive entries are untrusted: keep them inside work_dir
+    path = os.path.realpath(os.path.join(work_dir, name))
+    if not path.startswith(os.path.realpath(work_dir) + os.sep):
+        logger.warning(f"Skipping archive entry outside the target directory: {name}")
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(data, target)
+
+
+def list_files(root: str) -> List[str]:
+    """
+    Supported files under root, as sorted paths relative to it.
+    """
+    files = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if _is_supported(name):
+                files.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(files)
+
+
+class IngestJournal:
+    """
+    Append-only JSON-lines record of each file's document and state.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest entry per file.
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by the interruption
+                    continue
+                entries[entry['path']] = entry
+        return entries
+
+    def record(self, path: str, doc_id: str, state: str, **extra):
+        with open(self.path, 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps({'path': path, 'doc_id': doc_id, 'state': state, **extra}) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+
+def _init_worker(threads: int):
+    # Only the main process handles Ctrl-C, so it can write what is buffered
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import django
+    django.setup()
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def process_file(path: str, model_name: str) -> Dict[str, Any]:
+    """
+    Worker: extract, chunk and embed one file.
+
+    Returns:
+        Dictionary with pages, chunks and float32 embeddings
+    """
+    pages = [0]
+    text = TextExtractor().extract_text(path, on_page=lambda count: pages.__setitem__(0, count))
+    if not text.strip():
+        raise PermanentIngestionError("No text extracted from document")
+    chunks = TextChunker().chunk_text(text)
+    if not chunks:
+        raise PermanentIngestionError("No chunks created from extracted text")
+    embeddings = get_embedding_generator(model_name).generate_embeddings(chunks)
+    return {'pages': pages[0], 'chunks': chunks, 'embeddings': np.asarray(embeddings, dtype=np.float32)}
+
+
+@dataclass
+class BulkIngestStats:
+    """
+    Running totals of files, pages and chunks stored.
+    """
+    files: int = 0
+    failed: int = 0
+    skipped: int = 0
+    pages: int = 0
+    chunks: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started, 1e-6)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed
+
+
+class BulkIngester:
+    """
+    Ingest every supported file under a directory for one user.
+    """
+
+    def __init__(
+        self,
+        user,
+        root: str,
+        journal: IngestJournal,
+        workers: Optional[int] = None,
+        write_batch: int = 2048,
+        on_progress: Optional[Callable[[BulkIngestStats], None]] = None,
+        report_every: float = 10.0
+    ):
+        """
+        Args:
+            user: Owner of the new documents
+            root: Directory holding the files
+            journal: Journal used to resume an interrupted run
+            workers: Processes for extraction, chunking and embedding (default: one per CPU)
+            write_batch: Chunks per ChromaDB write
+            on_progress: Called with the running totals every report_every seconds and at the end
+            report_every: Seconds between progress reports
+        """
+        cpus = os.cpu_count() or 1
+        self.user = user
+        self.root = root
+        self.journal = journal
+        self.workers = workers or cpus
+        # Split the cores between workers so torch does not oversubscribe them
+        self.threads = max(1, cpus // self.workers)
+        self.write_batch = write_batch
+        self.on_progress = on_progress
+        self.report_every = report_every
+        self.model_name = get_tenant_index(get_tenant(user)).model_name
+        self.collection_name = get_collection_name(self.model_name)
+        self.chroma_handler = ChromaHandler()
+        self.stats = BulkIngestStats()
+        self._last_report = time.monotonic()
+        self._rows = {'texts': [], 'embeddings': [], 'metadatas': [], 'ids': []}
+        self._buffered = []
+
+    def run(self) -> BulkIngestStats:
+        """
+        Ingest the files not finished by an earlier run.
+
+        Returns:
+            Totals for this run
+        """
+        entries = self.journal.load()
+        files = [path for path in list_files(self.root) if entries.get(path, {}).get('state') not in FINISHED_STATES]
+        self.stats.skipped = sum(1 for entry in entries.values() if entry['state'] in FINISHED_STATES)
+        logger.info(f"Bulk ingest of {len(files)} files with {self.workers} workers using {self.model_name}")
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=_init_worker, initargs=(self.threads,)
+        )
+        pending = {}
+        remaining = iter(files)
+        try:
+            while True:
+                # Keep every worker busy without loading the whole source up front
+                while len(pending) < self.workers * 2:
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    document = self._register(path, entries.get(path))
+                    future = pool.submit(process_file, os.path.join(self.root, path), self.model_name)
+                    pending[future] = (path, document)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, document = pending.pop(future)
+                    try:
+                        self._buffer(path, document, future.result())
+                    except Exception as e:
+                        self._fail(path, document, e)
+                if len(self._rows['ids']) >= self.write_batch:
+                    self.flush()
+                self._report()
+        except KeyboardInterrupt:
+            logger.warning("Bulk ingest interrupted; storing finished files before exiting")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.flush()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self.flush()
+        self._report(force=True)
+        return self.stats
+
+    def _register(self, path: str, entry: Optional[Dict[str, Any]]) -> Document:
+        """
+        Document for a file: the one an interrupted run created, or a new one with the file uploaded.
+        """
+        if entry:
+            document = Document.objects.filter(id=entry['doc_id'], user=self.user).first()
+            if document is not None:
+                return document
+
+        document = Document(user=self.user, title=os.path.splitext(os.path.basename(path))[0], status='processing')
+        with open(os.path.join(self.root, path), 'rb') as source:
+            document.file.save(os.path.basename(path), File(source), save=False)
+        document.save()
+        self.journal.record(path, str(document.id), 'started')
+        return document
+
+    def _buffer(self, path: str, document: Document, result: Dict[str, Any]):
+        doc_id = str(document.id)
+        generation = document.index_generation + 1
+        chunks = result['chunks']
+        self._rows['texts'].extend(chunks)
+        self._rows['embeddings'].extend(result['embeddings'].tolist())
+        self._rows['ids'].extend(get_chunk_id(doc_id, generation, i) for i in range(len(chunks)))
+        self._rows['metadatas'].extend(
+            {
+                'user_id': str(self.user.id),
+                'doc_id': doc_id,
+                'chunk_index': i,
+                'document_title': document.title,
+                'generation': generation,
+                'embedding_model': self.model_name
+            }
+            for i in range(len(chunks))
+        )
+        self._buffered.append((path, document, generation, result['pages'], len(chunks)))
+
+    def _fail(self, path: str, document: Document, exc: Exception):
+        retryable = is_retryable(exc)
+        logger.error(f"Error ingesting {path} ({'retryable' if retryable else 'not retryable'}): {str(exc)}")
+        document.status = 'failed'
+        document.error_message = str(exc)
+        document.save(update_fields=['status', 'error_message'])
+        if not retryable:
+            self.journal.record(path, str(document.id), 'failed', error=str(exc))
+        # Otherwise the file stays started, and the next run tries it again
+        self.stats.failed += 1
+
+    def flush(self):
+        """
+        Write buffered vectors to ChromaDB and complete their documents.
+        """
+        if not self._buffered:
+            return
+        rows = self._rows
+        for start in range(0, len(rows['ids']), self.write_batch):
+            end = start + self.write_batch
+            self.chroma_handler.add_documents(
+                collection_name=self.collection_name,
+                texts=rows['texts'][start:end],
+                embeddings=rows['embeddings'][start:end],
+                metadatas=rows['metadatas'][start:end],
+                ids=rows['ids'][start:end],
+                embedding_model=self.model_name
+            )
+
+        completed = []
+        for path, document, generation, pages, chunks in self._buffered:
+            if activate_generation(document, generation, self.model_name):
+                # The workspace was cut over to another model during the run
+                logger.warning(f"Re-indexing {path} through the ingestion pipeline with the new model")
+                document.status = 'pending'
+                document.save(update_fields=['status'])
+                schedule_document(document)
+            else:
+                document.status = 'completed'
+                document.stage = 'done'
+                document.error_message = ''
+                document.pages_extracted = pages
+                document.chunks_created = document.chunks_embedded = document.chunks_stored = chunks
+                document.progress_updated_at = timezone.now()
+                completed.append(document)
+            self.journal.record(path, str(document.id), 'done', chunks=chunks)
+            self.stats.files += 1
+            self.stats.pages += pages
+            self.stats.chunks += chunks
+
+        Document.objects.bulk_update(completed, [
+            'status', 'stage', 'error_message', 'pages_extracted', 'chunks_created',
+            'chunks_embedded', 'chunks_stored', 'progress_updated_at'
+        ])
+        # bulk_update does not send post_save, so list ETags are bumped here
+        bump_resource_version('documents', self.user.id)
+        bump_index_version(str(self.user.id))
+        self._rows = {'texts': [], 'embeddings': [], 'metadatas': [], 'ids': []}
+        self._buffered = []
+
+    def _report(self, force: bool = False):
+        if self.on_progress and (force or time.monotonic() - self._last_report >= self.report_every):
+            self._last_report = time.monotonic()
+            self.on_progress(self.stats)
@@ -2,13 +2,18 @@
 ChromaDB integration for vector storage and retrieval.
 """
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 import chromadb
 from chromadb.config import Settings
 from django.conf import settings
 
+from .generations import filter_active_chunks
+
 logger = logging.getLogger(__name__)
 
+# Most chunks one search reads while skipping inactive generations
+MAX_SEARCH_FETCH = 500
+
 
 class ChromaHandler:
     """
@@ -33,20 +38,24 @@ class ChromaHandler:
             logger.error(f"Error initializing ChromaDB client: {str(e)}")
             raise
     
-    def get_or_create_collection(self, collection_name: str = "documents"):
+    def get_or_create_collection(self, collection_name: str = "documents", embedding_model: Optional[str] = None):
         """
         Get or create a ChromaDB collection.
         
         Args:
             collection_name: Name of the collection
+            embedding_model: Model the collection's vectors come from, recorded in its metadata
             
         Returns:
             ChromaDB collection instance
         """
         try:
+            metadata = {"description": "Document embeddings with user isolation"}
+            if embedding_model:
+                metadata["embedding_model"] = embedding_model
             collection = self.client.get_or_create_collection(
                 name=collection_name,
-                metadata={"description": "Document embeddings with user isolation"}
+                metadata=metadata
             )
             logger.info(f"Collection '{collection_name}' ready")
             return collection
@@ -60,10 +69,12 @@ class ChromaHandler:
         texts: List[str], 
         embeddings: List[List[float]], 
         metadatas: List[Dict[str, Any]],
-        ids: List[str]
+        ids: List[str],
+        embedding_model: Optional[str] = None
     ):
         """
-        Add document chunks with embeddings to ChromaDB.
+        Add document chunks with embeddings to ChromaDB. Chunks whose IDs
+        already exist are overwritten, so retried writes are safe.
         
         Args:
             collection_name: Name of the collection
@@ -71,11 +82,12 @@ class ChromaHandler:
             embeddings: List of embedding vectors
             metadatas: List of metadata dictionaries
             ids: List of unique IDs for each chunk
+            embedding_model: Model the embeddings come from
         """
         try:
-            collection = self.get_or_create_collection(collection_name)
+            collection = self.get_or_create_collection(collection_name, embedding_model)
             
-            collection.add(
+            collection.upsert(
                 embeddings=embeddings,
                 documents=texts,
                 metadatas=metadatas,
@@ -95,7 +107,8 @@ class ChromaHandler:
         n_results: int = 5
     ) -> Dict[str, Any]:
         """
-        Search for similar documents by user.
+        Search for similar documents by user. Only chunks of each
+        document's active index generation are returned.
         
         Args:
             collection_name: Name of the collection
@@ -109,11 +122,20 @@ class ChromaHandler:
         try:
             collection = self.get_or_create_collection(collection_name)
             
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where={"user_id": user_id}
-            )
+            # Over-fetch so chunks of inactive generations can be dropped, and
+            # widen the query while they still crowd out active ones
+            fetch = n_results * 2
+            while True:
+                raw = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=fetch,
+                    where={"user_id": user_id}
+                )
+                results = filter_active_chunks(raw, n_results)
+                exhausted = len(raw['ids'][0]) < fetch
+                if len(results['ids'][0]) >= n_results or exhausted or fetch >= MAX_SEARCH_FETCH:
+                    break
+                fetch = min(fetch * 4, MAX_SEARCH_FETCH)
             
             logger.info(f"Search returned {len(results['documents'][0])} results for user {user_id}")
             return results
@@ -121,6 +143,39 @@ class ChromaHandler:
             logger.error(f"Error searching documents in ChromaDB: {str(e)}")
             raise
     
+    def get_document_chunks(self, collection_name: str, doc_id: str, generation: int) -> Dict[str, List]:
+        """
+        Get the stored text and metadata of one generation of a document's chunks.
+        
+        Args:
+            collection_name: Name of the collection
+            doc_id: Document ID
+            generation: Generation to read
+            
+        Returns:
+            Dictionary with ids, documents and metadatas lists in chunk order
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            chunks = collection.get(where={"doc_id": doc_id}, include=["documents", "metadatas"])
+            # Chunks written before generations existed have no generation field
+            rows = sorted(
+                (
+                    (metadata.get('chunk_index', 0), chunk_id, text, metadata)
+                    for chunk_id, text, metadata in zip(chunks['ids'], chunks['documents'], chunks['metadatas'])
+                    if metadata.get('generation', 0) == generation
+                ),
+                key=lambda row: row[0]
+            )
+            return {
+                'ids': [row[1] for row in rows],
+                'documents': [row[2] for row in rows],
+                'metadatas': [row[3] for row in rows],
+            }
+        except Exception as e:
+            logger.error(f"Error reading document chunks from ChromaDB: {str(e)}")
+            raise
+    
     def delete_user_documents(self, collection_name: str, user_id: str, doc_id: str = None):
         """
         Delete documents for a user or specific document.
@@ -146,4 +201,53 @@ class ChromaHandler:
             logger.info(f"Deleted documents for user {user_id}, doc_id: {doc_id}")
         except Exception as e:
             logger.error(f"Error deleting documents from ChromaDB: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def delete_inactive_generations(self, collection_name: str, doc_id: str, keep: Iterable[int]) -> int:
+        """
+        Delete a document's chunks from every generation not in keep: older
+        generations, and runs that failed or were abandoned.
+        
+        Args:
+            collection_name: Name of the collection
+            doc_id: Document ID
+            keep: Generations to leave alone (the active one, and a run in progress)
+            
+        Returns:
+            Number of chunks deleted
+        """
+        try:
+            keep = set(keep)
+            collection = self.get_or_create_collection(collection_name)
+            chunks = collection.get(where={"doc_id": doc_id}, include=["metadatas"])
+            inactive_ids = [
+                chunk_id for chunk_id, metadata in zip(chunks['ids'], chunks['metadatas'])
+                if metadata.get('generation', 0) not in keep
+            ]
+            if inactive_ids:
+                collection.delete(ids=inactive_ids)
+            
+            logger.info(f"Deleted {len(inactive_ids)} inactive chunks of document {doc_id}")
+            return len(inactive_ids)
+        except Exception as e:
+            logger.error(f"Error deleting inactive chunks from ChromaDB: {str(e)}")
+            raise
+    
+    def delete_document_everywhere(self, doc_id: str):
+        """
+        Delete every chunk of a document from every collection, for documents
+        that no longer exist and so have no tenant to look the collections up by.
+        
+        Args:
+            doc_id: Document ID
+        """
+        try:
+            for collection in self.client.list_collections():
+                # Older clients list Collection objects, newer ones names
+                name = getattr(collection, 'name', collection)
+                self.client.get_collection(name).delete(where={"doc_id": doc_id})
+            
+            logger.info(f"Deleted all chunks of document {doc_id}")
+        except Exception as e:
+            logger.error(f"Error deleting document chunks from ChromaDB: {str(e)}")
+            raise
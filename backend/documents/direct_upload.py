@@ -0,0 +1,204 @@
+"""
+Direct-to-storage multipart uploads.
+The API presigns S3 multipart part URLs, the client PUTs the parts straight
+to the bucket, and a completion call registers the Document. File bytes never
+pass through the web process. Any S3-compatible store (e.g. MinIO) works via
+AWS_S3_ENDPOINT_URL.
+"""
+import math
+import os
+import uuid
+import logging
+from typing import Dict, Any, List, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import get_valid_filename
+
+from .models import Document
+from .serializers import MAX_UPLOAD_SIZE
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SESSION_KEY = 'direct_upload:{upload_id}'
+
+# S3 multipart limits
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+class DirectUploadError(Exception):
+    """
+    A direct upload could not be started, completed or aborted.
+    """
+
+
+def direct_uploads_available() -> bool:
+    """
+    Direct uploads need an S3 bucket to upload into.
+    """
+    return bool(getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None))
+
+
+def get_s3_client(endpoint_url: Optional[str] = None):
+    """
+    Create an S3 client from the storage settings.
+
+    Args:
+        endpoint_url: Override for the endpoint, e.g. the public one used for presigning
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        endpoint_url=endpoint_url or getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+        config=Config(signature_version=settings.AWS_S3_SIGNATURE_VERSION)
+    )
+
+
+def get_part_size(size: int) -> int:
+    part_size = max(getattr(settings, 'DOCUMENT_UPLOAD_PART_SIZE', 8 * 1024 * 1024), MIN_PART_SIZE)
+    return max(part_size, math.ceil(size / MAX_PARTS))
+
+
+def start_upload(user, filename: str, size: int, title: str = '') -> Dict[str, Any]:
+    """
+    Start a multipart upload and presign a URL for every part.
+
+    Args:
+        user: Uploading user
+        filename: Original file name (already validated)
+        size: Declared size in bytes
+        title: Optional document title
+
+    Returns:
+        Dict with upload_id, key, part_size, expires_in and the presigned parts
+    """
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = f"docs/{uuid.uuid4().hex}/{get_valid_filename(os.path.basename(filename))}"
+    expires_in = getattr(settings, 'DOCUMENT_UPLOAD_URL_EXPIRY', 3600)
+
+    try:
+        upload_id = get_s3_client().create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+        presign_client = get_s3_client(getattr(settings, 'AWS_S3_PUBLIC_ENDPOINT_URL', None))
+        part_size = get_part_size(size)
+        parts = [
+            {
+                'part_number': part_number,
+                'url': presign_client.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+                    ExpiresIn=expires_in
+                ),
+            }
+            for part_number in range(1, math.ceil(size / part_size) + 1)
+        ]
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Error starting direct upload for user {user.id}: {str(e)}")
+        raise DirectUploadError("Could not start upload") from e
+
+    cache.set(
+        UPLOAD_SESSION_KEY.format(upload_id=upload_id),
+        {'user_id': str(user.id), 'key': key, 'filename': filename, 'title': title, 'size': size},
+        timeout=expires_in
+    )
+    return {
+        'upload_id': upload_id,
+        'key': key,
+        'part_size': part_size,
+        'expires_in': expires_in,
+        'parts': parts,
+    }
+
+
+def get_upload_session(upload_id: str, user) -> Optional[Dict[str, Any]]:
+    """
+    Get an in-progress upload, only if it belongs to the given user.
+    """
+    session = cache.get(UPLOAD_SESSION_KEY.format(upload_id=upload_id))
+    if session is None or session['user_id'] != str(user.id):
+        return None
+    return session
+
+
+def assemble_upload(upload_id: str, session: Dict[str, Any], parts: List[Dict[str, Any]]):
+    """
+    Complete the multipart upload and check the stored object's size.
+
+    Args:
+        upload_id: Multipart upload ID
+        session: Session from get_upload_session
+        parts: Dicts with part_number and etag for every uploaded part
+    """
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = session['key']
+    client = get_s3_client()
+
+    try:
+        client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': part['part_number'], 'ETag': part['etag']}
+                for part in sorted(parts, key=lambda part: part['part_number'])
+            ]}
+        )
+        size = client.head_object(Bucket=bucket, Key=key)['ContentLength']
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Error completing direct upload {upload_id}: {str(e)}")
+        raise DirectUploadError("Could not complete upload; check that every part was uploaded") from e
+
+    cache.delete(UPLOAD_SESSION_KEY.format(upload_id=upload_id))
+
+    # The declared size was validated up front; make sure the object matches it
+    if size != session['size'] or size > MAX_UPLOAD_SIZE:
+        try:
+            client.delete_object(Bucket=bucket, Key=key)
+        except (BotoCoreError, ClientError) as e:
+            logger.error(f"Error deleting rejected upload {key}: {str(e)}")
+        raise DirectUploadError(f"Uploaded size ({size} bytes) does not match the declared size")
+
+
+def build_document(session: Dict[str, Any]) -> Document:
+    """
+    Unsaved Document for an assembled upload.
+    """
+    return Document(
+        user_id=session['user_id'],
+        file=session['key'],
+        title=session['title'] or os.path.splitext(session['filename'])[0]
+    )
+
+
+def complete_upload(upload_id: str, session: Dict[str, Any], parts: List[Dict[str, Any]]) -> Document:
+    """
+    Assemble the uploaded parts and register the Document.
+
+    Returns:
+        The new Document (status pending)
+    """
+    assemble_upload(upload_id, session, parts)
+    document = build_document(session)
+    document.save()
+    return document
+
+
+def abort_upload(upload_id: str, session: Dict[str, Any]):
+    """
+    Abort an upload and free any parts already stored.
+    """
+    cache.delete(UPLOAD_SESSION_KEY.format(upload_id=upload_id))
+    try:
+        get_s3_client().abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=session['key'],
+            UploadId=upload_id
+        )
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Error aborting direct upload {upload_id}: {str(e)}")
+        raise DirectUploadError("Could not abort upload") from e
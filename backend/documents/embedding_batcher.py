@@ -0,0 +1,224 @@
+"""
+Cross-document embedding batches over a Redis stream.
+Ingestion tasks add their chunks to a shared stream instead of embedding them
+in small per-document batches. A dedicated batcher (manage.py
+run_embedding_batcher) reads chunks from many documents, runs the model at a
+full batch size, and writes each vector back to its document's result hash,
+keyed by chunk index. The submitting task waits only for its own chunks.
+"""
+import time
+import socket
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import redis
+from django.conf import settings
+
+from .utils import get_embedding_generator
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_STREAM = 'embedding:requests'
+EMBEDDING_GROUP = 'embedders'
+EMBEDDING_RESULTS_KEY = 'embedding:results:{doc_id}'
+EMBEDDING_DONE_KEY = 'embedding:done:{doc_id}'
+
+_redis_client = None
+
+
+class EmbeddingBatchError(Exception):
+    """
+    Chunks were not embedded in time or could not be submitted.
+    """
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a process-wide Redis client for the embedding stream.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.DOCUMENT_EMBEDDING_REDIS_URL)
+    return _redis_client
+
+
+def batcher_enabled() -> bool:
+    return getattr(settings, 'DOCUMENT_EMBEDDING_BATCHER', False)
+
+
+def submit_chunks(doc_id: str, chunks: List[str]):
+    """
+    Add a document's chunks to the embedding stream, one entry per chunk,
+    in a single round trip. Chunks already embedded by an earlier attempt
+    under the same ID are not submitted again.
+    """
+    client = get_redis_client()
+    try:
+        embedded = {int(index) for index in client.hkeys(EMBEDDING_RESULTS_KEY.format(doc_id=doc_id))}
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(EMBEDDING_DONE_KEY.format(doc_id=doc_id))
+        for index, text in enumerate(chunks):
+            if index not in embedded:
+                pipe.xadd(EMBEDDING_STREAM, {'doc_id': doc_id, 'index': index, 'text': text})
+        pipe.execute()
+    except redis.RedisError as e:
+        raise EmbeddingBatchError(f"Could not submit chunks for document {doc_id}: {str(e)}") from e
+
+
+def wait_for_embeddings(
+    doc_id: str,
+    count: int,
+    timeout: Optional[float] = None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> List[List[float]]:
+    """
+    Block until all of a document's chunks are embedded.
+
+    Args:
+        doc_id: Document whose chunks were submitted
+        count: Number of chunks submitted
+        timeout: Seconds to wait in total
+        on_progress: Called with the number of chunks embedded so far
+
+    Returns:
+        Vectors in chunk order
+    """
+    client = get_redis_client()
+    results_key = EMBEDDING_RESULTS_KEY.format(doc_id=doc_id)
+    done_key = EMBEDDING_DONE_KEY.format(doc_id=doc_id)
+    if timeout is None:
+        timeout = getattr(settings, 'DOCUMENT_EMBEDDING_WAIT_TIMEOUT', 600)
+    deadline = time.monotonic() + timeout
+
+    embedded = client.hlen(results_key)
+    while embedded < count:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise EmbeddingBatchError(f"Timed out waiting for embeddings: {embedded} of {count} chunks done")
+        # The batcher pushes to the done list after each batch it writes
+        client.blpop(done_key, timeout=max(1, min(5, int(remaining))))
+        embedded = client.hlen(results_key)
+        if on_progress:
+            on_progress(min(embedded, count))
+
+    vectors = client.hgetall(results_key)
+    client.delete(results_key, done_key)
+    return [
+        np.frombuffer(vectors[str(index).encode()], dtype=np.float32).tolist()
+        for index in range(count)
+    ]
+
+
+class EmbeddingBatcher:
+    """
+    Stream consumer that embeds chunks from many documents per model call.
+    """
+
+    def __init__(self, consumer: str = None, batch_size: int = None, max_wait_ms: int = None):
+        """
+        Args:
+            consumer: Consumer name within the group, unique per batcher process
+            batch_size: Chunks per inference batch
+            max_wait_ms: How long to wait to fill a batch before running a partial one
+        """
+        self.client = get_redis_client()
+        self.consumer = consumer or f'{socket.gethostname()}-{id(self)}'
+        self.batch_size = batch_size or getattr(settings, 'DOCUMENT_EMBEDDING_BATCHER_BATCH_SIZE', 256)
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else getattr(
+            settings, 'DOCUMENT_EMBEDDING_BATCHER_MAX_WAIT_MS', 50
+        )
+        self.result_ttl = getattr(settings, 'DOCUMENT_EMBEDDING_RESULT_TTL', 3600)
+        # Tasks only submit chunks for workspaces on the default model
+        self.embedding_generator = get_embedding_generator(settings.DOCUMENT_EMBEDDING_MODEL)
+
+    def ensure_group(self):
+        try:
+            self.client.xgroup_create(EMBEDDING_STREAM, EMBEDDING_GROUP, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def reclaim(self, min_idle_ms: int = 60000) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        """
+        Take over entries left unacknowledged by a batcher that died mid-batch.
+        """
+        _, entries, *_ = self.client.xautoclaim(
+            EMBEDDING_STREAM, EMBEDDING_GROUP, self.consumer,
+            min_idle_time=min_idle_ms, start_id='0-0', count=self.batch_size
+        )
+        return [entry for entry in entries if entry[1]]
+
+    def read_batch(self, block_ms: int = 5000) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        """
+        Block for the first entries, then keep reading for up to max_wait_ms
+        until the batch is full.
+        """
+        entries = []
+        block = block_ms
+        deadline = None
+        while len(entries) < self.batch_size:
+            response = self.client.xreadgroup(
+                EMBEDDING_GROUP, self.consumer, {EMBEDDING_STREAM: '>'},
+                count=self.batch_size - len(entries), block=block
+            )
+            if response:
+                entries.extend(response[0][1])
+            if not entries:
+                return entries
+            if deadline is None:
+                deadline = time.monotonic() + self.max_wait_ms / 1000
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            block = remaining_ms
+        return entries
+
+    def process(self, entries: List[Tuple[bytes, Dict[bytes, bytes]]]) -> int:
+        """
+        Embed one batch and write each vector to its document's result hash.
+
+        Returns:
+            Number of chunks embedded
+        """
+        if not entries:
+            return 0
+        texts = [fields[b'text'].decode('utf-8') for _, fields in entries]
+        vectors = np.asarray(self.embedding_generator.generate_embeddings(texts), dtype=np.float32)
+
+        pipe = self.client.pipeline(transaction=False)
+        doc_ids = set()
+        for (_, fields), vector in zip(entries, vectors):
+            doc_id = fields[b'doc_id'].decode()
+            doc_ids.add(doc_id)
+            pipe.hset(EMBEDDING_RESULTS_KEY.format(doc_id=doc_id), fields[b'index'], vector.tobytes())
+        for doc_id in doc_ids:
+            pipe.expire(EMBEDDING_RESULTS_KEY.format(doc_id=doc_id), self.result_ttl)
+            pipe.rpush(EMBEDDING_DONE_KEY.format(doc_id=doc_id), 1)
+            pipe.expire(EMBEDDING_DONE_KEY.format(doc_id=doc_id), self.result_ttl)
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipe.xack(EMBEDDING_STREAM, EMBEDDING_GROUP, *entry_ids)
+        pipe.xdel(EMBEDDING_STREAM, *entry_ids)
+        pipe.execute()
+        return len(entries)
+
+    def run(self, stop: Callable[[], bool] = lambda: False):
+        """
+        Embed batches until stop() returns True.
+        """
+        self.ensure_group()
+        logger.info(f"Embedding batcher {self.consumer} started (batch size {self.batch_size})")
+        last_reclaim = 0.0
+        while not stop():
+            try:
+                if time.monotonic() - last_reclaim > 30:
+                    last_reclaim = time.monotonic()
+                    self.process(self.reclaim())
+                self.process(self.read_batch())
+            except redis.RedisError as e:
+                logger.error(f"Embedding batcher {self.consumer} lost Redis: {str(e)}")
+                time.sleep(1)
+            except Exception as e:
+                # Unacknowledged entries are reclaimed and retried later
+                logger.error(f"Embedding batcher {self.consumer} failed a batch: {str(e)}")
+                time.sleep(1)
@@ -0,0 +1,202 @@
+"""
+Embedding model versions and per-tenant cut-over.
+Vectors of different models cannot be searched together, so each model has
+its own ChromaDB collection and every chunk records the model that embedded
+it. A tenant's EmbeddingIndex row names the model its searches use. Moving a
+tenant to another model re-embeds its chunks into the new collection in
+throttled background batches (tasks.migrate_tenant_embeddings) while searches
+keep using the old one, then switches the row once every searchable document
+is covered. Tenants without a row use the original model.
+"""
+import re
+import logging
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from config.versioning import update_tracked
+from .models import Document, EmbeddingIndex
+from .scheduling import get_tenant
+from .index_version import bump_index_version
+from .utils import get_embedding_generator
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# The model and collection every chunk was written with before models were versioned
+LEGACY_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+LEGACY_COLLECTION = "documents"
+
+
+def get_default_model() -> str:
+    return getattr(settings, 'DOCUMENT_EMBEDDING_MODEL', LEGACY_EMBEDDING_MODEL)
+
+
+def get_collection_name(model_name: str) -> str:
+    """
+    ChromaDB collection holding the vectors of one embedding model.
+    """
+    if model_name == LEGACY_EMBEDDING_MODEL:
+        return LEGACY_COLLECTION
+    # Collection names are 3-63 characters of [a-zA-Z0-9._-], starting and ending alphanumeric
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', model_name).lower()
+    return f'{LEGACY_COLLECTION}__{slug}'[:63].strip('-')
+
+
+def get_user_tenant(user_id: str) -> str:
+    workspace_id = User.objects.filter(id=user_id).values_list('workspace_id', flat=True).first()
+    return f'workspace:{workspace_id}' if workspace_id else f'user:{user_id}'
+
+
+def get_tenant_documents(tenant: str):
+    kind, tenant_id = tenant.split(':', 1)
+    if kind == 'workspace':
+        return Document.objects.filter(user__workspace_id=tenant_id)
+    return Document.objects.filter(user_id=tenant_id)
+
+
+def get_tenant_user_ids(tenant: str) -> List[str]:
+    kind, tenant_id = tenant.split(':', 1)
+    if kind == 'workspace':
+        return [str(user_id) for user_id in User.objects.filter(workspace_id=tenant_id).values_list('id', flat=True)]
+    return [tenant_id]
+
+
+def get_searchable_documents(tenant: str):
+    # Chunks written before generations existed are generation 0 of completed documents
+    return get_tenant_documents(tenant).filter(Q(index_generation__gt=0) | Q(status='completed'))
+
+
+def get_uncovered_documents(tenant: str):
+    """
+    Searchable documents whose active generation is not yet in the target model's collection.
+    """
+    return get_searchable_documents(tenant).exclude(migrated_generation=F('index_generation'))
+
+
+def get_tenant_index(tenant: str) -> EmbeddingIndex:
+    """
+    Get a tenant's index, creating it on first use: tenants with indexed
+    documents start on the legacy model, new ones on DOCUMENT_EMBEDDING_MODEL.
+    """
+    index = EmbeddingIndex.objects.filter(tenant=tenant).first()
+    if index is not None:
+        return index
+    model_name = LEGACY_EMBEDDING_MODEL if get_searchable_documents(tenant).exists() else get_default_model()
+    index, _ = EmbeddingIndex.objects.get_or_create(tenant=tenant, defaults={'model_name': model_name})
+    return index
+
+
+def get_index_models(tenant: str) -> List[str]:
+    """
+    Models whose collections hold a tenant's chunks: the active one, then a migration target.
+    """
+    index = EmbeddingIndex.objects.filter(tenant=tenant).values('model_name', 'target_model_name').first()
+    if index is None:
+        return [LEGACY_EMBEDDING_MODEL]
+    return [index['model_name']] + ([index['target_model_name']] if index['target_model_name'] else [])
+
+
+def get_search_model(user_id: str) -> str:
+    """
+    Model a user's searches are served from; it only changes at cut-over.
+    """
+    return get_index_models(get_user_tenant(user_id))[0]
+
+
+def embed_query(user_id: str, query: str, model_name: Optional[str] = None) -> List[float]:
+    """
+    Embed a search query with the model of the collection it will be run against.
+    """
+    return get_embedding_generator(model_name or get_search_model(user_id)).generate_embeddings([query])[0]
+
+
+def start_migration(tenant: str, model_name: str) -> EmbeddingIndex:
+    """
+    Start (or resume) moving a tenant to another embedding model. Searches
+    keep using the current model until tasks.migrate_tenant_embeddings
+    cuts the tenant over.
+
+    Args:
+        tenant: Tenant key, see scheduling.get_tenant
+        model_name: HuggingFace model to re-embed with
+
+    Returns:
+        The tenant's index
+    """
+    get_tenant_index(tenant)
+    with transaction.atomic():
+        index = EmbeddingIndex.objects.select_for_update().get(tenant=tenant)
+        if index.model_name == model_name:
+            # Already serving this model; drop any other migration in progress
+            index.target_model_name = ''
+            index.status = 'active'
+        else:
+            if index.target_model_name != model_name:
+                get_tenant_documents(tenant).update(migrated_generation=None)
+                index.chunks_migrated = 0
+                index.migration_started_at = timezone.now()
+            index.target_model_name = model_name
+            index.status = 'migrating'
+        index.error_message = ''
+        index.save()
+    return index
+
+
+def cut_over(tenant: str) -> Optional[str]:
+    """
+    Switch a tenant's searches to the migration target once every
+    searchable document is covered. Runs under the index row lock that
+    activate_generation also takes, so no document can complete in
+    between with vectors of the old model only.
+
+    Returns:
+        The model the tenant moved off, or None if it was not cut over
+    """
+    with transaction.atomic():
+        index = EmbeddingIndex.objects.select_for_update().get(tenant=tenant)
+        if index.status != 'migrating' or get_uncovered_documents(tenant).exists():
+            return None
+        previous = index.model_name
+        index.model_name = index.target_model_name
+        index.target_model_name = ''
+        index.status = 'active'
+        index.migrated_at = timezone.now()
+        index.save()
+
+    # Cached answers were matched with query embeddings of the old model
+    for user_id in get_tenant_user_ids(tenant):
+        bump_index_version(user_id)
+    logger.info(f"Cut {tenant} over from {previous} to {index.model_name}")
+    return previous
+
+
+def activate_generation(document: Document, generation: int, model_name: str) -> Optional[str]:
+    """
+    Make a finished run's generation the one search returns, provided its
+    vectors are from the tenant's active model.
+
+    Args:
+        document: Document whose run finished
+        generation: Generation the run wrote
+        model_name: Model the run's vectors were embedded with
+
+    Returns:
+        None once activated, or the active model if the tenant was cut
+        over during the run and the chunks need vectors from it first
+    """
+    tenant = get_tenant(document.user)
+    get_tenant_index(tenant)
+    with transaction.atomic():
+        index = EmbeddingIndex.objects.select_for_update().get(tenant=tenant)
+        if index.model_name != model_name:
+            return index.model_name
+        # Switch search to the new generation in one row update
+        update_tracked(Document.objects.filter(id=document.id), 'documents', 'user_id', index_generation=generation)
+    document.index_generation = generation
+    return None
@@ -0,0 +1,35 @@
+"""
+Classification of ingestion failures.
+Failures that will happen again on every attempt (unsupported or corrupt
+files, documents without text) fail the document at once; anything else,
+such as storage, broker or ChromaDB outages, is retried from the last
+checkpoint.
+"""
+import zipfile
+
+from docx.opc.exceptions import PackageNotFoundError
+from pypdf.errors import PyPdfError
+
+
+class PermanentIngestionError(Exception):
+    """
+    A failure that retrying cannot fix.
+    """
+
+
+NON_RETRYABLE_ERRORS = (
+    PermanentIngestionError,
+    # Text files that are not UTF-8
+    UnicodeDecodeError,
+    # Corrupt PDF and DOCX files
+    PyPdfError,
+    PackageNotFoundError,
+    zipfile.BadZipFile,
+)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    Whether a failed ingestion stage is worth retrying.
+    """
+    return not isinstance(exc, NON_RETRYABLE_ERRORS)
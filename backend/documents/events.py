@@ -0,0 +1,89 @@
+"""
+Document status events over Redis pub/sub.
+Ingestion publishes status and progress transitions to a per-user channel;
+the Server-Sent Events endpoint fans them out to that user's open sessions.
+"""
+import json
+import logging
+from typing import Dict, Any, Iterator, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EVENTS_CHANNEL = 'document_status:{user_id}'
+
+_redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a process-wide Redis client for document events.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.DOCUMENT_EVENTS_REDIS_URL)
+    return _redis_client
+
+
+def document_status_payload(document, progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build the status payload sent to clients for a document.
+    """
+    return {
+        'id': str(document.id),
+        'title': document.title,
+        'status': document.status,
+        'error_message': document.error_message,
+        'progress': progress if progress is not None else document.get_progress(),
+    }
+
+
+def publish_document_status(document, progress: Optional[Dict[str, Any]] = None):
+    """
+    Publish a document's current status to its owner's channel.
+    Failures are logged and never interrupt processing.
+
+    Args:
+        document: Document instance
+        progress: Optional progress override, defaults to the document's own
+    """
+    channel = DOCUMENT_EVENTS_CHANNEL.format(user_id=document.user_id)
+    try:
+        get_redis_client().publish(channel, json.dumps(document_status_payload(document, progress)))
+    except Exception as e:
+        logger.warning(f"Could not publish status for document {document.id}: {str(e)}")
+
+
+def format_sse(data: Dict[str, Any], event: str = 'status') -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_document_events(user_id, initial_payloads=(), heartbeat_seconds: int = 15) -> Iterator[str]:
+    """
+    Yield Server-Sent Events for a user's document status changes.
+
+    Args:
+        user_id: User whose channel to subscribe to
+        initial_payloads: Status payloads to send right after subscribing
+        heartbeat_seconds: Idle interval between keep-alive comments
+    """
+    pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(DOCUMENT_EVENTS_CHANNEL.format(user_id=user_id))
+    try:
+        # Subscribe first, then send the snapshot, so no transition is missed
+        for payload in initial_payloads:
+            yield format_sse(payload)
+
+        while True:
+            message = pubsub.get_message(timeout=heartbeat_seconds)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            data = message['data']
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            yield f"event: status\ndata: {data}\n\n"
+    finally:
+        pubsub.close()
@@ -0,0 +1,56 @@
+"""
+Index generations for zero-downtime re-indexing.
+Every ingestion run writes its chunks under a new generation number, kept in
+the chunk IDs and metadata. Search only returns chunks of each document's
+active generation (Document.index_generation), so a run in progress is
+invisible and finishing it is a single row update. Every other generation,
+including those of failed runs, is deleted in the background afterwards. Chunks written before generations
+existed count as generation 0.
+"""
+import logging
+from typing import Dict, Any
+
+from .models import Document
+
+logger = logging.getLogger(__name__)
+
+# Fields of a ChromaDB query result that hold one list per query
+RESULT_LIST_FIELDS = ('ids', 'documents', 'metadatas', 'distances', 'embeddings', 'uris', 'data')
+
+
+def get_chunk_id(doc_id: str, generation: int, index: int) -> str:
+    return f"{doc_id}_g{generation}_{index}"
+
+
+def filter_active_chunks(results: Dict[str, Any], n_results: int) -> Dict[str, Any]:
+    """
+    Drop chunks that are not in their document's active generation (or whose
+    document is gone) from a single-query ChromaDB result.
+
+    Args:
+        results: Result of collection.query with one query embedding
+        n_results: Number of chunks to keep
+
+    Returns:
+        The result with only active chunks, at most n_results of them
+    """
+    metadatas = (results.get('metadatas') or [[]])[0]
+    if not metadatas:
+        return results
+
+    doc_ids = {metadata.get('doc_id') for metadata in metadatas}
+    active = {
+        str(doc_id): generation
+        for doc_id, generation in Document.objects.filter(id__in=doc_ids).values_list('id', 'index_generation')
+    }
+    keep = [
+        position for position, metadata in enumerate(metadatas)
+        if active.get(metadata.get('doc_id')) == metadata.get('generation', 0)
+    ][:n_results]
+
+    filtered = dict(results)
+    for field in RESULT_LIST_FIELDS:
+        values = results.get(field)
+        if values is not None and len(values):
+            filtered[field] = [[values[0][position] for position in keep]]
+    return filtered
@@ -0,0 +1,35 @@
+"""
+Knowledge-base index versions.
+A per-user counter bumped whenever the set of indexed chunks that user can
+search changes, so caches derived from search results can be invalidated.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'kb_index_version:{user_id}'
+
+
+def get_index_version(user_id: str) -> int:
+    """
+    Get the current index version for a user's searchable documents.
+    """
+    try:
+        return cache.get(INDEX_VERSION_KEY.format(user_id=user_id), 0)
+    except Exception as e:
+        logger.warning(f"Could not read index version for user {user_id}: {str(e)}")
+        return 0
+
+
+def bump_index_version(user_id: str):
+    """
+    Mark a user's searchable documents as changed.
+    """
+    key = INDEX_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Could not bump index version for user {user_id}: {str(e)}")
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.bulk_ingest import BulkIngestError, BulkIngester, IngestJournal, get_target_user, unpack_source
+
+
+class Command(BaseCommand):
+    help = (
+        'Ingest every PDF, DOCX and TXT file in a directory or zip/tar archive for a user or workspace, '
+        'extracting and embedding on a local process pool; rerun with the same journal to resume'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory, or .zip / .tar(.gz) archive')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', help='Email of the user who will own the documents')
+        target.add_argument('--workspace', help="Workspace ID; documents are owned by the workspace's admin")
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+        parser.add_argument('--write-batch', type=int, default=2048, help='Chunks per vector store write')
+        parser.add_argument(
+            '--journal', default=None,
+            help='Progress journal used to resume (default: <source>.ingest-journal)'
+        )
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options['source'])
+        journal = IngestJournal(options['journal'] or f"{source.rstrip(os.sep)}.ingest-journal")
+        work_dir = tempfile.mkdtemp(prefix='bulk_ingest_')
+        try:
+            user = get_target_user(email=options['user'], workspace_id=options['workspace'])
+            root = unpack_source(source, work_dir)
+            ingester = BulkIngester(
+                user,
+                root,
+                journal,
+                workers=options['workers'],
+                write_batch=options['write_batch'],
+                on_progress=self.report
+            )
+            self.stdout.write(
+                f'Ingesting {source} for {user.email} with {ingester.workers} workers '
+                f'({ingester.model_name}); journal: {journal.path}'
+            )
+            stats = ingester.run()
+        except BulkIngestError as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            raise CommandError(f'Interrupted; rerun with journal {journal.path} to resume')
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ingested {stats.files} files ({stats.skipped} already done, {stats.failed} failed) in '
+            f'{stats.elapsed:.0f}s: {stats.pages} pages ({stats.pages_per_second:.1f}/s), '
+            f'{stats.chunks} chunks ({stats.chunks_per_second:.1f}/s)'
+        ))
+
+    def report(self, stats):
+        self.stdout.write(
+            f'{stats.files} files, {stats.pages} pages ({stats.pages_per_second:.1f}/s), '
+            f'{stats.chunks} chunks ({stats.chunks_per_second:.1f}/s), {stats.failed} failed'
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import Document, EmbeddingIndex
+from documents.embedding_models import (
+    get_default_model, get_index_models, get_searchable_documents, get_uncovered_documents, start_migration
+)
+from documents.tasks import migrate_tenant_embeddings
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-embed indexed documents with another embedding model in the background; '
+        'each workspace keeps searching its current model until it is fully covered'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=None, help='Target model (default: DOCUMENT_EMBEDDING_MODEL)')
+        parser.add_argument(
+            '--tenant', action='append', default=None,
+            help='workspace:<id> or user:<id>; repeat for several (default: every tenant with documents)'
+        )
+        parser.add_argument('--status', action='store_true', help='Only report models and coverage')
+
+    def handle(self, *args, **options):
+        tenants = options['tenant'] or self.get_tenants()
+        if options['status']:
+            for tenant in tenants:
+                self.report(tenant)
+            return
+
+        model_name = options['model'] or get_default_model()
+        started = 0
+        for tenant in tenants:
+            index = start_migration(tenant, model_name)
+            if index.status != 'migrating':
+                self.stdout.write(f'{tenant}: already on {model_name}')
+                continue
+            migrate_tenant_embeddings.delay(tenant)
+            started += 1
+            self.stdout.write(f'{tenant}: re-embedding {index.model_name} -> {model_name}')
+        self.stdout.write(self.style.SUCCESS(f'Started {started} embedding migrations'))
+
+    def get_tenants(self):
+        tenants = {
+            f'workspace:{workspace_id}' if workspace_id else f'user:{user_id}'
+            for user_id, workspace_id in Document.objects.values_list('user_id', 'user__workspace_id').distinct()
+        }
+        tenants.update(EmbeddingIndex.objects.values_list('tenant', flat=True))
+        return sorted(tenants)
+
+    def report(self, tenant):
+        models = get_index_models(tenant)
+        if len(models) == 1:
+            self.stdout.write(f'{tenant}: {models[0]}')
+            return
+        total = get_searchable_documents(tenant).count()
+        covered = total - get_uncovered_documents(tenant).count()
+        index = EmbeddingIndex.objects.get(tenant=tenant)
+        line = (
+            f'{tenant}: {models[0]} -> {models[1]}, {covered}/{total} documents, '
+            f'{index.chunks_migrated} chunks re-embedded'
+        )
+        if index.error_message:
+            line += f' (last error: {index.error_message})'
+        self.stdout.write(line)
@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from documents.embedding_batcher import EmbeddingBatcher
+
+
+class Command(BaseCommand):
+    help = 'Embed chunks from the shared embedding stream in large cross-document batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Chunks per inference batch')
+        parser.add_argument('--max-wait-ms', type=int, default=None, help='Time to fill a partial batch')
+        parser.add_argument('--consumer', default=None, help='Consumer name (unique per process)')
+
+    def handle(self, *args, **options):
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopping.append(True))
+
+        batcher = EmbeddingBatcher(
+            consumer=options['consumer'],
+            batch_size=options['batch_size'],
+            max_wait_ms=options['max_wait_ms']
+        )
+        self.stdout.write(f'Embedding batcher {batcher.consumer} running with batch size {batcher.batch_size}')
+        batcher.run(stop=lambda: bool(stopping))
+        self.stdout.write(self.style.SUCCESS('Embedding batcher stopped'))
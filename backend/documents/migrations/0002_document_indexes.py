@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='doc_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'processing', 'embedding'])), fields=['status', 'created_at'], name='doc_in_progress_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='stage',
+            field=models.CharField(blank=True, help_text='Current ingestion stage', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='stage_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='Seconds spent in each finished stage'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='pages_extracted',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='chunks_created',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='chunks_embedded',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='chunks_stored',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='progress_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_documentbatch'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='documentbatch',
+            name='task_group_id',
+        ),
+    ]
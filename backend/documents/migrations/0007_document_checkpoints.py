@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_remove_documentbatch_task_group_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='checkpoints',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
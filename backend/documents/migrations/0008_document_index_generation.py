@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_document_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='index_generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_document_index_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='migrated_generation',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='EmbeddingIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(help_text='workspace:<id>, or user:<id> without a workspace', max_length=100, unique=True)),
+                ('model_name', models.CharField(help_text='Model whose collection serves searches', max_length=255)),
+                ('target_model_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('migrating', 'Migrating')], default='active', max_length=20)),
+                ('chunks_migrated', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('migration_started_at', models.DateTimeField(blank=True, null=True)),
+                ('migrated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
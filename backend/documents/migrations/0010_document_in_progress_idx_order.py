@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-19 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_embeddingindex'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='document',
+            name='doc_in_progress_idx',
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'processing', 'embedding'])), fields=['created_at'], name='doc_in_progress_idx'),
+        ),
+    ]
@@ -5,6 +5,19 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+class DocumentBatch(models.Model):
+    """
+    A group of documents uploaded together, with aggregated progress.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='document_batches')
+    total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Batch {self.id} ({self.total} documents)"
+
+
 class Document(models.Model):
     """
     Document model for storing uploaded files and their processing status.
@@ -25,9 +38,107 @@ class Document(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     error_message = models.TextField(blank=True, help_text="Error details if processing failed")
+    batch = models.ForeignKey(
+        DocumentBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='documents'
+    )
+    
+    # Index generation whose chunks search returns; see generations.py
+    index_generation = models.PositiveIntegerField(default=0)
+    # Generation already re-embedded for the tenant's embedding model migration; see embedding_models.py
+    migrated_generation = models.PositiveIntegerField(null=True, blank=True)
+    # Stage outputs (artifact keys) of the current run, so retries resume where they failed
+    checkpoints = models.JSONField(default=dict, blank=True)
+    
+    # Ingestion progress, written with update_fields at a throttled cadence
+    stage = models.CharField(max_length=20, blank=True, help_text="Current ingestion stage")
+    stage_started_at = models.DateTimeField(null=True, blank=True)
+    stage_timings = models.JSONField(default=dict, blank=True, help_text="Seconds spent in each finished stage")
+    pages_extracted = models.PositiveIntegerField(default=0)
+    chunks_created = models.PositiveIntegerField(default=0)
+    chunks_embedded = models.PositiveIntegerField(default=0)
+    chunks_stored = models.PositiveIntegerField(default=0)
+    progress_updated_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Document list: filter by user, newest first, (created_at, id) keyset
+            models.Index(fields=['user', '-created_at', '-id'], name='doc_user_created_idx'),
+            # Documents still moving through the ingestion pipeline, oldest first; the
+            # condition selects the rows, so status is left out and no sort is needed
+            models.Index(
+                fields=['created_at'],
+                name='doc_in_progress_idx',
+                condition=models.Q(status__in=['pending', 'processing', 'embedding'])
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.status})"
+    
+    def get_progress(self):
+        """
+        Current ingestion progress as a plain dict.
+        """
+        return {
+            'stage': self.stage,
+            'stage_started_at': self.stage_started_at.isoformat() if self.stage_started_at else None,
+            'stage_timings': self.stage_timings,
+            'pages_extracted': self.pages_extracted,
+            'chunks_created': self.chunks_created,
+            'chunks_embedded': self.chunks_embedded,
+            'chunks_stored': self.chunks_stored,
+            'updated_at': self.progress_updated_at.isoformat() if self.progress_updated_at else None,
+        }
+
+
+class EmbeddingIndex(models.Model):
+    """
+    The embedding model a tenant's searches use and, while the tenant is
+    being moved to another model, the migration's target and progress.
+    """
+    
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('migrating', 'Migrating'),
+    ]
+    
+    tenant = models.CharField(max_length=100, unique=True, help_text="workspace:<id>, or user:<id> without a workspace")
+    model_name = models.CharField(max_length=255, help_text="Model whose collection serves searches")
+    target_model_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    chunks_migrated = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    migration_started_at = models.DateTimeField(null=True, blank=True)
+    migrated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        if self.status == 'migrating':
+            return f"{self.tenant}: {self.model_name} -> {self.target_model_name}"
+        return f"{self.tenant}: {self.model_name}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress.
+    Chunks are appended to a temp file in order; `received` is the next
+    byte offset the client must send.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    title = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField(help_text="Declared total size in bytes")
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Optional expected SHA-256 of the content")
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
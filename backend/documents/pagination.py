@@ -0,0 +1,13 @@
+"""
+Pagination classes for documents API.
+"""
+from config.pagination import KeysetPagination
+
+
+class DocumentKeysetPagination(KeysetPagination):
+    """
+    Newest-first keyset pagination for documents.
+    """
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
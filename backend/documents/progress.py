@@ -0,0 +1,141 @@
+"""
+Ingestion progress tracking with cheap, throttled partial writes.
+Counters are kept on the Document instance and flushed with
+save(update_fields=...) at most once per interval, so a long embed does not
+rewrite the whole row for every batch. Stage changes are always written.
+Stages may run in different tasks; a stage entered elsewhere is timed from
+its stored stage_started_at.
+"""
+import time
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .events import publish_document_status
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_COUNTERS = ('pages_extracted', 'chunks_created', 'chunks_embedded', 'chunks_stored')
+
+
+class IngestionProgress:
+    """
+    Records per-stage counters and timings for a document being ingested.
+    """
+
+    def __init__(self, document, min_interval: float = None):
+        """
+        Args:
+            document: Document instance being processed
+            min_interval: Minimum seconds between counter writes
+        """
+        self.document = document
+        if min_interval is None:
+            min_interval = getattr(settings, 'DOCUMENT_PROGRESS_WRITE_INTERVAL', 2.0)
+        self.min_interval = min_interval
+        self._last_write = None
+        self._stage_clock = None
+        self._dirty = set()
+
+    def start(self, resume: bool = False):
+        """
+        Mark the document as processing, resetting progress from any previous run.
+
+        Args:
+            resume: Keep counters and timings, for a run resuming from checkpoints
+        """
+        if not resume:
+            for name in PROGRESS_COUNTERS:
+                setattr(self.document, name, 0)
+            self.document.stage_timings = {}
+            self._dirty.update(PROGRESS_COUNTERS + ('stage_timings',))
+        self.document.stage = ''
+        self.document.status = 'processing'
+        self.document.error_message = ''
+        self._dirty.update(('stage', 'status', 'error_message'))
+
+    def start_stage(self, stage: str, status: str = None):
+        """
+        Finish the current stage's timing and enter a new stage.
+
+        Args:
+            stage: Name of the stage being entered
+            status: Optional new document status
+        """
+        self._finish_stage()
+        self.document.stage = stage
+        self.document.stage_started_at = timezone.now()
+        self._stage_clock = time.monotonic()
+        self._dirty.update(('stage', 'stage_started_at'))
+        if status:
+            self.document.status = status
+            self._dirty.add('status')
+        self.flush(force=True)
+
+    def update(self, **counters):
+        """
+        Set progress counters; written only if the throttle interval has passed.
+
+        Args:
+            counters: Counter name -> value, e.g. chunks_embedded=128
+        """
+        for name, value in counters.items():
+            if name not in PROGRESS_COUNTERS:
+                raise ValueError(f"Unknown progress counter: {name}")
+            setattr(self.document, name, value)
+            self._dirty.add(name)
+        self.flush()
+
+    def set_error(self, error_message: str):
+        """
+        Record an error without ending the run, e.g. before a retry.
+        """
+        self.document.error_message = error_message
+        self._dirty.add('error_message')
+        self.flush(force=True)
+
+    def finish(self, status: str, error_message: str = ''):
+        """
+        Close the last stage and write the final status.
+        """
+        self._finish_stage()
+        self.document.stage = 'done' if status == 'completed' else status
+        self.document.status = status
+        self.document.error_message = error_message
+        self._dirty.update(('stage', 'status', 'error_message'))
+        self.flush(force=True)
+
+    def flush(self, force: bool = False):
+        """
+        Write changed progress fields and publish them to listening clients.
+
+        Args:
+            force: Write even if the throttle interval has not passed
+        """
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and self._last_write is not None and now - self._last_write < self.min_interval:
+            return
+
+        self.document.progress_updated_at = timezone.now()
+        self._dirty.add('progress_updated_at')
+        self.document.save(update_fields=sorted(self._dirty))
+        self._dirty.clear()
+        self._last_write = now
+        publish_document_status(self.document)
+
+    def _finish_stage(self):
+        if self.document.stage in ('', 'done', 'failed'):
+            return
+        if self._stage_clock is not None:
+            elapsed = round(time.monotonic() - self._stage_clock, 3)
+        elif self.document.stage_started_at and self.document.stage not in self.document.stage_timings:
+            # Stage was entered by an earlier task in the chain
+            elapsed = round((timezone.now() - self.document.stage_started_at).total_seconds(), 3)
+        else:
+            return
+        self.document.stage_timings = {**self.document.stage_timings, self.document.stage: elapsed}
+        self._dirty.add('stage_timings')
+        self._stage_clock = None
@@ -0,0 +1,177 @@
+"""
+Resumable chunked uploads.
+A client creates an upload session, PATCHes consecutive byte ranges, and
+finalizes. Each chunk is streamed from the request into a temp file, so no
+step holds the whole file in memory; after a dropped connection the client
+asks for the session's offset and continues from there.
+"""
+import os
+import re
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# Bytes read from the request (and from disk) per iteration
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ResumableUploadError(Exception):
+    """
+    A chunk or finalize request was rejected; carries the HTTP status to return.
+    """
+
+    def __init__(self, message: str, status_code: int = 400, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def get_upload_dir() -> str:
+    upload_dir = getattr(settings, 'DOCUMENT_UPLOAD_TMP_DIR', os.path.join(settings.MEDIA_ROOT, 'upload_sessions'))
+    os.makedirs(upload_dir, exist_ok=True)
+    return upload_dir
+
+
+def get_upload_path(session: UploadSession) -> str:
+    return os.path.join(get_upload_dir(), f'{session.id}.part')
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """
+    Parse a `Content-Range: bytes start-end/total` header.
+
+    Returns:
+        (start, end exclusive, total)
+    """
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise ResumableUploadError("Content-Range must look like 'bytes <start>-<end>/<total>'")
+    start, last, total = (int(value) for value in match.groups())
+    if last < start:
+        raise ResumableUploadError("Content-Range end is before its start")
+    return start, last + 1, total
+
+
+def append_chunk(session_id, user, content_range: Optional[str], stream) -> UploadSession:
+    """
+    Append one byte range to an upload session.
+
+    Args:
+        session_id: UploadSession ID
+        user: Owner of the session
+        content_range: The request's Content-Range header
+        stream: Readable request body
+
+    Returns:
+        The updated session
+    """
+    start, end, total = parse_content_range(content_range)
+
+    with transaction.atomic():
+        # Row lock serializes concurrent chunks for the same session
+        session = UploadSession.objects.select_for_update().filter(
+            id=session_id, user=user, document__isnull=True
+        ).first()
+        if session is None:
+            raise ResumableUploadError("Upload session not found", status_code=404)
+        if total != session.size:
+            raise ResumableUploadError(f"Content-Range total must be {session.size}")
+        if start != session.received:
+            raise ResumableUploadError(
+                f"Expected a chunk starting at byte {session.received}",
+                status_code=409,
+                offset=session.received
+            )
+        if end > session.size:
+            raise ResumableUploadError("Chunk extends past the declared size")
+
+        path = get_upload_path(session)
+        expected = end - start
+        written = 0
+        with open(path, 'ab') as part_file:
+            # Drop bytes left by an earlier chunk that failed part-way through
+            part_file.truncate(session.received)
+            while written < expected:
+                data = stream.read(min(STREAM_CHUNK_SIZE, expected - written)) if stream else b''
+                if not data:
+                    break
+                part_file.write(data)
+                written += len(data)
+
+        if written != expected:
+            raise ResumableUploadError(
+                f"Received {written} bytes for a {expected} byte range",
+                offset=session.received
+            )
+
+        session.received = end
+        session.save(update_fields=['received', 'updated_at'])
+    return session
+
+
+def hash_upload(session: UploadSession) -> Tuple[str, int]:
+    """
+    Stream the assembled upload once to compute its SHA-256 and size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(get_upload_path(session), 'rb') as part_file:
+        for data in iter(lambda: part_file.read(STREAM_CHUNK_SIZE), b''):
+            digest.update(data)
+            size += len(data)
+    return digest.hexdigest(), size
+
+
+def verify_upload(session: UploadSession) -> str:
+    """
+    Check that a session received all of its bytes and that they match the
+    declared size and checksum. Unusable content is discarded and the
+    session reset, so the client starts over.
+
+    Returns:
+        SHA-256 hex digest of the content
+    """
+    if session.received != session.size:
+        raise ResumableUploadError(
+            f"Upload incomplete: {session.received} of {session.size} bytes received",
+            status_code=409,
+            offset=session.received
+        )
+
+    content_hash, size = hash_upload(session)
+    if size != session.size or (session.sha256 and content_hash != session.sha256.lower()):
+        discard_upload(session)
+        session.received = 0
+        session.save(update_fields=['received', 'updated_at'])
+        raise ResumableUploadError("Uploaded content does not match the declared size or checksum", offset=0)
+    return content_hash
+
+
+def open_upload(session: UploadSession) -> File:
+    """
+    Open the assembled upload as a File named after the original file, so the
+    document serializer can validate it and storage can stream it.
+    """
+    return File(open(get_upload_path(session), 'rb'), name=session.filename)
+
+
+def discard_upload(session: UploadSession):
+    """
+    Remove a session's temp file.
+    """
+    try:
+        os.remove(get_upload_path(session))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove upload file for session {session.id}: {str(e)}")
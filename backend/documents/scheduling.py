@@ -0,0 +1,215 @@
+"""
+Size-aware, fair dispatch of document ingestion.
+Small documents go to a fast lane that runs the whole chain on its own
+queue; larger ones use the per-stage bulk queues. Within each lane documents
+wait in per-tenant Redis lists and are started round-robin across tenants,
+with a cap on in-flight documents per tenant and per lane, so one large
+import cannot starve other users. A tenant is the user's workspace, or the
+user when they have none.
+"""
+import time
+import logging
+from typing import Dict, Any, Iterable, List, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FAST_LANE = 'fast'
+BULK_LANE = 'bulk'
+LANES = (FAST_LANE, BULK_LANE)
+
+PENDING_KEY = 'ingest:pending:{lane}:{tenant}'
+RING_KEY = 'ingest:ring:{lane}'
+RING_MEMBERS_KEY = 'ingest:ring_members:{lane}'
+IN_FLIGHT_KEY = 'ingest:in_flight:{lane}'
+TENANT_IN_FLIGHT_KEY = 'ingest:in_flight:{lane}:{tenant}'
+OWNERS_KEY = 'ingest:owners'
+DISPATCH_LOCK_KEY = 'ingest:dispatch_lock'
+
+_redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a process-wide Redis client for the ingestion scheduler.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.DOCUMENT_SCHEDULER_REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+def get_lane_settings(lane: str) -> Dict[str, Any]:
+    if lane == FAST_LANE:
+        return {
+            'queue': 'ingest_fast',
+            'tenant_concurrency': getattr(settings, 'DOCUMENT_FAST_LANE_TENANT_CONCURRENCY', 4),
+            'max_in_flight': getattr(settings, 'DOCUMENT_FAST_LANE_MAX_IN_FLIGHT', 16),
+        }
+    return {
+        # None keeps the per-stage routes from CELERY_TASK_ROUTES
+        'queue': None,
+        'tenant_concurrency': getattr(settings, 'DOCUMENT_BULK_TENANT_CONCURRENCY', 4),
+        'max_in_flight': getattr(settings, 'DOCUMENT_BULK_MAX_IN_FLIGHT', 32),
+    }
+
+
+def get_tenant(user) -> str:
+    return f'workspace:{user.workspace_id}' if getattr(user, 'workspace_id', None) else f'user:{user.id}'
+
+
+def get_document_size(document) -> Optional[int]:
+    try:
+        return document.file.size
+    except Exception as e:
+        logger.warning(f"Could not read size of document {document.id}: {str(e)}")
+        return None
+
+
+def choose_lane(size: Optional[int]) -> str:
+    """
+    Fast lane for documents up to DOCUMENT_FAST_LANE_MAX_BYTES; unknown sizes go bulk.
+    """
+    max_bytes = getattr(settings, 'DOCUMENT_FAST_LANE_MAX_BYTES', 1024 * 1024)
+    return FAST_LANE if size is not None and size <= max_bytes else BULK_LANE
+
+
+def schedule_documents(documents: Iterable) -> Dict[str, List[str]]:
+    """
+    Queue documents for ingestion and start as many as the caps allow.
+
+    Args:
+        documents: Saved Documents (with their user loaded)
+
+    Returns:
+        Lane -> IDs of the documents queued in it
+    """
+    client = get_redis_client()
+    queued = {lane: [] for lane in LANES}
+    pipe = client.pipeline(transaction=False)
+    for document in documents:
+        lane = choose_lane(get_document_size(document))
+        tenant = get_tenant(document.user)
+        doc_id = str(document.id)
+        pipe.rpush(PENDING_KEY.format(lane=lane, tenant=tenant), doc_id)
+        pipe.hset(OWNERS_KEY, doc_id, f'{lane}|{tenant}')
+        queued[lane].append((tenant, doc_id))
+    pipe.execute()
+
+    for lane, entries in queued.items():
+        for tenant in dict.fromkeys(tenant for tenant, _ in entries):
+            _join_ring(client, lane, tenant)
+
+    dispatch_pending()
+    return {lane: [doc_id for _, doc_id in entries] for lane, entries in queued.items()}
+
+
+def schedule_document(document) -> str:
+    """
+    Queue one document for ingestion.
+
+    Returns:
+        The lane it was queued in
+    """
+    queued = schedule_documents([document])
+    return FAST_LANE if queued[FAST_LANE] else BULK_LANE
+
+
+def release_document(doc_id: str):
+    """
+    Free a document's in-flight slot once ingestion finished or gave up,
+    and start the next waiting document.
+    """
+    client = get_redis_client()
+    owner = client.hget(OWNERS_KEY, doc_id)
+    if owner is None:
+        return
+    lane, tenant = owner.split('|', 1)
+    pipe = client.pipeline(transaction=False)
+    pipe.zrem(IN_FLIGHT_KEY.format(lane=lane), doc_id)
+    pipe.zrem(TENANT_IN_FLIGHT_KEY.format(lane=lane, tenant=tenant), doc_id)
+    pipe.hdel(OWNERS_KEY, doc_id)
+    pipe.execute()
+    dispatch_pending()
+
+
+def dispatch_pending():
+    """
+    Start waiting documents round-robin across tenants until a lane or
+    every waiting tenant is at its cap.
+    """
+    client = get_redis_client()
+    lock = client.lock(DISPATCH_LOCK_KEY, timeout=30, blocking_timeout=10)
+    if not lock.acquire():
+        logger.warning("Ingestion dispatch lock busy; leaving documents queued")
+        return
+    try:
+        for lane in LANES:
+            _dispatch_lane(client, lane)
+    finally:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            pass
+
+
+def _join_ring(client, lane: str, tenant: str):
+    if client.sadd(RING_MEMBERS_KEY.format(lane=lane), tenant):
+        client.rpush(RING_KEY.format(lane=lane), tenant)
+
+
+def _in_flight(client, key: str) -> int:
+    # Slots held past the TTL belong to runs that never reported back
+    ttl = getattr(settings, 'DOCUMENT_INGEST_IN_FLIGHT_TTL', 3600)
+    client.zremrangebyscore(key, '-inf', time.time() - ttl)
+    return client.zcard(key)
+
+
+def _dispatch_lane(client, lane: str):
+    from .tasks import ingestion_pipeline
+
+    lane_settings = get_lane_settings(lane)
+    ring_key = RING_KEY.format(lane=lane)
+    lane_key = IN_FLIGHT_KEY.format(lane=lane)
+
+    ring_size = client.llen(ring_key)
+    idle = 0
+    while ring_size and idle < ring_size:
+        if _in_flight(client, lane_key) >= lane_settings['max_in_flight']:
+            return
+
+        # Rotate the ring, so the next dispatch carries on with the next tenant
+        tenant = client.lmove(ring_key, ring_key, 'LEFT', 'RIGHT')
+        if tenant is None:
+            return
+        tenant_key = TENANT_IN_FLIGHT_KEY.format(lane=lane, tenant=tenant)
+        if _in_flight(client, tenant_key) >= lane_settings['tenant_concurrency']:
+            idle += 1
+            continue
+
+        pending_key = PENDING_KEY.format(lane=lane, tenant=tenant)
+        doc_id = client.lpop(pending_key)
+        if doc_id is None:
+            client.lrem(ring_key, 0, tenant)
+            client.srem(RING_MEMBERS_KEY.format(lane=lane), tenant)
+            # Rejoin if a document was queued while the tenant was being removed
+            if client.llen(pending_key):
+                _join_ring(client, lane, tenant)
+            ring_size = client.llen(ring_key)
+            continue
+
+        now = time.time()
+        client.zadd(lane_key, {doc_id: now})
+        client.zadd(tenant_key, {doc_id: now})
+        try:
+            ingestion_pipeline(doc_id, queue=lane_settings['queue']).apply_async()
+            logger.info(f"Dispatched document {doc_id} for {tenant} on the {lane} lane")
+        except Exception as e:
+            logger.error(f"Error dispatching document {doc_id}: {str(e)}")
+            client.lpush(pending_key, doc_id)
+            client.zrem(lane_key, doc_id)
+            client.zrem(tenant_key, doc_id)
+            raise
+        idle = 0
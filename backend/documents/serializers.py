@@ -2,8 +2,34 @@
 Serializers for document processing API.
 """
 import os
+from django.conf import settings
 from rest_framework import serializers
-from .models import Document
+
+from config.fastread import ValuesRowMapper
+from .models import Document, UploadSession
+
+
+ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.txt']
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB in bytes
+
+
+def validate_upload(name: str, size: int):
+    """
+    Check an upload's file type and size.
+    
+    Raises:
+        serializers.ValidationError: If the file is not allowed
+    """
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise serializers.ValidationError(
+            f"Unsupported file type '{ext}'. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    
+    if size > MAX_UPLOAD_SIZE:
+        raise serializers.ValidationError(
+            f"File size ({size} bytes) exceeds maximum allowed size (50MB)"
+        )
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -20,22 +46,7 @@ class DocumentSerializer(serializers.ModelSerializer):
         """
         Validate file type and size.
         """
-        # Check file extension
-        allowed_extensions = ['.pdf', '.docx', '.txt']
-        ext = os.path.splitext(value.name)[1].lower()
-        
-        if ext not in allowed_extensions:
-            raise serializers.ValidationError(
-                f"Unsupported file type '{ext}'. Allowed types: {', '.join(allowed_extensions)}"
-            )
-        
-        # Check file size (max 50MB)
-        max_size = 50 * 1024 * 1024  # 50MB in bytes
-        if value.size > max_size:
-            raise serializers.ValidationError(
-                f"File size ({value.size} bytes) exceeds maximum allowed size (50MB)"
-            )
-        
+        validate_upload(value.name, value.size)
         return value
     
     def create(self, validated_data):
@@ -60,4 +71,104 @@ class DocumentListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Document
-        fields = ['id', 'title', 'status', 'created_at']
\ No newline at end of file
+        fields = ['id', 'title', 'status', 'created_at']
+
+
+# values() read path producing DocumentListSerializer output
+document_list_rows = ValuesRowMapper(DocumentListSerializer)
+
+
+class DocumentProgressSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a document's ingestion progress.
+    """
+    
+    class Meta:
+        model = Document
+        fields = [
+            'id', 'status', 'stage', 'stage_started_at', 'stage_timings',
+            'pages_extracted', 'chunks_created', 'chunks_embedded', 'chunks_stored',
+            'progress_updated_at', 'error_message'
+        ]
+        read_only_fields = fields
+
+
+class DirectUploadCreateSerializer(serializers.Serializer):
+    """
+    Request to start a direct-to-storage multipart upload.
+    """
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        validate_upload(attrs['filename'], attrs['size'])
+        return attrs
+
+
+class UploadedPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField(max_length=255)
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    """
+    Parts reported by the client once every part has been uploaded.
+    """
+    parts = UploadedPartSerializer(many=True, allow_empty=False)
+
+
+class ResumableUploadCreateSerializer(DirectUploadCreateSerializer):
+    """
+    Request to start a resumable upload session.
+    """
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+    
+    def create(self, validated_data):
+        return UploadSession.objects.create(user=self.context['request'].user, **validated_data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a resumable upload session; `offset` is the next byte to send.
+    """
+    offset = serializers.IntegerField(source='received', read_only=True)
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'title', 'size', 'offset', 'document', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class DirectUploadReferenceSerializer(DirectUploadCompleteSerializer):
+    upload_id = serializers.CharField(max_length=1024)
+
+
+class DocumentBatchCreateSerializer(serializers.Serializer):
+    """
+    Request to import many documents at once. Any mix of multipart `files`,
+    completed direct `uploads` and fully received resumable `sessions`.
+    """
+    files = serializers.ListField(child=serializers.FileField(), required=False)
+    uploads = DirectUploadReferenceSerializer(many=True, required=False)
+    sessions = serializers.ListField(child=serializers.UUIDField(), required=False)
+    
+    def validate_files(self, value):
+        errors = {}
+        for uploaded_file in value:
+            try:
+                validate_upload(uploaded_file.name, uploaded_file.size)
+            except serializers.ValidationError as e:
+                errors[uploaded_file.name] = e.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+    
+    def validate(self, attrs):
+        count = sum(len(attrs.get(field, [])) for field in ('files', 'uploads', 'sessions'))
+        max_files = getattr(settings, 'DOCUMENT_BATCH_MAX_FILES', 100)
+        if count == 0:
+            raise serializers.ValidationError("A batch needs at least one file")
+        if count > max_files:
+            raise serializers.ValidationError(f"At most {max_files} files per batch")
+        return attrs
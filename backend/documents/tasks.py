@@ -2,132 +2,514 @@
 Celery tasks for asynchronous document processing.
 """
 import os
-import logging
-import tempfile
 import uuid
-from typing import List
+import logging
+from typing import Optional
 
-from celery import shared_task
+from celery import chain, shared_task
 from django.conf import settings
-from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
 
-from .models import Document
-from .utils import TextExtractor, TextChunker, EmbeddingGenerator
+from .models import Document, EmbeddingIndex, UploadSession
+from .utils import TextExtractor, TextChunker, get_embedding_generator
+from .artifacts import (
+    artifacts_are_local, get_artifact_storage, local_path, save_artifact,
+    save_text, load_text, save_chunks, load_chunks, save_embeddings, load_embeddings, delete_artifacts
+)
+from .errors import PermanentIngestionError, is_retryable
+from .generations import get_chunk_id
+from .embedding_models import (
+    LEGACY_EMBEDDING_MODEL, get_collection_name, get_default_model, get_tenant_index, get_index_models,
+    get_tenant_user_ids, get_uncovered_documents, activate_generation, cut_over
+)
 from .chroma_handler import ChromaHandler
+from . import embedding_batcher
+from .scheduling import get_tenant, release_document, dispatch_pending
+from .index_version import bump_index_version
+from .progress import IngestionProgress
+from .resumable import discard_upload
 
 logger = logging.getLogger(__name__)
 
 
+# Retries per stage before the document is left failed
+STAGE_MAX_RETRIES = 3
+
+# Statuses of a document whose ingestion run may still write chunks
+IN_FLIGHT_STATUSES = ('pending', 'processing', 'embedding')
+
+
+def ingestion_pipeline(doc_id: str, queue: Optional[str] = None):
+    """
+    Ingestion as a chain of stage tasks. Each stage is routed to its own
+    queue (CELERY_TASK_ROUTES), records its output as a checkpoint on the
+    document, and passes the document ID on. A stage whose checkpoint
+    already exists is skipped, so a rerun resumes where the last one failed.
+    
+    Args:
+        doc_id: UUID string of the document to process
+        queue: Run every stage on this queue instead, e.g. the fast lane
+    """
+    stages = [
+        download_document.si(doc_id),
+        extract_document_text.s(),
+        embed_document_chunks.s(),
+        store_document_embeddings.s(),
+    ]
+    if queue:
+        stages = [stage.set(queue=queue) for stage in stages]
+    return chain(*stages)
+
+
 @shared_task(bind=True)
 def process_uploaded_document(self, doc_id: str):
     """
-    Main task to process an uploaded document.
+    Process a document right away on the bulk queues, bypassing the
+    scheduler; replaced by the stage chain. Uploads go through
+    scheduling.schedule_document instead.
     
     Args:
         doc_id: UUID string of the document to process
     """
+    return self.replace(ingestion_pipeline(doc_id))
+
+
+def _get_document(doc_id: str) -> Document:
     try:
-        # Fetch document
-        document = Document.objects.get(id=doc_id)
-        logger.info(f"Starting processing for document {doc_id}: {document.title}")
-        
-        # Update status to processing
-        document.status = 'processing'
-        document.save()
+        return Document.objects.select_related('user').get(id=doc_id)
+    except Document.DoesNotExist:
+        error_msg = f"Document with ID {doc_id} not found"
+        logger.error(error_msg)
+        _release(doc_id)
+        # Deleted mid-ingestion; remove whatever the run already stored
+        schedule_generation_cleanup(doc_id)
+        raise Exception(error_msg)
+
+
+def _release(doc_id: str):
+    """Hand the document's scheduler slot to the next waiting document."""
+    try:
+        release_document(doc_id)
+    except Exception as e:
+        logger.warning(f"Could not release scheduler slot for document {doc_id}: {str(e)}")
+
+
+def _save_checkpoint(document: Document, *remove: str, **values):
+    """Record stage output on the document so a retry can pick it up."""
+    checkpoints = {**document.checkpoints, **values}
+    for name in remove:
+        checkpoints.pop(name, None)
+    document.checkpoints = checkpoints
+    document.save(update_fields=['checkpoints'])
+
+
+def _stage_failed(task, doc_id: str, progress: Optional[IngestionProgress], exc: Exception):
+    """
+    Retry the stage from the document's checkpoints, or fail the document
+    at once if the error is not retryable or retries have run out.
+    Checkpoints are kept either way, so reprocessing resumes too.
+    """
+    retryable = is_retryable(exc)
+    logger.error(
+        f"Error in {task.name} for document {doc_id} "
+        f"({'retryable' if retryable else 'not retryable'}): {str(exc)}"
+    )
+    
+    try:
+        if progress is None:
+            progress = IngestionProgress(Document.objects.get(id=doc_id))
+    except Document.DoesNotExist:
+        progress = None
+    
+    if not retryable or task.request.retries >= STAGE_MAX_RETRIES:
+        if progress is not None:
+            progress.finish('failed', error_message=str(exc))
+        _release(doc_id)
+        # Chunks the run already stored would otherwise never be collected
+        schedule_generation_cleanup(doc_id)
+        raise exc
+    
+    if progress is not None:
+        progress.set_error(f"Retrying after error: {str(exc)}")
+    # Back off 1, 2, 4 minutes
+    raise task.retry(exc=exc, countdown=60 * 2 ** task.request.retries, max_retries=STAGE_MAX_RETRIES)
+
+
+@shared_task(bind=True)
+def download_document(self, doc_id: str) -> str:
+    """
+    IO stage: start (or resume) progress and, when artifacts live on a local
+    volume, copy the upload there so extraction does not wait on object storage.
+    """
+    document = _get_document(doc_id)
+    progress = None
+    try:
+        checkpoints = document.checkpoints
+        progress = IngestionProgress(document)
+        if checkpoints:
+            logger.info(f"Resuming document {doc_id} after checkpoints: {', '.join(sorted(checkpoints))}")
+            progress.start(resume=True)
+        else:
+            logger.info(f"Starting processing for document {doc_id}: {document.title}")
+            progress.start()
+        progress.start_stage('download', status='processing')
+        if 'generation' not in checkpoints:
+            # The run's chunks stay invisible to search until it completes
+            _save_checkpoint(document, generation=document.index_generation + 1)
         
-        # Download file from storage to local temp file
-        # Extract just the filename extension to avoid path issues with tempfile
-        file_basename = os.path.basename(document.file.name)
-        _, file_ext = os.path.splitext(file_basename)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-            # Copy file content
+        if artifacts_are_local() and not ({'source', 'text', 'chunks'} & set(checkpoints)):
+            _, file_ext = os.path.splitext(os.path.basename(document.file.name))
             with document.file.open('rb') as source:
-                temp_file.write(source.read())
-            temp_file_path = temp_file.name
+                _save_checkpoint(document, source=save_artifact(doc_id, f'source{file_ext}', source))
+        return doc_id
+    except Exception as e:
+        _stage_failed(self, doc_id, progress, e)
+
+
+@shared_task(bind=True)
+def extract_document_text(self, doc_id: str) -> str:
+    """
+    CPU stage: extract the text and chunk it, checkpointing both.
+    """
+    document = _get_document(doc_id)
+    progress = None
+    try:
+        checkpoints = document.checkpoints
+        if 'chunks' in checkpoints:
+            return doc_id
         
-        try:
+        progress = IngestionProgress(document)
+        progress.start_stage('extraction', status='processing')
+        if 'text' in checkpoints:
+            extracted_text = load_text(checkpoints['text'])
+        else:
             # Extract text
             logger.info(f"Extracting text from {document.title}")
-            text_extractor = TextExtractor()
-            extracted_text = text_extractor.extract_text(temp_file_path)
+            if 'source' in checkpoints:
+                storage, source = get_artifact_storage(), checkpoints['source']
+            else:
+                storage, source = document.file.storage, document.file.name
+            with local_path(storage, source) as file_path:
+                extracted_text = TextExtractor().extract_text(
+                    file_path,
+                    on_page=lambda pages: progress.update(pages_extracted=pages)
+                )
             
             if not extracted_text.strip():
-                raise ValueError("No text extracted from document")
-            
-            # Chunk text
-            logger.info(f"Chunking text for {document.title}")
-            text_chunker = TextChunker()
-            chunks = text_chunker.chunk_text(extracted_text)
-            
-            if not chunks:
-                raise ValueError("No chunks created from extracted text")
-            
-            # Update status to embedding
-            document.status = 'embedding'
-            document.save()
-            
-            # Generate embeddings
-            logger.info(f"Generating embeddings for {len(chunks)} chunks from {document.title}")
-            embedding_generator = EmbeddingGenerator()
-            embeddings = embedding_generator.generate_embeddings(chunks)
-            
-            # Prepare data for ChromaDB
-            chunk_ids = []
-            metadatas = []
-            
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{doc_id}_{i}"
-                chunk_ids.append(chunk_id)
-                metadatas.append({
-                    'user_id': str(document.user.id),
-                    'doc_id': str(document.id),
-                    'chunk_index': i,
-                    'document_title': document.title
-                })
+                raise PermanentIngestionError("No text extracted from document")
+            _save_checkpoint(document, text=save_text(doc_id, extracted_text))
+        
+        # Chunk text
+        logger.info(f"Chunking text for {document.title}")
+        progress.start_stage('chunking')
+        chunks = TextChunker().chunk_text(extracted_text)
+        
+        if not chunks:
+            raise PermanentIngestionError("No chunks created from extracted text")
+        progress.update(chunks_created=len(chunks))
+        progress.flush(force=True)
+        
+        # A new chunk set gets a new version, so stale vectors are never reused
+        _save_checkpoint(document, chunks=save_chunks(doc_id, chunks), chunks_version=uuid.uuid4().hex)
+        return doc_id
+    except Exception as e:
+        _stage_failed(self, doc_id, progress, e)
+
+
+@shared_task(bind=True)
+def embed_document_chunks(self, doc_id: str) -> str:
+    """
+    Model stage: embed the chunks in batches. Vectors are checkpointed in
+    segments, so a retry only embeds what was not done yet.
+    """
+    document = _get_document(doc_id)
+    progress = None
+    try:
+        checkpoints = document.checkpoints
+        if 'embeddings' in checkpoints:
+            return doc_id
+        
+        progress = IngestionProgress(document)
+        progress.start_stage('embedding', status='embedding')
+        chunks = load_chunks(checkpoints['chunks'])
+        model_name = get_tenant_index(get_tenant(document.user)).model_name
+        
+        logger.info(f"Generating embeddings for {len(chunks)} chunks from {document.title} with {model_name}")
+        # The batcher only runs DOCUMENT_EMBEDDING_MODEL
+        if embedding_batcher.batcher_enabled() and model_name == get_default_model():
+            # The shared batcher embeds these alongside other documents' chunks;
+            # vectors from an earlier attempt are kept in its result hash
+            job_id = f"{doc_id}:{checkpoints.get('chunks_version', '')}"
+            embedding_batcher.submit_chunks(job_id, chunks)
+            embeddings = embedding_batcher.wait_for_embeddings(
+                job_id,
+                len(chunks),
+                on_progress=lambda embedded: progress.update(chunks_embedded=embedded)
+            )
+        else:
+            segments = list(checkpoints.get('embedding_segments', []))
+            if checkpoints.get('embedding_model', model_name) != model_name:
+                # The workspace was cut over to another model since the last attempt
+                segments = []
+            embeddings = []
+            for key in segments:
+                embeddings.extend(load_embeddings(key))
             
-            # Store in ChromaDB
-            logger.info(f"Storing embeddings in ChromaDB for {document.title}")
-            chroma_handler = ChromaHandler()
+            # Generate embeddings in batches so progress can be reported
+            batch_size = getattr(settings, 'DOCUMENT_EMBEDDING_BATCH_SIZE', 64)
+            checkpoint_every = getattr(settings, 'DOCUMENT_EMBEDDING_CHECKPOINT_CHUNKS', 512)
+            embedding_generator = get_embedding_generator(model_name)
+            segment_start = len(embeddings)
+            for start in range(len(embeddings), len(chunks), batch_size):
+                embeddings.extend(embedding_generator.generate_embeddings(chunks[start:start + batch_size]))
+                progress.update(chunks_embedded=len(embeddings))
+                if len(embeddings) - segment_start >= checkpoint_every and len(embeddings) < len(chunks):
+                    segments.append(save_embeddings(
+                        doc_id, embeddings[segment_start:], name=f'embeddings-{segment_start}.npy'
+                    ))
+                    _save_checkpoint(document, embedding_segments=segments, embedding_model=model_name)
+                    segment_start = len(embeddings)
+        progress.update(chunks_embedded=len(embeddings))
+        progress.flush(force=True)
+        
+        _save_checkpoint(
+            document, 'embedding_segments', embeddings=save_embeddings(doc_id, embeddings), embedding_model=model_name
+        )
+        return doc_id
+    except Exception as e:
+        _stage_failed(self, doc_id, progress, e)
+
+
+@shared_task(bind=True)
+def store_document_embeddings(self, doc_id: str) -> str:
+    """
+    IO stage: upsert chunks and vectors into ChromaDB and finish the document.
+    Writes are idempotent upserts, and a retry resumes after the last
+    checkpointed batch.
+    """
+    document = _get_document(doc_id)
+    progress = None
+    try:
+        checkpoints = document.checkpoints
+        progress = IngestionProgress(document)
+        progress.start_stage('storing', status='embedding')
+        chunks = load_chunks(checkpoints['chunks'])
+        embeddings = load_embeddings(checkpoints['embeddings'])
+        generation = checkpoints.get('generation', document.index_generation + 1)
+        # Runs embedded before models were versioned used the legacy model
+        model_name = checkpoints.get('embedding_model', LEGACY_EMBEDDING_MODEL)
+        
+        # Prepare data for ChromaDB
+        chunk_ids = []
+        metadatas = []
+        
+        for i, chunk in enumerate(chunks):
+            chunk_id = get_chunk_id(doc_id, generation, i)
+            chunk_ids.append(chunk_id)
+            metadatas.append({
+                'user_id': str(document.user.id),
+                'doc_id': str(document.id),
+                'chunk_index': i,
+                'document_title': document.title,
+                'generation': generation,
+                'embedding_model': model_name
+            })
+        
+        # Store in ChromaDB
+        logger.info(f"Storing embeddings in ChromaDB for {document.title}")
+        batch_size = getattr(settings, 'DOCUMENT_EMBEDDING_BATCH_SIZE', 64)
+        checkpoint_every = getattr(settings, 'DOCUMENT_EMBEDDING_CHECKPOINT_CHUNKS', 512)
+        chroma_handler = ChromaHandler()
+        stored = checkpoints.get('stored', 0)
+        last_checkpoint = stored
+        for start in range(stored, len(chunks), batch_size):
+            end = min(start + batch_size, len(chunks))
             chroma_handler.add_documents(
-                collection_name="documents",
-                texts=chunks,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=chunk_ids
+                collection_name=get_collection_name(model_name),
+                texts=chunks[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                ids=chunk_ids[start:end],
+                embedding_model=model_name
             )
+            progress.update(chunks_stored=end)
+            if end - last_checkpoint >= checkpoint_every:
+                _save_checkpoint(document, stored=end)
+                last_checkpoint = end
+        
+        # Switch search to the new generation, unless the workspace moved to
+        # another model during the run; then the chunks need its vectors first
+        active_model = activate_generation(document, generation, model_name)
+        while active_model:
+            logger.info(f"Re-embedding {document.title} with {active_model} after the workspace cut over")
+            embedding_generator = get_embedding_generator(active_model)
+            for start in range(0, len(chunks), batch_size):
+                end = min(start + batch_size, len(chunks))
+                chroma_handler.add_documents(
+                    collection_name=get_collection_name(active_model),
+                    texts=chunks[start:end],
+                    embeddings=embedding_generator.generate_embeddings(chunks[start:end]),
+                    metadatas=[{**metadata, 'embedding_model': active_model} for metadata in metadatas[start:end]],
+                    ids=chunk_ids[start:end],
+                    embedding_model=active_model
+                )
+            model_name = active_model
+            active_model = activate_generation(document, generation, model_name)
+        
+        # Update status to completed
+        progress.finish('completed')
+        bump_index_version(str(document.user.id))
+        schedule_generation_cleanup(doc_id)
+        delete_artifacts(doc_id)
+        document.checkpoints = {}
+        document.save(update_fields=['checkpoints'])
+        _release(doc_id)
+        
+        logger.info(f"Successfully processed document {doc_id}: {document.title}")
+        return f"Successfully processed {len(chunks)} chunks from {document.title}"
+    except Exception as e:
+        _stage_failed(self, doc_id, progress, e)
+
+
+def schedule_generation_cleanup(doc_id: str):
+    """Queue collect_stale_generations for a document."""
+    # Delayed so searches already reading the old generation (or a lagging replica) finish first
+    try:
+        collect_stale_generations.apply_async(
+            (doc_id,), countdown=getattr(settings, 'DOCUMENT_INDEX_GC_DELAY', 60)
+        )
+    except Exception as e:
+        logger.warning(f"Could not schedule cleanup of old chunks for document {doc_id}: {str(e)}")
+
+
+@shared_task(bind=True)
+def collect_stale_generations(self, doc_id: str):
+    """
+    Delete a document's chunks from every generation but its active one and,
+    while it is being ingested, the run in progress. Chunks of failed runs go
+    too, as do all chunks of a document deleted while it was being ingested.
+    
+    Args:
+        doc_id: UUID string of the re-indexed, failed or deleted document
+    """
+    try:
+        chroma_handler = ChromaHandler()
+        with transaction.atomic():
+            # Locked so a reprocess cannot start a run whose chunks are being deleted
+            document = Document.objects.select_for_update(of=('self',)).select_related('user').filter(
+                id=doc_id
+            ).first()
+            if document is None:
+                chroma_handler.delete_document_everywhere(doc_id)
+                return f"Removed all chunks of deleted document {doc_id}"
             
-            # Update status to completed
-            document.status = 'completed'
-            document.error_message = ""
-            document.save()
-            
-            logger.info(f"Successfully processed document {doc_id}: {document.title}")
-            return f"Successfully processed {len(chunks)} chunks from {document.title}"
+            keep = {document.index_generation}
+            run_generation = document.checkpoints.get('generation')
+            if run_generation is not None:
+                if document.status in IN_FLIGHT_STATUSES:
+                    keep.add(run_generation)
+                elif 'stored' in document.checkpoints:
+                    # The failed run's chunks are deleted, so reprocessing stores them again
+                    _save_checkpoint(document, 'stored')
             
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            removed = 0
+            for model_name in get_index_models(get_tenant(document.user)):
+                removed += chroma_handler.delete_inactive_generations(
+                    get_collection_name(model_name), doc_id, keep
+                )
+    except Exception as e:
+        raise self.retry(exc=e, countdown=300, max_retries=3)
+    return f"Removed {removed} inactive chunks from document {doc_id}"
+
+
+@shared_task(bind=True)
+def migrate_tenant_embeddings(self, tenant: str):
+    """
+    Re-embed one batch of a tenant's chunks with its migration's target
+    model, reading the chunk text back from the active model's collection.
+    Schedules the next batch DOCUMENT_EMBEDDING_MIGRATION_INTERVAL seconds
+    later, or cuts the tenant over once every searchable document is covered.
     
-    except Document.DoesNotExist:
-        error_msg = f"Document with ID {doc_id} not found"
-        logger.error(error_msg)
-        raise Exception(error_msg)
+    Args:
+        tenant: Tenant key, see scheduling.get_tenant
+    """
+    index = EmbeddingIndex.objects.filter(tenant=tenant, status='migrating').first()
+    if index is None:
+        return f"No embedding migration in progress for {tenant}"
+    source, target = index.model_name, index.target_model_name
     
-    except Exception as e:
-        error_msg = f"Error processing document {doc_id}: {str(e)}"
-        logger.error(error_msg)
-        
-        try:
-            document = Document.objects.get(id=doc_id)
-            document.status = 'failed'
-            document.error_message = str(e)
-            document.save()
-        except Document.DoesNotExist:
-            pass
+    try:
+        chroma_handler = ChromaHandler()
+        embedding_generator = get_embedding_generator(target)
+        batch_size = getattr(settings, 'DOCUMENT_EMBEDDING_BATCH_SIZE', 64)
+        budget = getattr(settings, 'DOCUMENT_EMBEDDING_MIGRATION_BATCH_CHUNKS', 512)
+        migrated = 0
+        # Whole documents per batch, so a document is never half-covered
+        for document in get_uncovered_documents(tenant).only('id', 'index_generation').iterator():
+            doc_id, generation = str(document.id), document.index_generation
+            chunks = chroma_handler.get_document_chunks(get_collection_name(source), doc_id, generation)
+            for start in range(0, len(chunks['ids']), batch_size):
+                texts = chunks['documents'][start:start + batch_size]
+                chroma_handler.add_documents(
+                    collection_name=get_collection_name(target),
+                    texts=texts,
+                    embeddings=embedding_generator.generate_embeddings(texts),
+                    metadatas=[
+                        {**metadata, 'embedding_model': target}
+                        for metadata in chunks['metadatas'][start:start + batch_size]
+                    ],
+                    ids=chunks['ids'][start:start + batch_size],
+                    embedding_model=target
+                )
+            if not EmbeddingIndex.objects.filter(id=index.id, target_model_name=target).exists():
+                return f"Embedding migration of {tenant} to {target} was replaced"
+            # Not covered if the document was re-indexed meanwhile; the next batch picks it up
+            Document.objects.filter(id=doc_id, index_generation=generation).update(migrated_generation=generation)
+            migrated += len(chunks['ids'])
+            if migrated >= budget:
+                break
         
-        # Re-raise the exception for Celery to handle
-        raise self.retry(exc=e, countdown=60, max_retries=3)
+        EmbeddingIndex.objects.filter(id=index.id).update(
+            chunks_migrated=F('chunks_migrated') + migrated, error_message=''
+        )
+        previous = cut_over(tenant)
+    except Exception as e:
+        logger.error(f"Error migrating embeddings of {tenant} to {target}: {str(e)}")
+        EmbeddingIndex.objects.filter(id=index.id).update(error_message=str(e))
+        raise self.retry(exc=e, countdown=300, max_retries=3)
+    
+    if previous:
+        # Delayed so searches already running against the old collection finish first
+        drop_tenant_embeddings.apply_async(
+            (tenant, previous), countdown=getattr(settings, 'DOCUMENT_INDEX_GC_DELAY', 60)
+        )
+        return f"Cut {tenant} over from {previous} to {target}"
+    
+    migrate_tenant_embeddings.apply_async(
+        (tenant,), countdown=getattr(settings, 'DOCUMENT_EMBEDDING_MIGRATION_INTERVAL', 5)
+    )
+    return f"Re-embedded {migrated} chunks of {tenant} with {target}"
+
+
+@shared_task(bind=True)
+def drop_tenant_embeddings(self, tenant: str, model_name: str):
+    """
+    Delete a tenant's chunks from the collection of a model it no longer uses.
+    
+    Args:
+        tenant: Tenant key, see scheduling.get_tenant
+        model_name: Model the tenant moved off
+    """
+    if model_name in get_index_models(tenant):
+        return f"{tenant} still uses {model_name}"
+    try:
+        chroma_handler = ChromaHandler()
+        for user_id in get_tenant_user_ids(tenant):
+            chroma_handler.delete_user_documents(get_collection_name(model_name), user_id)
+    except Exception as e:
+        raise self.retry(exc=e, countdown=300, max_retries=3)
+    return f"Removed chunks of {tenant} embedded with {model_name}"
 
 
 @shared_task
@@ -148,4 +530,37 @@ def cleanup_failed_documents():
         failed_docs.delete()
         logger.info(f"Cleaned up {count} old failed documents")
     
-    return f"Cleaned up {count} failed documents"
\ No newline at end of file
+    return f"Cleaned up {count} failed documents"
+
+
+@shared_task
+def cleanup_stale_upload_sessions():
+    """
+    Periodic task to remove resumable upload sessions that were abandoned
+    or finished more than DOCUMENT_UPLOAD_SESSION_TTL seconds ago.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'DOCUMENT_UPLOAD_SESSION_TTL', 24 * 60 * 60))
+    stale_sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+    
+    count = 0
+    for session in stale_sessions.iterator():
+        discard_upload(session)
+        count += 1
+    stale_sessions.delete()
+    
+    if count > 0:
+        logger.info(f"Cleaned up {count} stale upload sessions")
+    
+    return f"Cleaned up {count} upload sessions"
+
+
+@shared_task
+def dispatch_pending_documents():
+    """
+    Periodic task to start queued documents whose in-flight slots were
+    freed without a release, e.g. after a worker was killed.
+    """
+    dispatch_pending()
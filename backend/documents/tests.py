@@ -1,3 +1,841 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import urllib.request
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.testing import QueryPlanTestMixin
+from .models import Document, DocumentBatch, EmbeddingIndex
+from .progress import IngestionProgress
+from .tasks import (
+    ingestion_pipeline, download_document, extract_document_text,
+    embed_document_chunks, store_document_embeddings, migrate_tenant_embeddings, collect_stale_generations
+)
+from .chroma_handler import ChromaHandler
+from .direct_upload import get_s3_client
+from .errors import PermanentIngestionError, is_retryable
+from . import bulk_ingest, embedding_batcher, embedding_models, generations, scheduling
+
+User = get_user_model()
+
+
+class DocumentQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """
+    Hot document queries must be served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'docs{i}@example.com', username=f'docs{i}', password='testpass123')
+            for i in range(5)
+        ]
+        statuses = ['pending', 'processing', 'embedding', 'completed', 'failed']
+        Document.objects.bulk_create([
+            Document(
+                user=cls.users[i % 5],
+                file=f'docs/file{i}.txt',
+                title=f'File {i}',
+                status=statuses[i % 5] if i % 10 == 0 else 'completed'
+            )
+            for i in range(500)
+        ])
+
+    def test_user_documents_newest_first(self):
+        self.assertUsesIndex(
+            Document.objects.filter(user=self.users[0]).order_by('-created_at', '-id')[:50],
+            'doc_user_created_idx'
+        )
+
+    def test_documents_in_progress(self):
+        self.assertUsesIndex(
+            Document.objects.filter(status__in=['pending', 'processing', 'embedding']).order_by('created_at'),
+            'doc_in_progress_idx'
+        )
+
+
+@mock.patch('documents.progress.publish_document_status')
+class IngestionProgressTests(TestCase):
+    """
+    Progress counters are written with update_fields, at most once per interval.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(email='progress@example.com', username='progress', password='testpass123')
+        self.document = Document.objects.create(user=user, file='docs/progress.txt', title='Progress')
+
+    def test_counter_writes_are_throttled(self, publish):
+        progress = IngestionProgress(self.document, min_interval=60)
+        progress.start()
+        progress.start_stage('embedding', status='embedding')
+
+        with CaptureQueriesContext(connection) as ctx:
+            for embedded in range(1, 101):
+                progress.update(chunks_embedded=embedded)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        progress.finish('completed')
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.chunks_embedded, 100)
+        self.assertEqual(self.document.status, 'completed')
+        self.assertIn('embedding', self.document.stage_timings)
+
+    def test_writes_only_changed_fields(self, publish):
+        progress = IngestionProgress(self.document, min_interval=0)
+        progress.start_stage('extraction')
+
+        with CaptureQueriesContext(connection) as ctx:
+            progress.update(pages_extracted=3)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('pages_extracted', sql)
+        self.assertNotIn('"title"', sql)
+
+
+@skipUnless(
+    getattr(settings, 'AWS_S3_ENDPOINT_URL', None) and settings.AWS_STORAGE_BUCKET_NAME,
+    'Direct upload tests need an S3-compatible endpoint such as the MinIO service'
+)
+@mock.patch('documents.views.schedule_document')
+class DirectUploadTests(APITestCase):
+    """
+    Multipart uploads go straight to object storage; the API only registers them.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='upload@example.com', username='upload', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        client = get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        if bucket not in [b['Name'] for b in client.list_buckets()['Buckets']]:
+            client.create_bucket(Bucket=bucket)
+
+    def _put_part(self, url, data):
+        request = urllib.request.Request(url, data=data, method='PUT')
+        with urllib.request.urlopen(request) as response:
+            return response.headers['ETag']
+
+    @mock.patch('documents.direct_upload.get_part_size', return_value=5 * 1024 * 1024)
+    def test_upload_complete_registers_document(self, part_size, schedule):
+        content = b'a' * (5 * 1024 * 1024) + b'tail of the document'
+        response = self.client.post(
+            reverse('document-start-upload'),
+            {'filename': 'notes.txt', 'size': len(content)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['parts']), 2)
+
+        parts = []
+        for part in response.data['parts']:
+            start = (part['part_number'] - 1) * response.data['part_size']
+            chunk = content[start:start + response.data['part_size']]
+            parts.append({'part_number': part['part_number'], 'etag': self._put_part(part['url'], chunk)})
+
+        complete_url = reverse('document-complete-upload', kwargs={'upload_id': response.data['upload_id']})
+        response = self.client.post(complete_url, {'parts': parts}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        document = Document.objects.get(id=response.data['id'])
+        self.assertEqual(document.title, 'notes')
+        self.assertEqual(document.file.size, len(content))
+        schedule.assert_called_once_with(document)
+
+    def test_rejects_unsupported_type(self, schedule):
+        response = self.client.post(
+            reverse('document-start-upload'),
+            {'filename': 'malware.exe', 'size': 100},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_cannot_complete(self, schedule):
+        response = self.client.post(
+            reverse('document-start-upload'),
+            {'filename': 'notes.txt', 'size': 100},
+            format='json'
+        )
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+
+        complete_url = reverse('document-complete-upload', kwargs={'upload_id': response.data['upload_id']})
+        response = self.client.post(complete_url, {'parts': [{'part_number': 1, 'etag': 'x'}]}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+@mock.patch('documents.views.schedule_document')
+class ResumableUploadTests(APITestCase):
+    """
+    Resumable uploads accept ordered byte ranges and finalize into a Document.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            DOCUMENT_UPLOAD_TMP_DIR=f'{self.media_root}/upload_sessions',
+            STORAGES={'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                      'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='resume@example.com', username='resume', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.content = b'Resumable upload content. ' * 1000
+
+    def _start(self, **extra):
+        response = self.client.post(
+            reverse('document-create-resumable-upload'),
+            {'filename': 'report.txt', 'size': len(self.content), **extra},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def _patch(self, session_id, start, end):
+        return self.client.generic(
+            'PATCH',
+            reverse('document-resumable-upload', kwargs={'session_id': session_id}),
+            self.content[start:end],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.content)}'
+        )
+
+    def test_resume_and_finalize(self, schedule):
+        session_id = self._start(sha256=hashlib.sha256(self.content).hexdigest())
+        half = len(self.content) // 2
+
+        self.assertEqual(self._patch(session_id, 0, half).data['offset'], half)
+
+        # A retried or skipped range is rejected with the offset to resume from
+        response = self._patch(session_id, half + 10, len(self.content))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], half)
+
+        self.assertEqual(self._patch(session_id, half, len(self.content)).data['offset'], len(self.content))
+
+        response = self.client.post(
+            reverse('document-finalize-resumable-upload', kwargs={'session_id': session_id})
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.content).hexdigest())
+
+        document = Document.objects.get(id=response.data['id'])
+        self.assertEqual(document.title, 'report')
+        with document.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        schedule.assert_called_once_with(document)
+
+    def test_checksum_mismatch_restarts_upload(self, schedule):
+        session_id = self._start(sha256='0' * 64)
+        self._patch(session_id, 0, len(self.content))
+
+        response = self.client.post(
+            reverse('document-finalize-resumable-upload', kwargs={'session_id': session_id})
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['offset'], 0)
+        self.assertFalse(Document.objects.exists())
+
+    def test_finalize_incomplete_upload(self, schedule):
+        session_id = self._start()
+        self._patch(session_id, 0, 100)
+
+        response = self.client.post(
+            reverse('document-finalize-resumable-upload', kwargs={'session_id': session_id})
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 100)
+
+
+@mock.patch('documents.batch.schedule_documents')
+class DocumentBatchTests(APITestCase):
+    """
+    Batch imports insert all documents together and queue them in one call.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                      'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='batch@example.com', username='batch', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def _files(self, *names):
+        return [SimpleUploadedFile(name, b'Batch upload content', content_type='text/plain') for name in names]
+
+    def test_batch_upload_and_progress(self, schedule_documents):
+        schedule_documents.return_value = {'fast': [], 'bulk': []}
+
+        response = self.client.post(
+            reverse('document-create-batch'),
+            {'files': self._files('one.txt', 'two.txt', 'three.txt')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['counts']['pending'], 3)
+
+        document_batch = DocumentBatch.objects.get(id=response.data['id'])
+        self.assertEqual(
+            sorted(document_batch.documents.values_list('title', flat=True)),
+            ['one', 'three', 'two']
+        )
+        scheduled, = schedule_documents.call_args.args
+        self.assertEqual(len(scheduled), 3)
+
+        document_batch.documents.filter(title='one').update(status='completed', chunks_created=4)
+        document_batch.documents.filter(title='two').update(status='failed')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('document-batch-progress', kwargs={'batch_id': document_batch.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['finished'], 2)
+        self.assertEqual(response.data['chunks_created'], 4)
+        self.assertFalse(response.data['done'])
+        self.assertLessEqual(len(queries), 2)
+
+    def test_invalid_file_rejects_whole_batch(self, schedule_documents):
+        response = self.client.post(
+            reverse('document-create-batch'),
+            {'files': self._files('one.txt', 'image.png')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image.png', response.data['files'])
+        self.assertFalse(Document.objects.exists())
+        schedule_documents.assert_not_called()
+
+
+@mock.patch('documents.tasks.collect_stale_generations')
+@mock.patch('documents.progress.publish_document_status')
+@mock.patch('documents.tasks.bump_index_version')
+@mock.patch('documents.tasks.ChromaHandler')
+@mock.patch('documents.tasks.get_embedding_generator')
+class IngestionPipelineTests(TestCase):
+    """
+    Ingestion stages hand chunks and vectors to each other through artifact storage.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            DOCUMENT_ARTIFACT_DIR=f'{self.media_root}/artifacts',
+            STORAGES={'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                      'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(email='pipeline@example.com', username='pipeline', password='testpass123')
+        self.document = Document(user=user, title='Pipeline')
+        self.document.file.save('pipeline.txt', SimpleUploadedFile('pipeline.txt', b'Pipeline content. ' * 200))
+
+    def test_pipeline_is_routed_by_stage(self, *mocks):
+        tasks = [signature.task for signature in ingestion_pipeline(str(self.document.id)).tasks]
+        routes = settings.CELERY_TASK_ROUTES
+        self.assertEqual(
+            [routes[task]['queue'] for task in tasks],
+            ['ingest_io', 'ingest_extract', 'ingest_embed', 'ingest_io']
+        )
+
+    def test_stages_hand_off_artifacts(self, get_embedding_generator, chroma_handler, bump, publish, cleanup):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = (
+            lambda texts: [[0.5] * 4 for _ in texts]
+        )
+        doc_id = str(self.document.id)
+
+        download_document(doc_id)
+        self.document.refresh_from_db()
+        self.assertIn('source', self.document.checkpoints)
+        extract_document_text(doc_id)
+        embed_document_chunks(doc_id)
+        self.document.refresh_from_db()
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, 'artifacts', self.document.checkpoints['embeddings']))
+        )
+        store_document_embeddings(doc_id)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'completed')
+        self.assertEqual(self.document.checkpoints, {})
+        self.assertEqual(self.document.chunks_stored, self.document.chunks_created)
+        self.assertEqual(
+            set(self.document.stage_timings),
+            {'download', 'extraction', 'chunking', 'embedding', 'storing'}
+        )
+        stored = chroma_handler.return_value.add_documents.call_args.kwargs
+        self.assertEqual(stored['embeddings'][0], [0.5] * 4)
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'artifacts', 'ingest', doc_id)))
+
+    def test_retry_resumes_from_checkpoint(self, get_embedding_generator, chroma_handler, bump, publish, cleanup):
+        generate = get_embedding_generator.return_value.generate_embeddings
+        generate.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+        add_documents = chroma_handler.return_value.add_documents
+        add_documents.side_effect = [ConnectionError('ChromaDB unavailable'), None, None, None]
+        doc_id = str(self.document.id)
+
+        for stage in (download_document, extract_document_text, embed_document_chunks):
+            stage(doc_id)
+        embed_calls = generate.call_count
+        with self.assertRaises(ConnectionError):
+            store_document_embeddings(doc_id)
+
+        # A transient error keeps the document in progress for the retry
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'embedding')
+        self.assertIn('embeddings', self.document.checkpoints)
+
+        # Rerunning the chain skips extraction and embedding
+        for stage in (download_document, extract_document_text, embed_document_chunks, store_document_embeddings):
+            stage(doc_id)
+        self.assertEqual(generate.call_count, embed_calls)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'completed')
+
+    def test_unsupported_file_fails_without_retry(self, get_embedding_generator, chroma_handler, bump, publish,
+                                                  cleanup):
+        self.document.file.save('pipeline.xyz', SimpleUploadedFile('pipeline.xyz', b'binary'))
+        doc_id = str(self.document.id)
+        download_document(doc_id)
+
+        with mock.patch.object(extract_document_text, 'retry') as retry:
+            with self.assertRaises(PermanentIngestionError):
+                extract_document_text(doc_id)
+        retry.assert_not_called()
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'failed')
+        cleanup.apply_async.assert_called_with((doc_id,), countdown=settings.DOCUMENT_INDEX_GC_DELAY)
+
+    def test_programming_errors_are_retried(self, *mocks):
+        self.assertTrue(is_retryable(ValueError('bad value from a dependency')))
+        self.assertTrue(is_retryable(ConnectionError('ChromaDB unavailable')))
+        self.assertFalse(is_retryable(PermanentIngestionError('No text extracted from document')))
+        self.assertFalse(is_retryable(UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')))
+
+    def test_reindex_switches_generation_on_completion(self, get_embedding_generator, chroma_handler, bump, publish,
+                                                       cleanup):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = (
+            lambda texts: [[0.5] * 4 for _ in texts]
+        )
+        doc_id = str(self.document.id)
+        stages = (download_document, extract_document_text, embed_document_chunks)
+
+        for generation in (1, 2):
+            for stage in stages:
+                stage(doc_id)
+            # Until the run completes, search keeps using the previous generation
+            self.document.refresh_from_db()
+            self.assertEqual(self.document.index_generation, generation - 1)
+
+            store_document_embeddings(doc_id)
+            self.document.refresh_from_db()
+            self.assertEqual(self.document.index_generation, generation)
+            stored = chroma_handler.return_value.add_documents.call_args.kwargs
+            self.assertTrue(stored['ids'][0].startswith(f'{doc_id}_g{generation}_'))
+            self.assertEqual(stored['metadatas'][0]['generation'], generation)
+            cleanup.apply_async.assert_called_with((doc_id,), countdown=settings.DOCUMENT_INDEX_GC_DELAY)
+
+    def test_search_only_returns_active_generation(self, *mocks):
+        self.document.index_generation = 2
+        self.document.save()
+        doc_id = str(self.document.id)
+        results = {
+            'ids': [[f'{doc_id}_g2_0', f'{doc_id}_g1_0', f'{doc_id}_g3_0', f'{doc_id}_g2_1']],
+            'documents': [['new', 'old', 'building', 'new too']],
+            'metadatas': [[{'doc_id': doc_id, 'generation': g} for g in (2, 1, 3, 2)]],
+            'distances': [[0.1, 0.2, 0.3, 0.4]],
+            'embeddings': None,
+        }
+
+        filtered = generations.filter_active_chunks(results, n_results=5)
+        self.assertEqual(filtered['documents'], [['new', 'new too']])
+        self.assertEqual(filtered['distances'], [[0.1, 0.4]])
+        self.assertIsNone(filtered['embeddings'])
+
+
+@mock.patch('documents.tasks.ChromaHandler')
+class GenerationCollectionTests(APITestCase):
+    """
+    Every generation but the active one, and a run still in progress, is deleted.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='gc@example.com', username='gc', password='testpass123')
+        self.collection = embedding_models.get_collection_name(embedding_models.LEGACY_EMBEDDING_MODEL)
+
+    def _document(self, status, checkpoints):
+        return Document.objects.create(user=self.user, title='GC', file='docs/gc.txt', status=status,
+                                       index_generation=2, checkpoints=checkpoints)
+
+    def _kept(self, chroma_handler, document):
+        collect_stale_generations(str(document.id))
+        delete = chroma_handler.return_value.delete_inactive_generations
+        delete.assert_called_once_with(self.collection, str(document.id), mock.ANY)
+        return delete.call_args.args[2]
+
+    def test_keeps_only_active_generation(self, chroma_handler):
+        self.assertEqual(self._kept(chroma_handler, self._document('completed', {})), {2})
+
+    def test_keeps_run_in_progress(self, chroma_handler):
+        document = self._document('embedding', {'generation': 3, 'stored': 64})
+        self.assertEqual(self._kept(chroma_handler, document), {2, 3})
+        document.refresh_from_db()
+        self.assertEqual(document.checkpoints['stored'], 64)
+
+    def test_failed_run_is_collected(self, chroma_handler):
+        document = self._document('failed', {'generation': 3, 'stored': 64})
+        self.assertEqual(self._kept(chroma_handler, document), {2})
+        # Reprocessing stores the deleted chunks again
+        document.refresh_from_db()
+        self.assertEqual(document.checkpoints, {'generation': 3})
+
+    def test_deleted_document_is_collected_everywhere(self, chroma_handler):
+        doc_id = str(uuid.uuid4())
+        collect_stale_generations(doc_id)
+        chroma_handler.return_value.delete_document_everywhere.assert_called_once_with(doc_id)
+
+    @mock.patch('documents.views.schedule_generation_cleanup')
+    def test_deleting_document_mid_ingestion_schedules_collection(self, schedule, chroma_handler):
+        document = self._document('embedding', {'generation': 3})
+        self.client.force_authenticate(user=self.user)
+        with mock.patch('documents.views.ChromaHandler'):
+            response = self.client.delete(reverse('document-detail', kwargs={'pk': document.id}))
+        self.assertEqual(response.status_code, 204)
+        schedule.assert_called_once_with(str(document.id))
+
+    @mock.patch('documents.views.publish_document_status')
+    @mock.patch('documents.views.schedule_document', return_value='fast')
+    def test_reprocess_rejects_in_flight_documents(self, schedule, publish, chroma_handler):
+        self.client.force_authenticate(user=self.user)
+        for status in ('pending', 'processing', 'embedding'):
+            document = self._document(status, {'generation': 3})
+            response = self.client.post(reverse('document-reprocess', kwargs={'pk': document.id}))
+            self.assertEqual(response.status_code, 400, status)
+        schedule.assert_not_called()
+
+        failed = self._document('failed', {'generation': 3})
+        response = self.client.post(reverse('document-reprocess', kwargs={'pk': failed.id}))
+        self.assertEqual(response.status_code, 200)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'pending')
+        schedule.assert_called_once()
+
+    @mock.patch('documents.chroma_handler.chromadb.HttpClient')
+    def test_search_widens_until_enough_active_chunks(self, http_client, chroma_handler):
+        document = self._document('completed', {})
+        doc_id = str(document.id)
+
+        def query(query_embeddings, n_results, where):
+            # Chunks of a failed run outrank the active ones
+            chunk_generations = [3] * 8 + [2] * (n_results - 8) if n_results > 8 else [3] * n_results
+            return {
+                'ids': [[f'{doc_id}_g{g}_{i}' for i, g in enumerate(chunk_generations)]],
+                'documents': [[f'chunk {i}' for i in range(len(chunk_generations))]],
+                'metadatas': [[{'doc_id': doc_id, 'generation': g} for g in chunk_generations]],
+                'distances': [[0.1] * len(chunk_generations)],
+            }
+        collection = http_client.return_value.get_or_create_collection.return_value
+        collection.query.side_effect = query
+
+        results = ChromaHandler().search_documents(self.collection, [0.5] * 4, str(self.user.id), n_results=3)
+        self.assertEqual(len(results['ids'][0]), 3)
+        self.assertEqual([call.kwargs['n_results'] for call in collection.query.call_args_list], [6, 24])
+
+
+NEW_EMBEDDING_MODEL = 'sentence-transformers/all-mpnet-base-v2'
+
+
+@mock.patch('documents.tasks.drop_tenant_embeddings')
+@mock.patch('documents.embedding_models.bump_index_version')
+@mock.patch('documents.tasks.ChromaHandler')
+@mock.patch('documents.tasks.get_embedding_generator')
+class EmbeddingMigrationTests(TestCase):
+    """
+    Workspaces move to a new embedding model in the background and switch searches over at full coverage.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='migrate@example.com', username='migrate', password='testpass123')
+        self.tenant = scheduling.get_tenant(self.user)
+        self.documents = [
+            Document.objects.create(user=self.user, title=f'Doc {i}', file=f'docs/doc{i}.txt',
+                                    status='completed', index_generation=1)
+            for i in range(2)
+        ]
+        EmbeddingIndex.objects.create(tenant=self.tenant, model_name=embedding_models.LEGACY_EMBEDDING_MODEL)
+
+    def _stored_chunks(self, chroma_handler):
+        chroma_handler.return_value.get_document_chunks.side_effect = lambda collection, doc_id, generation: {
+            'ids': [f'{doc_id}_g{generation}_0'],
+            'documents': ['Stored chunk text'],
+            'metadatas': [{'doc_id': doc_id, 'generation': generation, 'chunk_index': 0}],
+        }
+
+    def test_collection_per_model(self, *mocks):
+        self.assertEqual(embedding_models.get_collection_name(embedding_models.LEGACY_EMBEDDING_MODEL), 'documents')
+        self.assertEqual(
+            embedding_models.get_collection_name(NEW_EMBEDDING_MODEL),
+            'documents__sentence-transformers-all-mpnet-base-v2'
+        )
+
+    @override_settings(DOCUMENT_EMBEDDING_MIGRATION_BATCH_CHUNKS=1)
+    def test_searches_old_model_until_fully_covered(self, get_embedding_generator, chroma_handler, bump, drop):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+        self._stored_chunks(chroma_handler)
+        embedding_models.start_migration(self.tenant, NEW_EMBEDDING_MODEL)
+
+        with mock.patch.object(migrate_tenant_embeddings, 'apply_async') as next_batch:
+            migrate_tenant_embeddings(self.tenant)
+        next_batch.assert_called_once()
+        self.assertEqual(embedding_models.get_search_model(str(self.user.id)), embedding_models.LEGACY_EMBEDDING_MODEL)
+
+        migrate_tenant_embeddings(self.tenant)
+        self.assertEqual(embedding_models.get_search_model(str(self.user.id)), NEW_EMBEDDING_MODEL)
+        stored = chroma_handler.return_value.add_documents.call_args.kwargs
+        self.assertEqual(stored['collection_name'], embedding_models.get_collection_name(NEW_EMBEDDING_MODEL))
+        self.assertEqual(stored['metadatas'][0]['embedding_model'], NEW_EMBEDDING_MODEL)
+        drop.apply_async.assert_called_once_with(
+            (self.tenant, embedding_models.LEGACY_EMBEDDING_MODEL), countdown=settings.DOCUMENT_INDEX_GC_DELAY
+        )
+        bump.assert_called_with(str(self.user.id))
+
+    def test_reindexed_document_is_covered_again(self, get_embedding_generator, chroma_handler, bump, drop):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+        self._stored_chunks(chroma_handler)
+        embedding_models.start_migration(self.tenant, NEW_EMBEDDING_MODEL)
+        Document.objects.filter(id=self.documents[0].id).update(migrated_generation=1)
+        # Re-indexed after its chunks were re-embedded
+        Document.objects.filter(id=self.documents[0].id).update(index_generation=2)
+
+        self.assertEqual(embedding_models.get_uncovered_documents(self.tenant).count(), 2)
+        self.assertIsNone(embedding_models.cut_over(self.tenant))
+
+    def test_run_finishing_after_cut_over_uses_new_model(self, get_embedding_generator, chroma_handler, bump, drop):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+        document = self.documents[0]
+        activate = embedding_models.activate_generation
+        EmbeddingIndex.objects.filter(tenant=self.tenant).update(model_name=NEW_EMBEDDING_MODEL)
+
+        self.assertEqual(
+            activate(document, 2, embedding_models.LEGACY_EMBEDDING_MODEL), NEW_EMBEDDING_MODEL
+        )
+        document.refresh_from_db()
+        self.assertEqual(document.index_generation, 1)
+        self.assertIsNone(activate(document, 2, NEW_EMBEDDING_MODEL))
+        document.refresh_from_db()
+        self.assertEqual(document.index_generation, 2)
+
+
+def _thread_pool(max_workers, mp_context=None, initializer=None, initargs=()):
+    # Workers in threads share the test transaction and the mocks
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+@mock.patch('documents.bulk_ingest.ProcessPoolExecutor', _thread_pool)
+@mock.patch('documents.bulk_ingest.connections')
+@mock.patch('documents.bulk_ingest.bump_index_version')
+@mock.patch('documents.bulk_ingest.ChromaHandler')
+@mock.patch('documents.bulk_ingest.get_embedding_generator')
+class BulkIngestTests(TestCase):
+    """
+    bulk_ingest embeds local files on a worker pool, writes vectors in batches and resumes from its journal.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                      'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='bulk@example.com', username='bulk', password='testpass123')
+        self.source = os.path.join(self.media_root, 'source')
+        os.makedirs(os.path.join(self.source, 'nested'))
+        for name in ('a.txt', 'nested/b.txt', 'notes.md'):
+            with open(os.path.join(self.source, name), 'w') as f:
+                f.write('Bulk content. ' * 150)
+        self.journal = bulk_ingest.IngestJournal(os.path.join(self.media_root, 'journal'))
+
+    def test_ingests_supported_files_in_one_write(self, get_embedding_generator, chroma_handler, bump, connections):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+
+        stats = bulk_ingest.BulkIngester(self.user, self.source, self.journal, workers=2).run()
+
+        self.assertEqual((stats.files, stats.failed), (2, 0))
+        self.assertEqual(set(Document.objects.values_list('title', 'status')), {('a', 'completed'), ('b', 'completed')})
+        add_documents = chroma_handler.return_value.add_documents
+        add_documents.assert_called_once()
+        self.assertEqual(len(add_documents.call_args.kwargs['ids']), stats.chunks)
+        self.assertEqual(Document.objects.filter(index_generation=1, chunks_stored__gt=0).count(), 2)
+
+    def test_resumes_from_journal(self, get_embedding_generator, chroma_handler, bump, connections):
+        get_embedding_generator.return_value.generate_embeddings.side_effect = lambda texts: [[0.5] * 4 for _ in texts]
+        done = Document.objects.create(user=self.user, title='a', file='docs/a.txt', status='completed')
+        self.journal.record('a.txt', str(done.id), 'done')
+        # Interrupted after its document was created
+        started = Document.objects.create(user=self.user, title='b', file='docs/b.txt', status='processing')
+        self.journal.record(os.path.join('nested', 'b.txt'), str(started.id), 'started')
+
+        stats = bulk_ingest.BulkIngester(self.user, self.source, self.journal, workers=1).run()
+
+        self.assertEqual((stats.files, stats.skipped), (1, 1))
+        self.assertEqual(Document.objects.count(), 2)
+        started.refresh_from_db()
+        self.assertEqual(started.status, 'completed')
+        self.assertEqual(self.journal.load()[os.path.join('nested', 'b.txt')]['state'], 'done')
+
+    def test_archive_entries_stay_in_work_dir(self, *mocks):
+        archive_path = os.path.join(self.media_root, 'import.zip')
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.writestr('docs/report.txt', 'Report')
+            archive.writestr('../escape.txt', 'Escape')
+            archive.writestr('image.png', 'Binary')
+        work_dir = os.path.join(self.media_root, 'work')
+        os.makedirs(work_dir)
+
+        root = bulk_ingest.unpack_source(archive_path, work_dir)
+        self.assertEqual(bulk_ingest.list_files(root), [os.path.join('docs', 'report.txt')])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'escape.txt')))
+
+def _redis_available():
+    try:
+        return embedding_batcher.get_redis_client().ping()
+    except Exception:
+        return False
+
+
+@skipUnless(_redis_available(), 'Embedding batcher tests need Redis')
+@mock.patch('documents.embedding_batcher.get_embedding_generator')
+class EmbeddingBatcherTests(TestCase):
+    """
+    The batcher embeds chunks from several documents in one model call.
+    """
+
+    def test_batches_across_documents(self, get_embedding_generator):
+        generate = get_embedding_generator.return_value.generate_embeddings
+        generate.side_effect = lambda texts: [[float(len(text)), 0.0] for text in texts]
+        batcher = embedding_batcher.EmbeddingBatcher(consumer='test', batch_size=16, max_wait_ms=0)
+        batcher.ensure_group()
+
+        first, second = str(uuid.uuid4()), str(uuid.uuid4())
+        embedding_batcher.submit_chunks(first, ['a', 'bb', 'ccc'])
+        embedding_batcher.submit_chunks(second, ['dddd', 'eeeee'])
+        self.assertEqual(batcher.process(batcher.read_batch(block_ms=100)), 5)
+
+        generate.assert_called_once()
+        self.assertEqual(embedding_batcher.wait_for_embeddings(second, 2, timeout=1), [[4.0, 0.0], [5.0, 0.0]])
+        self.assertEqual(
+            embedding_batcher.wait_for_embeddings(first, 3, timeout=1),
+            [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0]]
+        )
+
+
+@skipUnless(_redis_available(), 'Scheduler tests need Redis')
+@override_settings(DOCUMENT_BULK_TENANT_CONCURRENCY=1, DOCUMENT_BULK_MAX_IN_FLIGHT=10)
+@mock.patch('documents.scheduling.get_document_size', return_value=50 * 1024 * 1024)
+@mock.patch('documents.tasks.ingestion_pipeline')
+class IngestionSchedulingTests(TestCase):
+    """
+    Documents start round-robin across tenants, capped per tenant.
+    """
+
+    def setUp(self):
+        client = scheduling.get_redis_client()
+        keys = list(client.scan_iter('ingest:*'))
+        if keys:
+            client.delete(*keys)
+        self.importer = User.objects.create_user(email='importer@example.com', username='importer', password='testpass123')
+        self.other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+
+    def _dispatched(self, pipeline):
+        return [call.args[0] for call in pipeline.call_args_list]
+
+    def test_small_documents_take_fast_lane(self, pipeline, size):
+        self.assertEqual(scheduling.choose_lane(10 * 1024), scheduling.FAST_LANE)
+        self.assertEqual(scheduling.choose_lane(None), scheduling.BULK_LANE)
+
+    def test_import_does_not_starve_other_tenants(self, pipeline, size):
+        imports = [
+            Document.objects.create(user=self.importer, file=f'docs/import-{i}.pdf', title=f'Import {i}')
+            for i in range(5)
+        ]
+        scheduling.schedule_documents(imports)
+        upload = Document.objects.create(user=self.other, file='docs/one-page.pdf', title='One page')
+        scheduling.schedule_document(upload)
+
+        # The importer is at its cap, so the other user's upload starts at once
+        self.assertEqual(self._dispatched(pipeline), [str(imports[0].id), str(upload.id)])
+
+        scheduling.release_document(str(imports[0].id))
+        self.assertEqual(self._dispatched(pipeline)[-1], str(imports[1].id))
+
+
+@mock.patch('documents.views.connection')
+@mock.patch('documents.views.stream_document_events', return_value=iter([]))
+class DocumentEventStreamTests(TestCase):
+    """
+    The event stream authenticates by header or ?token= and releases its connection.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='stream@example.com', username='stream', password='testpass123')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.url = reverse('document-events')
+
+    def test_rejects_missing_or_invalid_token(self, stream, conn):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, {'token': 'not-a-token'}).status_code, 401)
+        stream.assert_not_called()
+
+    def test_accepts_query_token(self, stream, conn):
+        conn.in_atomic_block = False
+        response = self.client.get(self.url, {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(stream.call_args.args[0], self.user.id)
+        conn.close.assert_called_once()
+
+    def test_accepts_authorization_header(self, stream, conn):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_initial_payloads_are_own_in_flight_documents(self, stream, conn):
+        other = User.objects.create_user(email='stream2@example.com', username='stream2', password='testpass123')
+        pending = Document.objects.create(user=self.user, title='Pending', file='docs/p.txt', status='pending')
+        embedding = Document.objects.create(user=self.user, title='Embedding', file='docs/e.txt', status='embedding')
+        Document.objects.create(user=self.user, title='Done', file='docs/d.txt', status='completed')
+        Document.objects.create(user=other, title='Theirs', file='docs/t.txt', status='processing')
+
+        self.client.get(self.url, {'token': self.token})
+
+        payloads = stream.call_args.kwargs['initial_payloads']
+        self.assertEqual({payload['id'] for payload in payloads}, {str(pending.id), str(embedding.id)})
+        self.assertTrue(all('progress' in payload for payload in payloads))
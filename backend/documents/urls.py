@@ -9,5 +9,7 @@ router = DefaultRouter()
 router.register(r'documents', views.DocumentViewSet, basename='document')
 
 urlpatterns = [
+    # Must precede the router so 'events' is not taken as a document id
+    path('documents/events/', views.document_status_stream, name='document-events'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -3,14 +3,18 @@ Text processing utilities for document handling.
 """
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
+from django.conf import settings
 from pypdf import PdfReader
 from docx import Document as DocxDocument
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from .errors import PermanentIngestionError
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,42 +24,50 @@ class TextExtractor:
     """
     
     @staticmethod
-    def extract_text(file_path: str) -> str:
+    def extract_text(file_path: str, on_page: Optional[Callable[[int], None]] = None) -> str:
         """
         Extract text from PDF, DOCX, or TXT files.
         
         Args:
             file_path: Path to the file to extract text from
+            on_page: Optional callback receiving the number of pages extracted so far
             
         Returns:
             Extracted text as string
             
         Raises:
-            ValueError: If file format is not supported
+            PermanentIngestionError: If file format is not supported
             Exception: If extraction fails
         """
         file_extension = Path(file_path).suffix.lower()
         
         try:
             if file_extension == '.pdf':
-                return TextExtractor._extract_from_pdf(file_path)
+                return TextExtractor._extract_from_pdf(file_path, on_page)
             elif file_extension == '.docx':
-                return TextExtractor._extract_from_docx(file_path)
+                text = TextExtractor._extract_from_docx(file_path)
             elif file_extension == '.txt':
-                return TextExtractor._extract_from_txt(file_path)
+                text = TextExtractor._extract_from_txt(file_path)
             else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
+                raise PermanentIngestionError(f"Unsupported file format: {file_extension}")
+            
+            # DOCX and TXT have no pages; count the whole file as one
+            if on_page:
+                on_page(1)
+            return text
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             raise
     
     @staticmethod
-    def _extract_from_pdf(file_path: str) -> str:
+    def _extract_from_pdf(file_path: str, on_page: Optional[Callable[[int], None]] = None) -> str:
         """Extract text from PDF file."""
         text = ""
         reader = PdfReader(file_path)
-        for page in reader.pages:
+        for page_number, page in enumerate(reader.pages, start=1):
             text += page.extract_text() + "\n"
+            if on_page:
+                on_page(page_number)
         return text.strip()
     
     @staticmethod
@@ -142,15 +154,36 @@ class EmbeddingGenerator:
         return self.embeddings_model.embed_documents(texts)
 
 
-def get_embedding_function():
+def get_embedding_generator(model_name: Optional[str] = None) -> EmbeddingGenerator:
+    """
+    Get a process-wide EmbeddingGenerator so each model is loaded only once.
+    
+    Args:
+        model_name: HuggingFace model name; DOCUMENT_EMBEDDING_MODEL if omitted
+    
+    Returns:
+        Shared EmbeddingGenerator instance
+    """
+    return _load_embedding_generator(model_name or settings.DOCUMENT_EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=None)
+def _load_embedding_generator(model_name: str) -> EmbeddingGenerator:
+    return EmbeddingGenerator(model_name)
+
+
+def get_embedding_function(model_name: Optional[str] = None):
     """
     Get the default embedding function for use in ChromaDB.
     
+    Args:
+        model_name: HuggingFace model name; DOCUMENT_EMBEDDING_MODEL if omitted
+    
     Returns:
         HuggingFaceEmbeddings instance
     """
     return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        model_name=model_name or settings.DOCUMENT_EMBEDDING_MODEL,
         model_kwargs={'device': 'cpu'},
         encode_kwargs={'normalize_embeddings': True}
-    )
\ No newline at end of file
+    )
@@ -1,28 +1,61 @@
 """
 API views for document management.
 """
+import os
+import uuid
 import logging
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
 
-from .models import Document
-from .serializers import DocumentSerializer, DocumentListSerializer
-from .tasks import process_uploaded_document
+from accounts.authentication import CachedJWTAuthentication
+from config.fastread import ValuesListMixin
+from config.versioning import ConditionalResponseMixin, update_tracked
+from .models import Document, DocumentBatch, UploadSession
+from .serializers import (
+    DocumentSerializer, DocumentListSerializer, DocumentProgressSerializer, document_list_rows,
+    DirectUploadCreateSerializer, DirectUploadCompleteSerializer,
+    ResumableUploadCreateSerializer, UploadSessionSerializer, DocumentBatchCreateSerializer
+)
+from . import batch, direct_upload, resumable
+from .batch import BatchUploadError
+from .direct_upload import DirectUploadError
+from .resumable import ResumableUploadError
+from .scheduling import get_tenant, schedule_document
 from .chroma_handler import ChromaHandler
+from .embedding_models import get_collection_name, get_index_models
+from .pagination import DocumentKeysetPagination
+from .events import publish_document_status, document_status_payload, stream_document_events
+from .index_version import bump_index_version
+from .tasks import IN_FLIGHT_STATUSES, schedule_generation_cleanup
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of documents per batched status request
+MAX_BATCH_STATUS_IDS = 100
+
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(ConditionalResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for document CRUD operations with user isolation.
+    List and detail responses carry ETags and honour If-None-Match.
+    The list is read through values() rather than serializer instances.
     """
+    etag_resource = 'documents'
     serializer_class = DocumentSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = DocumentKeysetPagination
+    list_row_mapper = document_list_rows
     
     def get_queryset(self):
         """Filter documents by current user."""
@@ -37,34 +70,44 @@ class DocumentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Save document and trigger processing task."""
         document = serializer.save()
-        
+        self._start_processing(document)
+    
+    def _start_processing(self, document):
+        """Queue the document for processing, marking it failed if that fails."""
         # Trigger async processing
         try:
-            task = process_uploaded_document.delay(str(document.id))
-            logger.info(f"Started processing task {task.id} for document {document.id}")
+            lane = schedule_document(document)
+            logger.info(f"Queued document {document.id} for processing on the {lane} lane")
         except Exception as e:
             logger.error(f"Error starting processing task for document {document.id}: {str(e)}")
             # Update document status to failed
             document.status = 'failed'
             document.error_message = f"Failed to start processing: {str(e)}"
             document.save()
+            publish_document_status(document)
     
     def destroy(self, request, *args, **kwargs):
         """Delete document and associated embeddings."""
         document = self.get_object()
         
-        # Delete from ChromaDB if processing was completed
-        if document.status == 'completed':
+        # Delete from ChromaDB; a failed or unfinished run may have stored chunks too
+        if document.status != 'pending' or document.checkpoints:
             try:
                 chroma_handler = ChromaHandler()
-                chroma_handler.delete_user_documents(
-                    collection_name="documents",
-                    user_id=str(request.user.id),
-                    doc_id=str(document.id)
-                )
+                # Including a collection being migrated to
+                for model_name in get_index_models(get_tenant(request.user)):
+                    chroma_handler.delete_user_documents(
+                        collection_name=get_collection_name(model_name),
+                        user_id=str(request.user.id),
+                        doc_id=str(document.id)
+                    )
+                bump_index_version(str(request.user.id))
                 logger.info(f"Deleted embeddings for document {document.id}")
             except Exception as e:
                 logger.error(f"Error deleting embeddings for document {document.id}: {str(e)}")
+            if document.status in IN_FLIGHT_STATUSES:
+                # The run can still store chunks after this; collect them once it stops
+                schedule_generation_cleanup(str(document.id))
         
         return super().destroy(request, *args, **kwargs)
     
@@ -75,25 +118,32 @@ class DocumentViewSet(viewsets.ModelViewSet):
         """
         document = self.get_object()
         
-        # Only allow reprocessing if not currently processing
-        if document.status == 'processing':
+        # Reset status and clear error message, unless the document is queued
+        # or being ingested; in one conditional update so two concurrent
+        # requests cannot both schedule it
+        reset = update_tracked(
+            Document.objects.filter(id=document.id).exclude(status__in=IN_FLIGHT_STATUSES),
+            'documents',
+            'user_id',
+            status='pending',
+            error_message=''
+        )
+        if not reset:
             return Response(
                 {'error': 'Document is currently being processed'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Reset status and clear error message
         document.status = 'pending'
         document.error_message = ''
-        document.save()
+        publish_document_status(document)
         
         # Trigger processing
         try:
-            task = process_uploaded_document.delay(str(document.id))
-            logger.info(f"Started reprocessing task {task.id} for document {document.id}")
+            lane = schedule_document(document)
+            logger.info(f"Queued document {document.id} for reprocessing on the {lane} lane")
             
             return Response(
-                {'message': 'Document reprocessing started', 'task_id': task.id},
+                {'message': 'Document reprocessing started', 'lane': lane},
                 status=status.HTTP_200_OK
             )
         except Exception as e:
@@ -103,8 +153,300 @@ class DocumentViewSet(viewsets.ModelViewSet):
             document.status = 'failed'
             document.error_message = f"Failed to start reprocessing: {str(e)}"
             document.save()
+            publish_document_status(document)
             
             return Response(
                 {'error': 'Failed to start reprocessing'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['post'], url_path='uploads', parser_classes=[JSONParser])
+    def start_upload(self, request):
+        """
+        POST /api/documents/uploads/  {"filename", "size", "title"?}
+        
+        Start a direct-to-storage multipart upload. Returns presigned URLs;
+        PUT each part to its URL, then call the complete endpoint with the
+        ETag of every part.
+        """
+        if not direct_upload.direct_uploads_available():
+            return Response(
+                {'error': 'Direct uploads require S3 storage'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        serializer = DirectUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = direct_upload.start_upload(
+                request.user,
+                serializer.validated_data['filename'],
+                serializer.validated_data['size'],
+                serializer.validated_data.get('title', '')
+            )
+        except DirectUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response(upload, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser],
+            url_path=r'uploads/(?P<upload_id>[^/]+)/complete')
+    def complete_upload(self, request, upload_id=None):
+        """
+        POST /api/documents/uploads/<upload_id>/complete/  {"parts": [{"part_number", "etag"}]}
+        
+        Assemble the uploaded parts, register the Document and queue processing.
+        """
+        session = direct_upload.get_upload_session(upload_id, request.user)
+        if session is None:
+            return Response({'error': 'Upload not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            document = direct_upload.complete_upload(upload_id, session, serializer.validated_data['parts'])
+        except DirectUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        self._start_processing(document)
+        return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
+    
+    @complete_upload.mapping.delete
+    def abort_upload(self, request, upload_id=None):
+        """
+        DELETE /api/documents/uploads/<upload_id>/complete/
+        
+        Abort an unfinished upload and discard its parts.
+        """
+        session = direct_upload.get_upload_session(upload_id, request.user)
+        if session is None:
+            return Response({'error': 'Upload not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            direct_upload.abort_upload(upload_id, session)
+        except DirectUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=False, methods=['post'], url_path='resumable', parser_classes=[JSONParser])
+    def create_resumable_upload(self, request):
+        """
+        POST /api/documents/resumable/  {"filename", "size", "title"?, "sha256"?}
+        
+        Start a resumable upload session. Send the content with PATCH
+        requests carrying `Content-Range: bytes <start>-<end>/<size>`, then
+        finalize. If `sha256` is given the finalized content must match it.
+        """
+        serializer = ResumableUploadCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save()
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'], url_path=r'resumable/(?P<session_id>[0-9a-f-]+)')
+    def resumable_upload(self, request, session_id=None):
+        """
+        GET /api/documents/resumable/<id>/
+        
+        Session state; `offset` is where to resume after an interrupted upload.
+        """
+        session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+        return Response(UploadSessionSerializer(session).data)
+    
+    @resumable_upload.mapping.patch
+    def upload_chunk(self, request, session_id=None):
+        """
+        PATCH /api/documents/resumable/<id>/  (raw bytes, Content-Range header)
+        
+        Append the next byte range. Chunks must arrive in order; a chunk at
+        the wrong offset gets 409 with the offset to resume from.
+        """
+        try:
+            session = resumable.append_chunk(
+                session_id,
+                request.user,
+                request.headers.get('Content-Range'),
+                request.stream
+            )
+        except ResumableUploadError as e:
+            body = {'error': str(e)}
+            if e.offset is not None:
+                body['offset'] = e.offset
+            return Response(body, status=e.status_code)
+        return Response(UploadSessionSerializer(session).data)
+    
+    @action(detail=False, methods=['post'], url_path=r'resumable/(?P<session_id>[0-9a-f-]+)/finalize')
+    def finalize_resumable_upload(self, request, session_id=None):
+        """
+        POST /api/documents/resumable/<id>/finalize/
+        
+        Check the assembled file's hash and size, validate it like a normal
+        upload, store it as a Document and queue processing.
+        """
+        session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+        if session.document_id:
+            return Response(DocumentSerializer(session.document).data)
+        
+        try:
+            content_hash = resumable.verify_upload(session)
+        except ResumableUploadError as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=e.status_code)
+        
+        # title is required by the serializer, so default it here like batch uploads do
+        data = {
+            'file': resumable.open_upload(session),
+            'title': session.title or os.path.splitext(session.filename)[0],
+        }
+        try:
+            serializer = DocumentSerializer(data=data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            document = serializer.save()
+        finally:
+            data['file'].close()
+        
+        session.document = document
+        session.save(update_fields=['document', 'updated_at'])
+        resumable.discard_upload(session)
+        self._start_processing(document)
+        return Response(
+            {**DocumentSerializer(document).data, 'sha256': content_hash},
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['post'], url_path='batch',
+            parser_classes=[MultiPartParser, FormParser, JSONParser])
+    def create_batch(self, request):
+        """
+        POST /api/documents/batch/
+        
+        Import many documents in one request: multipart `files`, and/or JSON
+        `uploads` ([{"upload_id", "parts"}]) and `sessions` ([<id>]) for
+        direct and resumable uploads. The batch is all-or-nothing; its
+        documents are inserted together and processed as one task group.
+        """
+        serializer = DocumentBatchCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            documents, finished_sessions = batch.build_batch_documents(
+                request.user,
+                files=serializer.validated_data.get('files', []),
+                uploads=serializer.validated_data.get('uploads', []),
+                sessions=serializer.validated_data.get('sessions', [])
+            )
+        except (BatchUploadError, DirectUploadError, ResumableUploadError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        document_batch = batch.create_batch(request.user, documents, finished_sessions)
+        return Response(
+            {
+                **batch.get_batch_progress(document_batch),
+                'documents': DocumentListSerializer(documents, many=True).data,
+            },
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['get'], url_path=r'batch/(?P<batch_id>[0-9a-f-]+)')
+    def batch_progress(self, request, batch_id=None):
+        """
+        GET /api/documents/batch/<id>/
+        
+        Aggregated progress of a batch: document counts per status and
+        chunk totals.
+        """
+        document_batch = get_object_or_404(DocumentBatch, id=batch_id, user=request.user)
+        return Response(batch.get_batch_progress(document_batch))
+    
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """
+        GET /api/documents/<id>/progress/
+        
+        Per-stage ingestion progress: current stage and when it started,
+        page/chunk counters and timings of finished stages.
+        """
+        return self._conditional(self._progress, request, pk=pk)
+    
+    def _progress(self, request, pk=None):
+        document = self.get_object()
+        return Response(DocumentProgressSerializer(document).data)
+    
+    @action(detail=False, methods=['get'], url_path='status')
+    def batch_status(self, request):
+        """
+        GET /api/documents/status/?ids=<uuid>,<uuid>,...
+        
+        Status of many documents in one request, for fallback polling when
+        the event stream is unavailable.
+        """
+        raw_ids = [value for value in request.query_params.get('ids', '').split(',') if value]
+        if len(raw_ids) > MAX_BATCH_STATUS_IDS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_STATUS_IDS} ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = [uuid.UUID(value) for value in raw_ids]
+        except ValueError:
+            return Response({'error': 'ids must be document UUIDs'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        documents = self.get_queryset().filter(id__in=ids).values('id', 'title', 'status', 'error_message')
+        return Response({
+            'documents': [
+                {**doc, 'id': str(doc['id'])} for doc in documents
+            ]
+        })
+
+
+def _authenticate_stream(request):
+    """
+    Authenticate an event stream request with a JWT access token.
+    EventSource cannot set headers, so the token may also come from ?token=.
+    
+    Returns:
+        The authenticated user, or None
+    """
+    jwt_auth = CachedJWTAuthentication()
+    header = jwt_auth.get_header(request)
+    raw_token = jwt_auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        validated_token = jwt_auth.get_validated_token(raw_token)
+        user = jwt_auth.get_user(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+def document_status_stream(request):
+    """
+    GET /api/documents/events/
+    
+    Server-Sent Events stream of the user's document status and progress
+    changes. Sends the current state of in-flight documents on connect,
+    then every transition published by the processing task.
+    """
+    user = _authenticate_stream(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'},
+                            status=401)
+    
+    in_flight = Document.objects.filter(
+        user=user,
+        status__in=['pending', 'processing', 'embedding']
+    )
+    initial_payloads = [document_status_payload(doc) for doc in in_flight]
+    # request_finished only fires when the stream ends, so hand the database
+    # connection back now instead of holding it for the stream's lifetime
+    if not connection.in_atomic_block:
+        connection.close()
+
+    response = StreamingHttpResponse(
+        stream_document_events(
+            user.id,
+            initial_payloads=initial_payloads,
+            heartbeat_seconds=getattr(settings, 'DOCUMENT_EVENTS_HEARTBEAT_SECONDS', 15)
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
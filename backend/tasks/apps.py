@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from config.versioning import track_resource_version
+        from .models import Task
+
+        # Invalidate task list/detail ETags on every write
+        track_resource_version(Task, 'tasks', 'created_by_id')
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-19 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='task_user_status_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_active_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'done'), _negated=True), fields=['created_by', '-created_at', '-id'], name='task_active_idx'),
+        ),
+    ]
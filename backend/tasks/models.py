@@ -54,6 +54,17 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Task list and by-status filters, newest first; -id matches the keyset tiebreaker
+            models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='task_user_status_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='task_user_created_idx'),
+            # Active (non-done) tasks
+            models.Index(
+                fields=['created_by', '-created_at', '-id'],
+                name='task_active_idx',
+                condition=~models.Q(status='done')
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.status})"
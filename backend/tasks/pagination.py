@@ -0,0 +1,13 @@
+"""
+Pagination classes for tasks API.
+"""
+from config.pagination import KeysetPagination
+
+
+class TaskKeysetPagination(KeysetPagination):
+    """
+    Newest-first keyset pagination for tasks.
+    """
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
@@ -2,6 +2,8 @@
 Serializers for task management API.
 """
 from rest_framework import serializers
+
+from config.fastread import ValuesRowMapper
 from .models import Task
 
 
@@ -64,3 +66,7 @@ class TaskListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'status', 'priority', 'due_date', 'created_by_ai']
+
+
+# values() read path producing TaskListSerializer output
+task_list_rows = ValuesRowMapper(TaskListSerializer)
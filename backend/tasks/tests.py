@@ -1,3 +1,189 @@
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from config.testing import QueryPlanTestMixin
+from config.versioning import update_tracked
+from .models import Task
+from .pagination import TaskKeysetPagination
+from .serializers import TaskListSerializer, task_list_rows
+
+User = get_user_model()
+
+
+class TaskQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """
+    Hot task queries must be served by an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'tasks{i}@example.com', username=f'tasks{i}', password='testpass123')
+            for i in range(5)
+        ]
+        statuses = ['todo', 'in_progress', 'done', 'done']
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                created_by=cls.users[i % 5],
+                status=statuses[i % 4],
+                created_by_ai=i % 3 == 0
+            )
+            for i in range(500)
+        ])
+
+    def _pages(self, queryset):
+        # First and later pages exactly as the endpoints read them
+        paginator = TaskKeysetPagination()
+        last = paginator.get_page_queryset(queryset).first()
+        return [
+            paginator.get_page_queryset(queryset)[:paginator.page_size + 1],
+            paginator.get_page_queryset(queryset, (last.created_at, last.id))[:paginator.page_size + 1],
+        ]
+
+    def test_user_tasks_by_status(self):
+        for page in self._pages(Task.objects.filter(created_by=self.users[0], status='todo')):
+            self.assertUsesIndex(page, 'task_user_status_idx')
+
+    def test_user_active_tasks(self):
+        for page in self._pages(Task.objects.filter(created_by=self.users[0]).exclude(status='done')):
+            self.assertUsesIndex(page, 'task_active_idx')
+
+    def test_user_tasks_newest_first(self):
+        for page in self._pages(Task.objects.filter(created_by=self.users[0])):
+            self.assertUsesIndex(page, 'task_user_created_idx')
+
+
+class TaskListValuesReadTests(APITestCase):
+    """
+    The values() read path must produce exactly the list serializer's output.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='values@example.com', username='values', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(created_by=self.user, title='No due date')
+        Task.objects.create(
+            created_by=self.user, title='Due soon', status='in_progress', priority='high',
+            due_date=timezone.now() + timedelta(days=1), created_by_ai=True
+        )
+
+    def test_matches_serializer(self):
+        queryset = Task.objects.filter(created_by=self.user).order_by('-created_at', '-id')
+        self.assertEqual(
+            task_list_rows.to_representation(task_list_rows.values(queryset)),
+            TaskListSerializer(queryset, many=True).data
+        )
+
+    def test_list_endpoint(self):
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([row['title'] for row in response.json()['results']], ['Due soon', 'No due date'])
+
+
+class TaskPaginationTests(APITestCase):
+    """
+    Task list endpoints page with keyset cursors; grouped groups page independently.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='pages@example.com', username='pages', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        start = timezone.now() - timedelta(hours=1)
+        for i, status in enumerate(['todo'] * 3 + ['done'] * 3):
+            task = Task.objects.create(created_by=self.user, title=f'{status} {i}', status=status, created_by_ai=i % 2 == 0)
+            Task.objects.filter(id=task.id).update(created_at=start + timedelta(minutes=i))
+
+    def _follow(self, url, params):
+        titles = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            titles.extend(row['title'] for row in response.data['results'])
+            url, params = response.data['next'], None
+        return titles
+
+    def test_list_pages_cover_all_tasks(self):
+        self.assertEqual(
+            self._follow(reverse('task-list'), {'page_size': 2}),
+            ['done 5', 'done 4', 'done 3', 'todo 2', 'todo 1', 'todo 0']
+        )
+
+    def test_active_and_ai_created_are_paginated(self):
+        self.assertEqual(self._follow(reverse('task-active'), {'page_size': 2}), ['todo 2', 'todo 1', 'todo 0'])
+        self.assertEqual(self._follow(reverse('task-ai-created'), {'page_size': 1}), ['done 4', 'todo 2', 'todo 0'])
+
+    def test_by_status_groups_have_own_cursors(self):
+        url = reverse('task-by-status')
+        first = self.client.get(url, {'page_size': 2}).data
+        self.assertEqual([row['title'] for row in first['done']['results']], ['done 5', 'done 4'])
+        self.assertEqual(first['in_progress'], {'next': None, 'results': []})
+
+        # The group's next link continues on the list endpoint
+        self.assertEqual(self._follow(first['todo']['next'], None), ['todo 0'])
+
+        next_query = parse_qs(urlparse(first['todo']['next']).query)
+        self.assertEqual((next_query['status'], next_query['page_size']), (['todo'], ['2']))
+        todo_cursor = next_query['cursor'][0]
+        second = self.client.get(url, {'page_size': 2, 'todo_cursor': todo_cursor}).data
+        self.assertEqual([row['title'] for row in second['todo']['results']], ['todo 0'])
+        # Other groups are not moved by the todo cursor
+        self.assertEqual([row['title'] for row in second['done']['results']], ['done 5', 'done 4'])
+
+
+class TaskConditionalResponseTests(APITestCase):
+    """
+    Task reads carry ETags that answer If-None-Match with 304 until a write.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='etag@example.com', username='etag', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(created_by=self.user, title='Cached')
+        self.list_url = reverse('task-list')
+
+    def _etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+        return response['ETag']
+
+    def test_matching_etag_is_not_modified(self):
+        for url in (self.list_url, reverse('task-detail', kwargs={'pk': self.task.id})):
+            etag = self._etag(url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertFalse(response.content)
+
+    def test_write_changes_etag(self):
+        etag = self._etag(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.list_url, {'title': 'New task'}, format='json')
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_users_writes_keep_etag(self):
+        etag = self._etag(self.list_url)
+        other = User.objects.create_user(email='etag2@example.com', username='etag2', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(created_by=other, title='Not mine')
+
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_tracked_update_changes_etag(self):
+        etag = self._etag(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = update_tracked(Task.objects.filter(id=self.task.id), 'tasks', 'created_by_id', status='done')
 
-# Create your tests here.
+        self.assertEqual(updated, 1)
+        self.assertNotEqual(self._etag(self.list_url), etag)
@@ -2,37 +2,61 @@
 API views for task management.
 """
 import logging
+from django.urls import reverse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.permissions import IsAuthenticated
 
+from config.fastread import ValuesListMixin
+from config.versioning import ConditionalResponseMixin
 from .models import Task
-from .serializers import TaskSerializer, TaskCreateSerializer, TaskListSerializer
+from .serializers import TaskSerializer, TaskCreateSerializer, TaskListSerializer, task_list_rows
+from .pagination import TaskKeysetPagination
 
 logger = logging.getLogger(__name__)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for task CRUD operations with user isolation.
     
     Provides:
-    - GET /tasks/ - List all tasks for current user
+    - GET /tasks/ - List tasks for current user (keyset paginated, optional ?status=)
     - POST /tasks/ - Create a new task
     - GET /tasks/{id}/ - Get task details
     - PUT /tasks/{id}/ - Update task
     - PATCH /tasks/{id}/ - Partial update
     - DELETE /tasks/{id}/ - Delete task
+    
+    List and detail responses carry ETags and honour If-None-Match.
+    List endpoints are read through values() rather than serializer instances.
     """
     permission_classes = [IsAuthenticated]
+    etag_resource = 'tasks'
+    pagination_class = TaskKeysetPagination
+    list_row_mapper = task_list_rows
     
     def get_queryset(self):
         """
         Return only tasks belonging to the current user.
         Ensures user isolation - users can only see their own tasks.
         """
-        return Task.objects.filter(created_by=self.request.user)
+        queryset = Task.objects.filter(created_by=self.request.user)
+        
+        # Optional status filter for the list endpoint
+        status_filter = self.request.query_params.get('status')
+        if self.action == 'list' and status_filter in dict(Task.STATUS_CHOICES):
+            queryset = queryset.filter(status=status_filter)
+        
+        return queryset
+    
+    def _paginated_list(self, queryset):
+        """
+        Paginate a task queryset in the list serializer's format.
+        """
+        return self.values_list_response(queryset)
     
     def get_serializer_class(self):
         """
@@ -57,21 +81,44 @@ class TaskViewSet(viewsets.ModelViewSet):
         Get all active (non-done) tasks for the current user.
         """
         active_tasks = self.get_queryset().exclude(status='done')
-        serializer = TaskListSerializer(active_tasks, many=True)
-        return Response(serializer.data)
+        return self._paginated_list(active_tasks)
     
     @action(detail=False, methods=['get'])
     def by_status(self, request):
         """
         Get tasks grouped by status.
+        
+        Returns the first page of each status; each group's `next` link
+        continues on the list endpoint filtered by that status. A group can
+        also be paged here with its own cursor, e.g. ?todo_cursor=...
         """
-        queryset = self.get_queryset()
+        statuses = ['todo', 'in_progress', 'done']
+        queryset = task_list_rows.values(self.get_queryset(), 'created_at')
         
-        result = {
-            'todo': TaskListSerializer(queryset.filter(status='todo'), many=True).data,
-            'in_progress': TaskListSerializer(queryset.filter(status='in_progress'), many=True).data,
-            'done': TaskListSerializer(queryset.filter(status='done'), many=True).data,
-        }
+        # Next links keep the client's query (page_size), minus the group cursors
+        list_url = request.build_absolute_uri(reverse('task-list'))
+        if request.GET:
+            list_url = f"{list_url}?{request.GET.urlencode()}"
+        for status_value in statuses:
+            list_url = remove_query_param(list_url, f'{status_value}_cursor')
+        
+        result = {}
+        for status_value in statuses:
+            paginator = self.pagination_class()
+            # One cursor per group; a shared ?cursor would skip rows in the others
+            paginator.cursor_query_param = f'{status_value}_cursor'
+            page = paginator.paginate_queryset(queryset.filter(status=status_value), request, view=self)
+            next_link = None
+            if paginator.next_cursor:
+                next_link = replace_query_param(
+                    replace_query_param(list_url, 'status', status_value),
+                    'cursor',
+                    paginator.next_cursor
+                )
+            result[status_value] = {
+                'next': next_link,
+                'results': task_list_rows.to_representation(page),
+            }
         
         return Response(result)
     
@@ -93,5 +140,4 @@ class TaskViewSet(viewsets.ModelViewSet):
         Get all tasks created by the AI agent.
         """
         ai_tasks = self.get_queryset().filter(created_by_ai=True)
-        serializer = TaskListSerializer(ai_tasks, many=True)
-        return Response(serializer.data)
+        return self._paginated_list(ai_tasks)
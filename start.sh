@@ -188,10 +188,10 @@ echo -e "${NC}"
 if [ "$BACKEND_ONLY" = true ]; then
     echo -e "${YELLOW}📋 Showing backend logs (Ctrl+C to stop):${NC}"
     cd "$BACKEND_DIR"
-    docker-compose logs -f web worker
+    docker-compose logs -f web worker beat
 else
     # Keep script running and show backend logs
     echo -e "${YELLOW}📋 Showing backend logs (Ctrl+C to stop):${NC}"
     cd "$BACKEND_DIR"
-    docker-compose logs -f web worker
+    docker-compose logs -f web worker beat
 fi